@@ -1,7 +1,10 @@
-
+import argparse
 import subprocess
 import time
 
+from workbook_backend import forget_excel_pid, owned_excel_pids, terminate_process
+from workbook_server import stop_server
+
 def kill_all_excel():
     """
     실행 중인 모든 Excel 프로세스 강제 종료
@@ -14,5 +17,44 @@ def kill_all_excel():
     )
     time.sleep(1)
 
+def kill_owned_excel():
+    """
+    이 스크립트들이 띄운 Excel 만 종료 (사용자가 열어둔 Excel 은 그대로)
+    - 세션 서버가 떠 있으면 먼저 정상 종료 요청
+    - 남은 기록(중간에 멈춘 실행 등)은 시작 시각이 기록과 같은 프로세스만 강제 종료
+      (PID 가 재사용된 다른 프로세스는 건드리지 않음)
+    - 기록은 종료했거나 이미 없어진 PID 만 지움 (종료 실패 / 확인 불가는 남겨 둠)
+    """
+    if stop_server():
+        print("⏹ 세션 서버 종료 요청")
+        time.sleep(1)
+
+    killed = False
+    for pid, info in owned_excel_pids().items():
+        label = f"pid {pid} ({info.get('owner')}, {info.get('started')})"
+        result = terminate_process(pid, info.get("created"))
+        if result == "terminated":
+            print(f"🧹 Excel 종료: {label}")
+            killed = True
+        elif result == "gone":
+            print(f"ℹ 이미 종료됨: {label}")
+        elif result == "reused":
+            print(f"ℹ 다른 프로세스가 PID 재사용 - 건드리지 않음: {label}")
+        elif result == "unverified":
+            print(f"⚠ 시작 시각 기록이 없어 확인 불가 - 종료하지 않음: {label}")
+            continue
+        else:
+            print(f"⚠ Excel 종료 실패: {label}")
+            continue
+        forget_excel_pid(pid)
+    if killed:
+        time.sleep(1)
+
 if __name__ == "__main__":
-    kill_all_excel()
+    parser = argparse.ArgumentParser(description="이 스크립트들이 띄운 Excel 종료")
+    parser.add_argument("--all", action="store_true", help="사용자가 열어둔 것까지 모든 Excel 강제 종료")
+    args = parser.parse_args()
+    if args.all:
+        kill_all_excel()
+    else:
+        kill_owned_excel()
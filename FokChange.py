@@ -1,16 +1,22 @@
-import os
-import pandas as pd
-import win32com.client as win32
-from config import get_fixed_customer_path
+from __future__ import annotations
+
+import argparse
+
+import changelog
+import sheet_cache
+from broker_io import read_broker_export
+from contract_snapshot import ContractSnapshot, normalize_keys
+from downloads import latest_file
+from excel_session import open_customer_workbook
+from sheet_writer import write_diff
+import profiling
+import tracing
 
 # ===========================
 # 1. 기본 설정
 # ===========================
-download_path = os.path.join(os.path.expanduser("~"), "Downloads")
-FILE_PREFIX = "file_"
-
-CUSTOMER_FILE = get_fixed_customer_path()
-PASSWORD = "nilla17()"
+SHEET_FOK = "FOK_DATA"
+CACHE_REGION = (1, 1)   # 로컬 스냅샷: A1 부터 (헤더 + 데이터)
 
 KEY_COL = "계약번호"
 ASSET_COL = "계좌자산"
@@ -19,116 +25,60 @@ STATUS_COL = "계약요청상태"
 NAME_COL = "고객명"
 
 # ===========================
-# 2. xls -> xlsx 변환
+# 2. 최신 증권사 파일 읽기
 # ===========================
-def convert_xls_to_xlsx(xls_path: str) -> str:
-    excel = win32.DispatchEx("Excel.Application")
-    try:
-        excel.Visible = False
-    except:
-        pass  # Ignore if can't set Visible property
-    try:
-        wb = excel.Workbooks.Open(xls_path)
-        xlsx_path = os.path.splitext(xls_path)[0] + ".xlsx"
-        wb.SaveAs(xlsx_path, FileFormat=51)
-        wb.Close()
-    finally:
-        excel.Quit()
-    return xlsx_path
-
-def normalize_key(val) -> str:
-    if val is None:
-        return ""
-    s = str(val).strip()
-    if s.endswith(".0"):
-        s = s[:-2]
-    return s
+def find_latest_broker_file() -> str:
+    return latest_file("fok")
+
+
+def load_broker_snapshot(path: str) -> ContractSnapshot:
+    """
+    증권사 파일 → 계약번호 기준 스냅샷 (컬럼 단위로 한 번에 정리)
+    """
+    df_new = read_broker_export(path, dtype={KEY_COL: str})
+
+    with tracing.span("normalize", rows=len(df_new)):
+        df_new.columns = df_new.columns.map(lambda x: str(x).replace(" ", ""))
+
+        for col in [KEY_COL, ASSET_COL, RET_COL, STATUS_COL]:
+            if col not in df_new.columns:
+                raise KeyError(f"증권사 파일에 '{col}' 컬럼이 없습니다.")
+
+        # 계약번호: 텍스트 숫자 → 숫자와 같은 표기 ("00123" → "123")
+        keys = normalize_keys(df_new[KEY_COL].to_numpy())
+        digits = keys.str.fullmatch(r"\d+")
+        keys[digits] = keys[digits].str.lstrip("0").replace("", "0")
+        df_new[KEY_COL] = keys.to_numpy()
+
+        # Simple approach - keep first occurrence
+        df_new_unique = df_new.drop_duplicates()
+
+        return ContractSnapshot.from_frame(df_new_unique, KEY_COL)
 
-# ===========================
-# 3. 최신 증권사 파일 읽기
-# ===========================
-xls_files = [
-    f for f in os.listdir(download_path)
-    if f.startswith(FILE_PREFIX) and f.endswith(".xls")
-]
-
-xls_files.sort(
-    key=lambda name: os.path.getmtime(os.path.join(download_path, name)),
-    reverse=True,
-)
-
-latest_xlsx = convert_xls_to_xlsx(os.path.join(download_path, xls_files[0]))
-df_new = pd.read_excel(latest_xlsx, dtype={KEY_COL: str})
-# 계약번호: 텍스트 → 숫자 변환 (가능한 경우만)
-def to_int_if_possible(x):
-    if x is None:
-        return x
-    s = str(x).strip()
-    if s.isdigit():
-        return int(s)   # 텍스트 숫자 → int
-    return x           # 숫자 아닌 건 그대로
-
-df_new[KEY_COL] = df_new[KEY_COL].apply(to_int_if_possible)
-
-df_new.columns = df_new.columns.map(lambda x: str(x).replace(" ", ""))
-
-for col in [KEY_COL, ASSET_COL, RET_COL, STATUS_COL]:
-    if col not in df_new.columns:
-        raise KeyError(f"증권사 파일에 '{col}' 컬럼이 없습니다.")
-
-df_new[KEY_COL] = df_new[KEY_COL].map(normalize_key)
-df_new = df_new[df_new[KEY_COL] != ""]
-
-# Simple approach - keep first occurrence
-df_new_unique = df_new.drop_duplicates()
-df_new_idx = df_new_unique.set_index(KEY_COL)
-
-asset_map = {}
-ret_map = {}
-status_map = {}
-row_map = {}
-
-for _, row in df_new_unique.iterrows():
-    key = row[KEY_COL]
-    asset_map[key] = row[ASSET_COL]
-    ret_map[key] = row[RET_COL] 
-    status_map[key] = row[STATUS_COL]
-    row_map[key] = row.to_dict()
 
 # ===========================
-# 4. FOK_DATA 업데이트
+# 3. FOK_DATA 업데이트
 # ===========================
-excel = None
-wb = None
-
-try:
-    excel = win32.DispatchEx("Excel.Application")
-    try:
-        excel.Visible = False
-    except:
-        pass
-    
-    xlUp = -4162
-    xlToLeft = -4159
-    
-    updated_rows = 0
-    cancelled_count = 0
-    status_changed_count = 0
-    cancelled_infos = []          # (계약번호, 이름)
-    status_changed_infos = []     # (계약번호, 이름)
-    new_infos = []   # (계약번호, 이름)
-    
-    wb = excel.Workbooks.Open(CUSTOMER_FILE, False, False, None, PASSWORD)
-    ws = wb.Worksheets("FOK_DATA")
-
-    last_row = ws.Cells(ws.Rows.Count, 1).End(xlUp).Row
-    last_col = ws.Cells(1, ws.Columns.Count).End(xlToLeft).Column
+def update_fok_data(wb, snapshot: ContractSnapshot):
+    import numpy as np
+
+    ws = wb.sheet(SHEET_FOK)
+
+    # 이전 상태 (헤더 + 데이터): 지난번 저장 직후 스냅샷이 유효하면 그것, 아니면 시트에서 읽기
+    cached = sheet_cache.load(SHEET_FOK, CACHE_REGION)
+    if cached:
+        header_row, data_list = list(cached[0]), [list(r) for r in cached[1:]]
+        last_col = len(header_row)
+    else:
+        last_row = ws.last_row(1)
+        last_col = ws.last_col(1)
+        header_row = ws.read(1, 1, 1, last_col)[0]
+        data_list = ws.read(2, 1, last_row, last_col) if last_row >= 2 else []
 
     header_names = [None] * last_col
     col_key = col_asset = col_ret = col_status = None
 
-    for c in range(1, last_col + 1):
-        h = ws.Cells(1, c).Value
+    for c, h in enumerate(header_row, start=1):
         if h:
             h = str(h).replace(" ", "")
             header_names[c - 1] = h
@@ -149,75 +99,69 @@ try:
         raise KeyError(f"'{RET_COL}' 컬럼을 찾을 수 없습니다.")
     if col_status is None:
         raise KeyError(f"'{STATUS_COL}' 컬럼을 찾을 수 없습니다.")
-    
+
     idx_key = col_key - 1
     idx_asset = col_asset - 1
     idx_ret = col_ret - 1
     idx_status = col_status - 1
 
-    data = ws.Range(ws.Cells(2, 1), ws.Cells(last_row, last_col)).Value
-    data_list = [list(r) for r in data] if data else []
+    # ===== 시트 계약번호 ↔ 스냅샷 한 번에 조인 =====
+    sheet_keys = normalize_keys([row[idx_key] for row in data_list])
+    pos = snapshot.positions(sheet_keys)
+    has_key = (sheet_keys != "").to_numpy()
+    matched = pos >= 0
 
-    existing_rows = []
-    existing_keys = set()
-
-    for row in data_list:
-        key = normalize_key(row[idx_key])
-        if not key:
-            continue
-
-        if key in asset_map:
-            row[idx_asset] = asset_map[key]
-            row[idx_ret] = ret_map[key]
-
-            # 🔴 계약요청상태 변경
-            if (
-                status_map.get(key) == "계약해지"
-                and row[idx_status] == "계약완료(승인)"
-            ):
-                row[idx_status] = "계약해지"
-                status_changed_count += 1
-                name = row_map[key].get(NAME_COL, "")
-                status_changed_infos.append((key, name))
-
-            updated_rows += 1
-            existing_rows.append(row)
-            existing_keys.add(key)
-        else:
-            cancelled_count += 1
-            name = row_map.get(key, {}).get(NAME_COL, "")
-            cancelled_infos.append((key, name))
+    has_name = NAME_COL in snapshot.columns
 
-    new_rows = []
-    for k in row_map.keys():
-        if k in existing_keys:
-            continue
+    def name_of(j):
+        return (snapshot.at(j, NAME_COL) if has_name else "") or ""
+
+    existing_rows = []
+    status_changed_infos = []     # (계약번호, 이름)
+    for i in np.flatnonzero(matched):
+        j = pos[i]
+        row = list(data_list[i])
+        row[idx_asset] = snapshot.at(j, ASSET_COL)
+        row[idx_ret] = snapshot.at(j, RET_COL)
 
-        row_dict = row_map[k]
-        row = [None] * last_col
+        # 🔴 계약요청상태 변경
+        if snapshot.at(j, STATUS_COL) == "계약해지" and row[idx_status] == "계약완료(승인)":
+            row[idx_status] = "계약해지"
+            status_changed_infos.append((sheet_keys[i], name_of(j)))
 
-        name = row_dict.get(NAME_COL, "")
-        new_infos.append((k, name))
+        existing_rows.append(row)
 
-        for i, h in enumerate(header_names):
-            if h and h in row_dict:
-                row[i] = row_dict[h]
+    # ❌ 해지: 시트에는 있는데 증권사 파일에 없는 계약 (이름은 파일에 없으니 빈 값)
+    cancelled_infos = [(sheet_keys[i], "") for i in np.flatnonzero(has_key & ~matched)]
 
-        row[idx_key] = k
-        row[idx_asset] = asset_map.get(k)
-        row[idx_ret] = ret_map.get(k)
-        row[idx_status] = status_map.get(k)
+    # ➕ 신규: 증권사 파일에는 있는데 시트에 없는 계약
+    seen = np.zeros(len(snapshot), dtype=bool)
+    seen[pos[matched]] = True
+    new_pos = np.flatnonzero(~seen)
 
+    new_rows = []
+    new_infos = []   # (계약번호, 이름)
+    for j in new_pos:
+        row = [snapshot.at(j, h) if h in snapshot.columns else None for h in header_names]
+        row[idx_key] = snapshot.keys[j]
+        row[idx_asset] = snapshot.at(j, ASSET_COL)
+        row[idx_ret] = snapshot.at(j, RET_COL)
+        row[idx_status] = snapshot.at(j, STATUS_COL)
         new_rows.append(row)
+        new_infos.append((snapshot.keys[j], name_of(j)))
 
     final_rows = existing_rows + new_rows
 
-    ws.Range(ws.Cells(2, 1), ws.Cells(last_row, last_col)).ClearContents()
-    ws.Range(ws.Cells(2, 1), ws.Cells(1 + len(final_rows), last_col)).Value = tuple(
-        tuple(r) for r in final_rows
-    )
+    updated_rows = len(existing_rows)
+    cancelled_count = len(cancelled_infos)
+    status_changed_count = len(status_changed_infos)
+
+    # 바뀐 셀만 기록 (자산/수익률/상태 몇 칸만 바뀌는 날이 대부분)
+    diff = write_diff(ws, data_list, final_rows, start_row=2, n_cols=last_col)
+    sheet_cache.store(SHEET_FOK, CACHE_REGION, [header_row] + final_rows)
 
     print(f"✅ 기존 고객 업데이트: {updated_rows}")
+    print(f"✏ 변경 셀 {diff.cells}개 (범위 {diff.ranges}개, COM 호출 {diff.com_calls}회)")
     print(f"🔁 계약완료 → 계약해지 변경: {status_changed_count}")
 
     # ❌ 해지(삭제)
@@ -239,23 +183,56 @@ try:
         print("=== 🔁 계약완료 → 계약해지 변경 ===")
         for k, name in status_changed_infos:
             print(f" - {k} / {name}")
-    
-
-    wb.Save()
-    try:
-        saved_path = wb.FullName
-        print(f"📂 엑셀 실제 저장 위치: {saved_path}")
-    except Exception as e:
-        print("⚠ 저장 위치를 확인하지 못했습니다:", e)
-finally:
-    try:
-        if wb is not None:
-            wb.Close(False)
-    except Exception as e:
-        print(f"⚠ 워크북 닫기 오류: {e}")
-    
-    try:
-        if excel is not None:
-            excel.Quit()
-    except Exception as e:
-        print(f"⚠ Excel 종료 오류: {e}")
\ No newline at end of file
+
+    # 변경 기록 (저장이 끝나면 changelog 에 기록)
+    for change, infos in (
+        (changelog.CANCELLED, cancelled_infos),
+        (changelog.NEW, new_infos),
+        (changelog.STATUS_CHANGED, status_changed_infos),
+    ):
+        changelog.add("FokChange", "fok", change, [(k, name, None) for k, name in infos])
+
+    return {
+        "updated": updated_rows,
+        "status_changed": status_changed_count,
+        "cancelled": cancelled_count,
+        "new": len(new_infos),
+        "cells_written": diff.cells,
+    }
+
+
+# ===========================
+# 4. 실행
+# ===========================
+def find_inputs() -> dict:
+    """이번 실행에 쓸 증권사 파일 {역할: 경로}"""
+    return {"fok": find_latest_broker_file()}
+
+
+def prepare(inputs: dict) -> ContractSnapshot:
+    """워크북 없이 증권사 파일 읽어서 정리 (미리 읽기 단계에서 별도 프로세스로 실행 가능)"""
+    return load_broker_snapshot(inputs["fok"])
+
+
+def apply(wb, prepared: ContractSnapshot) -> dict:
+    """이미 열린 고객 워크북(wb)에 정리된 결과 적용 (저장은 호출한 쪽에서)"""
+    return update_fok_data(wb, prepared)
+
+
+def run(wb, inputs: dict = None) -> dict:
+    """이미 열린 고객 워크북(wb)에 FOK_DATA 업데이트 적용 (저장은 호출한 쪽에서)"""
+    inputs = inputs or find_inputs()
+    return apply(wb, prepare(inputs))
+
+
+def main():
+    with open_customer_workbook() as wb:
+        run(wb)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FOK_DATA 업데이트")
+    parser.add_argument("--profile", action="store_true", help=profiling.PROFILE_HELP)
+    args = parser.parse_args()
+    with profiling.profiled("FokChange", enabled=args.profile):
+        main()
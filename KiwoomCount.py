@@ -1,20 +1,29 @@
-import os
-import pandas as pd
-import win32com.client as win32
-import gc
+from __future__ import annotations
+
+import argparse
 from datetime import datetime
-from config import get_fixed_customer_path
+from typing import TYPE_CHECKING
+import changelog
+import sheet_cache
+from broker_io import read_broker_export
+from downloads import latest_file
+from excel_session import open_customer_workbook
+from record_store import RecordStore
+from sheet_table import SheetTable, read_table
+from sheet_writer import write_block
+import profiling
+import tracing
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # ======================
 # 1. 기본 설정
 # ======================
-DOWNLOAD_DIR = os.path.join(os.path.expanduser("~"), "Downloads")
-LIST_PREFIX = "Excel_List_"
-
-PASSWORD = "nilla17()"
-
 HEADER_ROW = 5
+HEADER_COLS = 79  # 헤더를 찾을 열 범위 (A ~ CA)
 SHEET_KIWOOM = "키움_DATA_"
+CACHE_REGION = (HEADER_ROW, 1, HEADER_COLS)   # 로컬 스냅샷: 헤더 행 ~ 끝, A ~ CA
 
 
 DATE_FMT_STR = "%Y.%m.%d"
@@ -69,7 +78,6 @@ def format_phone_korea(raw):
     else:
         # 이상한 길이는 그냥 원본 반환
         return digits
-CUSTOMER_FILE = get_fixed_customer_path()
 
 
 def norm_col(s: str) -> str:
@@ -103,13 +111,6 @@ def add_one_year(dt: datetime) -> datetime:
         return dt.replace(month=2, day=28, year=dt.year + 1)
 
 
-def cell_text(ws, r, c) -> str:
-    try:
-        return str(ws.Cells(r, c).Text or "").strip()
-    except Exception:
-        return str(ws.Cells(r, c).Value or "").strip()
-
-
 def map_broker_type_to_customer(t: str) -> str:
     return "일반" if (t or "").strip() == "위탁종합" else (t or "").strip()
 
@@ -123,21 +124,13 @@ def make_broker_key(name, acct, acct_type):
 
 
 def set_cell_value_safe(ws, addr: str, value: str):
-    rng = ws.Range(addr)
-    if rng.MergeCells:
-        rng.MergeArea.Cells(1, 1).Value = value
-    else:
-        rng.Value = value
+    ws.set_merged_value(addr, value)
 
 
-def get_last_row(ws, col_idx: int) -> int:
-    return ws.Cells(ws.Rows.Count, col_idx).End(-4162).Row
-
-
-def find_last_kiwoom_row(ws, start_row, end_row, platform_col, name_col):
+def find_last_kiwoom_row(table: SheetTable, start_row, end_row, platform_col, name_col):
     for r in range(end_row, start_row - 1, -1):
-        platform = cell_text(ws, r, platform_col)
-        name = cell_text(ws, r, name_col)
+        platform = table.text(r, platform_col)
+        name = table.text(r, name_col)
         if name and "키움" in platform:
             return r
     return None
@@ -146,90 +139,118 @@ def find_last_kiwoom_row(ws, start_row, end_row, platform_col, name_col):
 # ======================
 # 3. 증권사 파일 로드
 # ======================
-def load_broker_df() -> pd.DataFrame:
-    files = [
-        f for f in os.listdir(DOWNLOAD_DIR)
-        if f.startswith(LIST_PREFIX) and f.lower().endswith((".xls", ".xlsx"))
-    ]
-    if not files:
-        raise FileNotFoundError("증권사 파일 없음")
-
-    files.sort(key=lambda f: os.path.getmtime(os.path.join(DOWNLOAD_DIR, f)), reverse=True)
-    path = os.path.join(DOWNLOAD_DIR, files[0])
-
-    if path.lower().endswith(".xls"):
-        excel = win32.DispatchEx("Excel.Application")
-        wb = excel.Workbooks.Open(path)
-        new_path = path.replace(".xls", ".xlsx")
-        wb.SaveAs(new_path, FileFormat=51)
-        wb.Close()
-        excel.Quit()
-        path = new_path
-
-    df = pd.read_excel(path)
+def load_broker_df(path: str = None) -> pd.DataFrame:
+    path = path or latest_file("kiwoom")
+
+    df = read_broker_export(path)
     df.columns = [norm_col(c) for c in df.columns]
     return df
 
 
 def build_broker_maps(df: pd.DataFrame):
-    broker_keys = set()
-    broker_lookup = {}
-
-    for _, r in df.iterrows():
-        k = make_broker_key(
-            r.get(BROKER_COL_NAME),
-            r.get(BROKER_COL_ACCT),
-            r.get(BROKER_COL_TYPE),
+    """
+    (broker_keys, broker_lookup)
+    broker_lookup: 키 → 증권사 행 (record_store.RecordStore, 행마다 Series 를 들고 있지 않음)
+    """
+    def column(name):
+        return df[name].tolist() if name in df.columns else [None] * len(df)
+
+    with tracing.span("normalize", rows=len(df)):
+        keys = [
+            make_broker_key(*vals)
+            for vals in zip(column(BROKER_COL_NAME), column(BROKER_COL_ACCT), column(BROKER_COL_TYPE))
+        ]
+        valid = [all(k) for k in keys]
+
+        broker_lookup = RecordStore.from_frame(
+            df[valid], [k for k, ok in zip(keys, valid) if ok]
         )
-        if all(k):
-            broker_keys.add(k)
-            broker_lookup[k] = r
+        broker_keys = set(broker_lookup.keys)
 
     return broker_keys, broker_lookup
 
 
-# ======================
-# 4. 메인 로직
-# ======================
-def update_kiwoom_data():
-    df_broker = load_broker_df()
-    broker_keys, broker_lookup = build_broker_maps(df_broker)
+def build_new_row(k, r, no, header_map) -> dict:
+    """신규 고객 한 줄 → {열 번호: 값}"""
+    import pandas as pd
+
+    row = {
+        header_map[COL_NO]: no,
+        header_map[COL_GUBUN]: "신규",
+        header_map[COL_PLATFORM]: "키움증권",
+        header_map[COL_NAME]: k[0],
+        header_map[COL_ACCT]: r.get(BROKER_COL_ACCT),
+        header_map[COL_TYPE]: map_broker_type_to_customer(r.get(BROKER_COL_TYPE)),
+    }
+    broker_contract_raw = r.get(BROKER_COL_CONTRACT)
+
+    if pd.notna(broker_contract_raw):
+        # 엑셀 datetime / 문자열 모두 대응
+        if isinstance(broker_contract_raw, datetime):
+            contract_dt = broker_contract_raw
+        else:
+            contract_dt = datetime.strptime(str(broker_contract_raw)[:10], "%Y.%m.%d")
+    else:
+        # 혹시 없으면 오늘 날짜 fallback
+        contract_dt = datetime.today()
 
-    contract_dt = datetime.today()
     end_dt = add_one_year(contract_dt)
 
-    excel = win32.DispatchEx("Excel.Application")
-    excel.Visible = False
-    excel.ScreenUpdating = False
-    excel.DisplayAlerts = False
+    row[header_map[COL_CONTRACT]] = contract_dt.strftime("%Y.%m.%d")
+    row[header_map[COL_CONTRACT_END]] = end_dt.strftime("%Y.%m.%d")
+    # 생년
+    birth = norm_digits(r.get(BROKER_COL_BIRTH))
+    if COL_BIRTH in header_map and len(birth) >= 2:
+        row[header_map[COL_BIRTH]] = birth[:2]
+
+    # 투자성향 (M열 고정)
+    row[INVEST_COL_FIXED] = clean_cell(r.get(BROKER_COL_INVEST))
+    # 전화번호 (010-0000-0000 포맷)
+    if COL_PHONE in header_map:
+        row[header_map[COL_PHONE]] = format_phone_korea(r.get(BROKER_COL_PHONE))
+    # 이메일
+    if COL_EMAIL in header_map:
+        row[header_map[COL_EMAIL]] = clean_cell(r.get(BROKER_COL_EMAIL))
+
+    if COL_BALANCE in header_map:
+        row[header_map[COL_BALANCE]] = ""
 
-    wb = excel.Workbooks.Open(CUSTOMER_FILE, False, False, None, PASSWORD)
-    ws = wb.Worksheets(SHEET_KIWOOM)
+    return row
+
+
+# ======================
+# 4. 메인 로직
+# ======================
+def update_kiwoom_data(wb, broker_keys, broker_lookup):
+    ws = wb.sheet(SHEET_KIWOOM)
+
+    # 헤더 행 ~ 마지막 행을 메모리 표로 (지난번 저장 직후 스냅샷이 유효하면 시트를 읽지 않음)
+    cached = sheet_cache.load(SHEET_KIWOOM, CACHE_REGION)
+    if cached is not None:
+        table = SheetTable(cached, HEADER_ROW)
+    else:
+        table = read_table(ws, HEADER_ROW, HEADER_COLS)
 
     # 헤더 매핑
-    header_map = {}
-    for c in range(1, 80):
-        v = ws.Cells(HEADER_ROW, c).Value
-        if v:
-            header_map[str(v).strip()] = c
+    header_map = table.header_map(HEADER_ROW)
 
     data_start = HEADER_ROW + 1
-    last_row = get_last_row(ws, header_map[COL_NO])
+    last_row = table.last_row(header_map[COL_NO])
 
     last_kiwoom_row = find_last_kiwoom_row(
-        ws, data_start, last_row, header_map[COL_PLATFORM], header_map[COL_NAME]
+        table, data_start, last_row, header_map[COL_PLATFORM], header_map[COL_NAME]
     )
 
-    last_no = int(cell_text(ws, last_kiwoom_row, header_map[COL_NO]))
+    last_no = int(table.text(last_kiwoom_row, header_map[COL_NO]))
     next_no = last_no + 1
 
     # 기존 키 생성
     existing = {}
     for r in range(data_start, last_row + 1):
         k = make_customer_key(
-            cell_text(ws, r, header_map[COL_NAME]),
-            cell_text(ws, r, header_map[COL_ACCT]),
-            cell_text(ws, r, header_map[COL_TYPE]),
+            table.text(r, header_map[COL_NAME]),
+            table.text(r, header_map[COL_ACCT]),
+            table.text(r, header_map[COL_TYPE]),
         )
         if all(k):
             existing[k] = r
@@ -239,92 +260,102 @@ def update_kiwoom_data():
 
     new_names = []
     canceled_names = []
+    new_changes, canceled_changes = [], []   # changelog 용 (키, 이름, 상세)
 
-    # 해지 처리
+    # 해지 처리 (구분 열은 메모리에서 고친 뒤 한 번에 기록)
+    gubun_col = header_map[COL_GUBUN]
+    canceled_rows = []
     for k, r in existing.items():
-        gubun = cell_text(ws, r, header_map[COL_GUBUN])
+        gubun = table.text(r, gubun_col)
         if gubun != "해지" and k not in broker_keys:
-            ws.Cells(r, header_map[COL_GUBUN]).Value = "해지"
+            canceled_rows.append(r)
             canceled_names.append(k[0])
+            canceled_changes.append((k[1], k[0], {"type": k[2]}))
+
+    if canceled_rows:
+        first, last = min(canceled_rows), max(canceled_rows)
+        gubun_values = [[table.value(r, gubun_col)] for r in range(first, last + 1)]
+        for r in canceled_rows:
+            gubun_values[r - first][0] = "해지"
+        write_block(ws, gubun_values, start_row=first, start_col=gubun_col)
 
     insert_row = last_kiwoom_row + 1
 
-    # 신규 추가
+    # 신규 추가 (한 번에 행 삽입 → 한 번에 2-D 기록)
+    new_rows = []
     for k in sorted(new_keys):
-        r = broker_lookup[k]
-
-        ws.Rows(insert_row).Insert()
-        ws.Cells(insert_row, header_map[COL_NO]).Value = next_no
+        new_rows.append(build_new_row(k, broker_lookup[k], next_no, header_map))
         next_no += 1
+        new_names.append(k[0])
+        new_changes.append((k[1], k[0], {"type": k[2]}))
 
-        ws.Cells(insert_row, header_map[COL_GUBUN]).Value = "신규"
-        ws.Cells(insert_row, header_map[COL_PLATFORM]).Value = "키움증권"
-        ws.Cells(insert_row, header_map[COL_NAME]).Value = k[0]
-        ws.Cells(insert_row, header_map[COL_ACCT]).Value = r.get(BROKER_COL_ACCT)
-        ws.Cells(insert_row, header_map[COL_TYPE]).Value = map_broker_type_to_customer(r.get(BROKER_COL_TYPE))
-        broker_contract_raw = r.get(BROKER_COL_CONTRACT)
-
-        if pd.notna(broker_contract_raw):
-            # 엑셀 datetime / 문자열 모두 대응
-            if isinstance(broker_contract_raw, datetime):
-                contract_dt = broker_contract_raw
-            else:
-                contract_dt = datetime.strptime(str(broker_contract_raw)[:10], "%Y.%m.%d")
-        else:
-            # 혹시 없으면 오늘 날짜 fallback
-            contract_dt = datetime.today()
-
-        end_dt = add_one_year(contract_dt)
-
-        ws.Cells(insert_row, header_map[COL_CONTRACT]).Value = contract_dt.strftime("%Y.%m.%d")
-        ws.Cells(insert_row, header_map[COL_CONTRACT_END]).Value = end_dt.strftime("%Y.%m.%d")
-        # 생년
-        birth = norm_digits(r.get(BROKER_COL_BIRTH))
-        if COL_BIRTH in header_map and len(birth) >= 2:
-            ws.Cells(insert_row, header_map[COL_BIRTH]).Value = birth[:2]
-
-        # 투자성향 (M열 고정)
-        ws.Cells(insert_row, INVEST_COL_FIXED).Value = clean_cell(r.get(BROKER_COL_INVEST))
-        # 전화번호 (010-0000-0000 포맷)
-        phone = format_phone_korea(r.get(BROKER_COL_PHONE))
-
-        if COL_PHONE in header_map:
-            ws.Cells(insert_row, header_map[COL_PHONE]).Value = phone
-        # 이메일
-        if COL_EMAIL in header_map:
-            ws.Cells(insert_row, header_map[COL_EMAIL]).Value = clean_cell(r.get(BROKER_COL_EMAIL))
-
-        if COL_BALANCE in header_map:
-            ws.Cells(insert_row, header_map[COL_BALANCE]).Value = ""
+    if new_rows:
+        ws.insert_rows(insert_row, len(new_rows))
 
-        new_names.append(k[0])
-        insert_row += 1
+        first_col = min(min(row) for row in new_rows)
+        last_col = max(max(row) for row in new_rows)
+        block = [
+            [row.get(c) for c in range(first_col, last_col + 1)]
+            for row in new_rows
+        ]
+        write_block(ws, block, start_row=insert_row, start_col=first_col)
 
     # A1 / A2 기록
     set_cell_value_safe(ws, "A1", "\n".join(new_names))
     set_cell_value_safe(ws, "A2", "\n".join(canceled_names))
 
-    wb.Save()
-    # ===========================
-    # 실제 저장된 위치 출력
-    # ===========================
-    try:
-        saved_path = wb.FullName
-        saved_dir = os.path.dirname(saved_path)
-        print(f"📂 실제 저장된 폴더: {saved_dir}")
-        print(f"📄 실제 저장된 파일: {saved_path}")
-    except Exception as e:
-        print("⚠ 저장 위치 확인 실패:", e)
-    wb.Close(SaveChanges=False)
-    excel.Quit()
-    gc.collect()
-
     print("신규:", new_names)
     print("해지:", canceled_names)
 
+    # 시트에 한 일을 메모리 표에도 반영 → 저장이 끝나면 로컬 스냅샷으로 기록
+    for r in canceled_rows:
+        table.rows[r - table.first_row][gubun_col - 1] = "해지"
+    for offset, row in enumerate(new_rows):
+        values = [None] * HEADER_COLS
+        for c, v in row.items():
+            values[c - 1] = v
+        table.rows.insert(insert_row - table.first_row + offset, values)
+    sheet_cache.store(SHEET_KIWOOM, CACHE_REGION, table.rows)
+
+    # 변경 기록 (저장이 끝나면 changelog 에 기록)
+    changelog.add("KiwoomCount", "kiwoom", changelog.NEW, new_changes)
+    changelog.add("KiwoomCount", "kiwoom", changelog.CANCELLED, canceled_changes)
+    return {"new": len(new_names), "canceled": len(canceled_names)}
+
 
 # ======================
 # 5. 실행
 # ======================
+def find_inputs() -> dict:
+    """이번 실행에 쓸 증권사 파일 {역할: 경로}"""
+    return {"kiwoom": latest_file("kiwoom")}
+
+
+def prepare(inputs: dict):
+    """워크북 없이 증권사 파일 읽어서 (broker_keys, broker_lookup) 생성 (별도 프로세스 가능)"""
+    return build_broker_maps(load_broker_df(inputs["kiwoom"]))
+
+
+def apply(wb, prepared) -> dict:
+    """이미 열린 고객 워크북(wb)에 정리된 결과 적용 (저장은 호출한 쪽에서)"""
+    broker_keys, broker_lookup = prepared
+    return update_kiwoom_data(wb, broker_keys, broker_lookup)
+
+
+def run(wb, inputs: dict = None) -> dict:
+    """이미 열린 고객 워크북(wb)에 키움_DATA_ 업데이트 적용 (저장은 호출한 쪽에서)"""
+    inputs = inputs or find_inputs()
+    return apply(wb, prepare(inputs))
+
+
+def main():
+    with open_customer_workbook() as wb:
+        run(wb)
+
+
 if __name__ == "__main__":
-    update_kiwoom_data()
+    parser = argparse.ArgumentParser(description="키움_DATA_ 업데이트")
+    parser.add_argument("--profile", action="store_true", help=profiling.PROFILE_HELP)
+    args = parser.parse_args()
+    with profiling.profiled("KiwoomCount", enabled=args.profile):
+        main()
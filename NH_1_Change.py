@@ -1,14 +1,23 @@
-import win32com.client as win32
-from datetime import datetime, date
-import gc
-import os
-from config import get_fixed_customer_path
-CUSTOMER_FILE = get_fixed_customer_path()
-PASSWORD = "nilla17()"
+from __future__ import annotations
+
+import argparse
+from typing import TYPE_CHECKING
+from excel_session import open_customer_workbook
+import NhChange
+from sheet_writer import dates_as_text, frame_to_rows, write_block
+import profiling
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 SHEET_SRC = "NH_DATA"
 SHEET_DST = "NH_DATA_1"
 
+PRODUCT_CODES = {"1", "4", "5", "001", "004", "005"}
+DATE_COLS = {"계약일자", "만료일자", "해지일자", "운용시작일자", "투자성향등록일자"}
+# 계약일자 정렬용 형식 (datetime 값은 str() 하면 마지막 형식)
+SORT_DATE_FMTS = ("%Y-%m-%d", "%Y.%m.%d", "%Y/%m/%d", "%Y%m%d", "%Y-%m-%d %H:%M:%S")
+
 
 def norm(v):
     if v is None:
@@ -16,175 +25,125 @@ def norm(v):
     return str(v).replace("\r", "").replace("\n", "").strip()
 
 
-def main():
-    print("📘 parkpark 고객 파일 여는 중...")
-    excel = win32.DispatchEx("Excel.Application")
-    excel.Visible = False
-
-    # 속도 옵션
-    try:
-        excel.ScreenUpdating = False
-        excel.DisplayAlerts = False
-    except Exception:
-        pass
-
-    wb = None
-    ws_src = None
-    ws_dst = None
-    used = None
-
-    try:
-        wb = excel.Workbooks.Open(CUSTOMER_FILE, False, False, None, PASSWORD)
-        ws_src = wb.Worksheets(SHEET_SRC)
-
-    
-        used = ws_src.UsedRange
-        data = used.Value
-
-        rows = [list(r) for r in data]
-
-        # 0행: 헤더
-        raw_header = rows[0]
-        header = [norm(c) for c in raw_header]
-        body = rows[1:]
-
-        # ===== 필수 컬럼 index =====
-        def find_col(name):
-            for i, c in enumerate(header):
-                if c == name:
-                    return i
-            raise RuntimeError(f"'{name}' 컬럼을 찾지 못했습니다. 헤더: {header}")
-
-        idx_code = find_col("상품")
-        idx_date = find_col("계약일자")
-        DATE_COLS = {"계약일자", "만료일자", "해지일자", "운용시작일자","투자성향등록일자"}
-        date_indexes = [i for i, c in enumerate(header) if c in DATE_COLS]
-        # ===== 상품코드 필터링: 1/4/5, 001/004/005 =====
-        filtered = []
-        for row in body:
-            if all(norm(c) == "" for c in row):
-                continue
-
-            code = norm(row[idx_code]).replace(".0", "")
-            if code in ("1", "4", "5", "001", "004", "005"):
-                filtered.append(row)
-
-        if not filtered:
-            print("⚠ 필터 결과가 없습니다. 종료.")
-            return
-
-        def key_date(row):
-            v = row[idx_date]
-
-            # Excel에서 이미 datetime으로 온 경우
-            if isinstance(v, datetime):
-                return v.replace(tzinfo=None)
-
-            s = norm(v)
-            if s == "":
-                return datetime.max
-
-            for fmt in ("%Y-%m-%d", "%Y.%m.%d", "%Y/%m/%d", "%Y%m%d"):
-                try:
-                    return datetime.strptime(s, fmt)
-                except ValueError:
-                    pass
-
-            return datetime.max
-
-        filtered.sort(key=key_date)
-
-
-        # ===== NH_DATA_1 작성 =====
-        ws_dst = wb.Worksheets(SHEET_DST)
-        print("🧹 NH_DATA_1 비우는 중...")
-        ws_dst.Range("A1:AZ50000").ClearContents()
-
-        for idx in date_indexes:
-            ws_dst.Columns(idx + 1).NumberFormat = "@"  
-
-
-        # 헤더 1행 그대로 복사
-
-        col_count = len(raw_header)
-        for j, val in enumerate(raw_header, start=1):
-            ws_dst.Cells(1, j).Value = val
-
-        # 데이터 행 복사
-        print("📥 행 단위 붙여넣기 시작...")
-        for i, row in enumerate(filtered, start=2):
-            row_fixed = []
-
-            for idx, val in enumerate(row[:col_count]):
-                # 날짜 컬럼이면 문자열로 강제 변환
-                if idx in date_indexes:
-                    if isinstance(val, datetime):
-                        row_fixed.append(val.strftime("%Y-%m-%d"))  # 연-월-일
-                    else:
-                        row_fixed.append(norm(val))
-                else:
-                    row_fixed.append(val)
-
-            # 길이 보정
-            if len(row_fixed) < col_count:
-                row_fixed += [""] * (col_count - len(row_fixed))
-
-            dest = ws_dst.Range(
-                ws_dst.Cells(i, 1),
-                ws_dst.Cells(i, col_count)
-            )
-            dest.Value = (tuple(row_fixed),)
-
-            if (i - 1) % 50 == 0:
-                print(f"   → {i-1}행 완료")
-
-        print("🎉 모든 행 복사 완료!")
-
-
-        wb.Save()
-        print("💾 저장 완료!")
-
-    finally:
-        # COM 객체들 먼저 참조 해제
-        try:
-            del used
-        except Exception:
-            pass
-        try:
-            del ws_src
-        except Exception:
-            pass
-        try:
-            del ws_dst
-        except Exception:
-            pass
-
-        gc.collect()  # 참조 정리
+def norm_text(s: pd.Series) -> pd.Series:
+    """norm() 의 컬럼 단위 버전"""
+    return (
+        s.astype(str)
+        .str.replace("\r", "", regex=False)
+        .str.replace("\n", "", regex=False)
+        .str.strip()
+        .where(s.notna(), "")
+    )
+
+
+def read_nh_data(wb):
+    """단독 실행용: NH_DATA 전체를 한 번에 읽어 (원래 헤더, DataFrame)"""
+    import pandas as pd
+
+    ws_src = wb.sheet(SHEET_SRC)
+    last_row, last_col = ws_src.used_extent()
+    rows = ws_src.read(1, 1, last_row, last_col)
+
+    raw_header = list(rows[0])
+    body = [row for row in rows[1:] if any(norm(c) != "" for c in row)]
+    return raw_header, pd.DataFrame(body, columns=[norm(c) for c in raw_header])
+
+
+def select_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """상품코드 1/4/5 (001/004/005) 만, 계약일자 순 (빈 값 / 못 읽는 날짜는 맨 뒤, 같은 날짜는 원래 순서)"""
+    import pandas as pd
+
+    for name in ("상품", "계약일자"):
+        if name not in df.columns:
+            raise RuntimeError(f"'{name}' 컬럼을 찾지 못했습니다. 헤더: {list(df.columns)}")
+
+    code = norm_text(df["상품"]).str.replace(".0", "", regex=False)
+    picked = df[code.isin(PRODUCT_CODES).to_numpy()]
+
+    text = norm_text(picked["계약일자"])
+    dates = pd.Series(pd.NaT, index=picked.index, dtype="datetime64[ns]")
+    for fmt in SORT_DATE_FMTS:
+        dates = dates.fillna(pd.to_datetime(text, format=fmt, errors="coerce"))
+
+    order = dates.reset_index(drop=True).sort_values(kind="stable", na_position="last").index
+    return picked.iloc[order]
 
-        # 워크북 닫기
-        try:
-            if wb is not None:
-                wb.Close(SaveChanges=False)
-        except Exception:
-            pass
 
-        # 엑셀 종료
-        try:
-            excel.ScreenUpdating = True
-        except Exception:
-            pass
+def update_nh_data_1(wb, df_use: pd.DataFrame = None):
+    """
+    NH_DATA 의 상품코드 1/4/5 행을 계약일자 순으로 NH_DATA_1 에 복사
+    - df_use: NhChange 가 방금 NH_DATA 에 쓴 고객 프레임 (없으면 NH_DATA 를 한 번에 읽음)
+    """
+    if df_use is not None:
+        raw_header = list(wb.sheet(SHEET_SRC).read(1, 1, 1, len(df_use.columns))[0])
+        df_src = df_use
+    else:
+        raw_header, df_src = read_nh_data(wb)
 
-        try:
-            excel.Quit()
-        except Exception:
-            pass
+    df_out = select_rows(df_src)
+    if df_out.empty:
+        print("⚠ 필터 결과가 없습니다. 종료.")
+        return {"rows": 0}
 
-        del wb
-        del excel
-        gc.collect()
+    # ===== NH_DATA_1 작성 =====
+    ws_dst = wb.sheet(SHEET_DST)
+    old_last_row, old_last_col = ws_dst.used_extent()
 
-        print("📁 엑셀 종료 (리소스 정리 완료)")
+    for idx, c in enumerate(df_src.columns):
+        if c in DATE_COLS:
+            ws_dst.set_column_format(idx + 1, "@")
+
+    # 헤더 1행 + 데이터 (날짜 컬럼은 연-월-일 문자열로 강제 변환) 를 결과 크기 그대로 한 블록으로
+    print("📥 블록 단위 붙여넣기 시작...")
+    col_count = len(raw_header)
+    data = frame_to_rows(dates_as_text(df_out, DATE_COLS, "%Y-%m-%d"))
+    com_calls = write_block(ws_dst, [raw_header] + [row[:col_count] for row in data], start_row=1)
+
+    # 지난번 결과가 더 길거나 넓었으면 남은 부분만 지우기
+    new_last_row = len(data) + 1
+    if old_last_row > new_last_row:
+        ws_dst.clear(new_last_row + 1, 1, old_last_row, max(old_last_col, col_count))
+        com_calls += 2
+    if old_last_col > col_count:
+        ws_dst.clear(1, col_count + 1, min(old_last_row, new_last_row), old_last_col)
+        com_calls += 2
+    print(f"   → {len(data)}행 완료 (COM 호출 {com_calls}회)")
+
+    print("🎉 모든 행 복사 완료!")
+    return {"rows": len(data)}
+
+
+def find_inputs() -> dict:
+    """NH_DATA 는 NhChange 가 HTS 파일로 채우므로 같은 파일이 바뀌었을 때만 다시 만든다"""
+    return NhChange.find_inputs()
+
+
+def prepare(inputs: dict):
+    """읽을 증권사 파일 없음 (NH_DATA 시트에서 바로 만든다)"""
+    return None
+
+
+def apply(wb, prepared=None) -> dict:
+    """
+    이미 열린 고객 워크북(wb)에 NH_DATA_1 업데이트 적용 (저장은 호출한 쪽에서)
+    같은 워크북에서 NhChange 가 먼저 실행됐으면 그 고객 프레임을 그대로 사용
+    """
+    return update_nh_data_1(wb, NhChange.applied_frame(wb))
+
+
+def run(wb, inputs: dict = None) -> dict:
+    """이미 열린 고객 워크북(wb)에 NH_DATA_1 업데이트 적용 (저장은 호출한 쪽에서)"""
+    return apply(wb)
+
+
+def main():
+    with open_customer_workbook() as wb:
+        run(wb)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="NH_DATA_1 업데이트")
+    parser.add_argument("--profile", action="store_true", help=profiling.PROFILE_HELP)
+    args = parser.parse_args()
+    with profiling.profiled("NH_1_Change", enabled=args.profile):
+        main()
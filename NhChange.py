@@ -1,23 +1,25 @@
+from __future__ import annotations
+
+import argparse
 import os
 import re
-import pandas as pd
-import win32com.client as win32
 from datetime import datetime, date
-from config import get_fixed_customer_path
+from typing import TYPE_CHECKING
+import changelog
+import sheet_cache
+from broker_io import column_sums, read_broker_export
+from downloads import EXPORT_TYPES, files_of
+from excel_session import open_customer_workbook
+from sheet_writer import dates_as_text, frame_to_rows, write_diff
+import profiling
+import tracing
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # ===========================
 # 1. 기본 설정
 # ===========================
-HTS_FOLDER = os.path.join(
-    os.path.expanduser("~"),
-    "Downloads",
-    "hts"
-)
-HTS_PREFIX = "Excel"  # NH HTS 파일 접두사
-
-CUSTOMER_FILE = get_fixed_customer_path()
-PASSWORD = "nilla17()"
-
 SHEET_NH_DATA = "NH_DATA"
 SHEET_DAILY = "Daily"
 
@@ -30,20 +32,17 @@ COL_ASSET = "전일평가금액"
 # 2. 공통 유틸
 # ===========================
 # 여기 추가해야함.
-def find_two_hts_files_today(folder: str, prefix: str = "Excel"):
+def find_two_hts_files_today():
+    """Downloads/hts 의 NH HTS 파일(Excel*) 중 오늘 수정된 파일 2개 (다운로드 폴더 스캔 결과 재사용)"""
+    folder, prefix, _ = EXPORT_TYPES["nh_hts"]
     files = []
-    for f in os.listdir(folder):
-        if not (f.startswith(prefix) and f.lower().endswith((".xls", ".xlsx"))):
-            continue
-
-        full = os.path.join(folder, f)
-
+    for f in files_of("nh_hts"):
         # 수정시간 기준(다운로드 후 수정시간이 오늘인 파일)
-        mtime = datetime.fromtimestamp(os.path.getmtime(full)).date()
+        mtime = datetime.fromtimestamp(f.mtime).date()
         if mtime != date.today():
             continue
 
-        files.append(f)
+        files.append(f.name)
 
     if len(files) < 2:
         raise FileNotFoundError(f"오늘({date.today()}) 수정된 {prefix} 파일이 2개 미만입니다: {files}")
@@ -61,33 +60,6 @@ def find_two_hts_files_today(folder: str, prefix: str = "Excel"):
     print(f"📂 (오늘) 잔고파일(큰 번호): {balance_file}")
     return customer_file, balance_file
 # 
-def convert_xls_to_xlsx(path: str) -> str:
-    """첫 번째 HTS 파일(고객정보)에만 사용.
-       .xlsx면 그대로 리턴, .xls면 Excel로 열어서 xlsx로 저장."""
-    base, ext = os.path.splitext(path)
-    if ext.lower() != ".xls":
-        # 이미 xlsx이면 그대로 사용
-        return path
-
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"파일을 찾을 수 없습니다: {path}")
-
-    print(f"[변환 시작] {path} -> xlsx")
-
-    import win32com.client as win32_local
-    excel = win32_local.DispatchEx("Excel.Application")
-    excel.Visible = False
-    try:
-        wb = excel.Workbooks.Open(path)
-        xlsx_path = base + ".xlsx"
-        wb.SaveAs(xlsx_path, FileFormat=51)
-        wb.Close()
-    finally:
-        excel.Quit()
-
-    print(f"[변환 완료] {path} -> {xlsx_path}")
-    return xlsx_path
-
 def extract_number_from_filename(name: str) -> int:
     """파일명에서 숫자만 뽑아서 int로 반환 (없으면 0)"""
     nums = re.findall(r"\d+", name)
@@ -104,7 +76,7 @@ def normalize_phone(p):
 def normalize_account(a):
     return re.sub(r"\D", "", a)
 
-def find_two_hts_files(folder: str, prefix: str = "Excel"):
+def find_two_hts_files():
     """
     HTS 폴더 안의 Excel*.xls 파일 중
     - 숫자가 더 작은 파일 → 고객정보 파일
@@ -112,9 +84,10 @@ def find_two_hts_files(folder: str, prefix: str = "Excel"):
     로 구분해서 (customer_path, balance_path)를 반환한다.
     (xlsx는 완전히 무시)
     """
+    folder, prefix, _ = EXPORT_TYPES["nh_hts"]
     xls_files = [
-        f for f in os.listdir(folder)
-        if f.startswith(prefix) and f.lower().endswith(".xls")
+        f.name for f in files_of("nh_hts")
+        if f.name.lower().endswith(".xls")
     ]
 
     if len(xls_files) < 2:
@@ -140,90 +113,103 @@ def find_two_hts_files(folder: str, prefix: str = "Excel"):
 # 3. 첫 번째 파일 → NH_DATA 시트 채우기
 # ===========================
 SHEET_NH_DATA = "NH_DATA"   # 시트 이름 다르면 여기만 바꿔줘
+NH_LAST_COL = 49            # AW열
 
+# wb.shared 키: 이번 세션에 NH_DATA 에 쓴 고객 프레임 (NH_1_Change 가 시트를 다시 읽지 않고 사용)
+SHARED_FRAME = "NhChange.frame"
 
-def update_nh_data_sheet(excel_app, parkpark_wb, customer_file_path: str):
+
+def load_customer_frame(customer_file_path: str) -> pd.DataFrame:
     """
-    증권사 HTS 고객파일에서
-    - '자문사' 열부터 '자문관리사원명' 열까지 전체 데이터를 읽어서
-    - parkpark NH_DATA 시트의 A열(자문사) ~ AW열까지 A2부터 그대로 붙여넣기
-    (엑셀에서 사람 손으로 복붙하는 것과 동일한 효과)
+    증권사 HTS 고객파일에서 '자문사' 열부터 '자문관리사원명' 열까지 읽어 정리
+    (워크북 없이 실행 가능 → 미리 읽기 단계에서 사용)
     """
+    df = read_broker_export(customer_file_path)
 
+    with tracing.span("normalize", rows=len(df)):
+        # 1) 컬럼 이름 정리 (줄바꿈, CR/LF, 공백 제거)
+        def norm_col(s: str) -> str:
+            s = str(s)
+            for token in ["_x000D_", "\r", "\n"]:
+                s = s.replace(token, "")
+            return s.strip()
 
-    df = pd.read_excel(customer_file_path)
-
-    # 1) 컬럼 이름 정리 (줄바꿈, CR/LF, 공백 제거)
-    def norm_col(s: str) -> str:
-        s = str(s)
-        for token in ["_x000D_", "\r", "\n"]:
-            s = s.replace(token, "")
-        return s.strip()
-
-    original_cols = list(df.columns)
-    df.columns = [norm_col(c) for c in df.columns]
-
-
+        original_cols = list(df.columns)
+        df.columns = [norm_col(c) for c in df.columns]
 
-    # 2) '자문사' ~ '자문관리사원명' 구간만 사용
-    try:
-        start_idx = df.columns.get_loc("자문사")
-        end_idx = df.columns.get_loc("자문관리사원명")
-    except KeyError as e:
-        raise KeyError(
-            "고객정보 파일에서 '자문사' 또는 '자문관리사원명' 컬럼을 찾지 못했습니다.\n"
-            f"원본 컬럼: {original_cols}\n"
-            f"정리 후 컬럼: {df.columns.tolist()}"
-        ) from e
 
-    df_use = df.iloc[:, start_idx:end_idx + 1]
 
-    # 완전히 빈 행은 제거
-    df_use = df_use.dropna(how="all")
-    # --- 상품코드 3자리 변환 추가 ---
-    # 고객파일 컬럼 이름에 '상품'이 있으니, 그 열을 001,002,003 형식으로 통일
-    if "상품" in df_use.columns:
- 
-        df_use["상품"] = (
-            df_use["상품"]
-            .astype(str)
-            .str.replace(".0", "", regex=False)  # 1.0 → 1
-            .str.strip()
-        )
-
-        def pad_code(x: str) -> str:
-            # 숫자가 아니면 그대로 두고, 숫자면 3자리로 패딩
-            if not x.isdigit():
-                return x
-            return x.zfill(3)
-
-        df_use["상품"] = df_use["상품"].map(pad_code)
+        # 2) '자문사' ~ '자문관리사원명' 구간만 사용
+        try:
+            start_idx = df.columns.get_loc("자문사")
+            end_idx = df.columns.get_loc("자문관리사원명")
+        except KeyError as e:
+            raise KeyError(
+                "고객정보 파일에서 '자문사' 또는 '자문관리사원명' 컬럼을 찾지 못했습니다.\n"
+                f"원본 컬럼: {original_cols}\n"
+                f"정리 후 컬럼: {df.columns.tolist()}"
+            ) from e
+
+        df_use = df.iloc[:, start_idx:end_idx + 1]
+
+        # 완전히 빈 행은 제거
+        df_use = df_use.dropna(how="all")
+        # --- 상품코드 3자리 변환 추가 ---
+        # 고객파일 컬럼 이름에 '상품'이 있으니, 그 열을 001,002,003 형식으로 통일
+        if "상품" in df_use.columns:
+
+            df_use["상품"] = (
+                df_use["상품"]
+                .astype(str)
+                .str.replace(".0", "", regex=False)  # 1.0 → 1
+                .str.strip()
+            )
+
+            def pad_code(x: str) -> str:
+                # 숫자가 아니면 그대로 두고, 숫자면 3자리로 패딩
+                if not x.isdigit():
+                    return x
+                return x.zfill(3)
+
+            df_use["상품"] = df_use["상품"].map(pad_code)
+
+        # 3) NaN → 빈 문자열로 바꾼 뒤 파이썬 기본 타입으로 변환
+        return df_use.astype(object).where(df_use.notna(), "")
+
+
+def update_nh_data_sheet(parkpark_wb, df_use: pd.DataFrame):
+    """
+    정리된 고객 데이터(load_customer_frame)를
+    parkpark NH_DATA 시트의 A열(자문사) ~ AW열까지 A2부터 그대로 붙여넣기
+    (엑셀에서 사람 손으로 복붙하는 것과 동일한 효과)
+    """
     rows, cols = df_use.shape
 
     if rows == 0:
         print("⚠ 사용할 고객 데이터 행이 없습니다. NH_DATA 갱신 건너뜀.")
-        return
-
-    # 3) NaN → 빈 문자열로 바꾼 뒤 파이썬 기본 타입으로 변환
-    df_use = df_use.astype(object).where(pd.notnull(df_use), "")
+        return {"rows": 0}
 
 
 
     # 4) NH_DATA 시트에 써 넣기 (A2부터, 행 단위로)
-    nh_ws = parkpark_wb.Worksheets(SHEET_NH_DATA)
-    last_row = nh_ws.Cells(nh_ws.Rows.Count, 1).End(-4162).Row  # xlUp
+    nh_ws = parkpark_wb.sheet(SHEET_NH_DATA)
+    region = (2, 1, NH_LAST_COL)
     old_customers = set()
 
-    if last_row >= 2:
-        old_data = nh_ws.Range(f"A2:AW{last_row}").Value
-        for r in old_data:
-            name = str(r[df_use.columns.get_loc("고객성명")]).strip()
-            raw_phone = str(r[df_use.columns.get_loc("휴대전화")]).strip()
-            raw_account = str(r[df_use.columns.get_loc("계좌번호")]).strip()
-            phone = normalize_phone(raw_phone)
-            account = normalize_account(raw_account)
-            if name and phone:
-                old_customers.add((name, phone, account))
+    # 이전 상태: 지난번 저장 직후 스냅샷이 유효하면 그것, 아니면 A2:AW{마지막 행} 읽기
+    old_data = sheet_cache.load(SHEET_NH_DATA, region)
+    if old_data is None:
+        last_row = nh_ws.used_extent()[0]
+        old_data = nh_ws.read(2, 1, last_row, NH_LAST_COL) if last_row >= 2 else []
+
+    for r in old_data:
+        name = str(r[df_use.columns.get_loc("고객성명")]).strip()
+        raw_phone = str(r[df_use.columns.get_loc("휴대전화")]).strip()
+        raw_account = str(r[df_use.columns.get_loc("계좌번호")]).strip()
+        phone = normalize_phone(raw_phone)
+        account = normalize_account(raw_account)
+        if name and phone:
+            old_customers.add((name, phone, account))
 
     print(f"📌 기존 NH_DATA 고객 수: {len(old_customers)}")
  
@@ -257,74 +243,54 @@ def update_nh_data_sheet(excel_app, parkpark_wb, customer_file_path: str):
             print(f"   - {name} / {phone} / {account}")
     else:
         print("➖ 해지 고객 없음")
+
+    # 변경 기록 (저장이 끝나면 changelog 에 기록) - 고객 키는 계좌번호, 없으면 휴대전화
+    for change, customers in ((changelog.ADDED, added_customers), (changelog.REMOVED, removed_customers)):
+        changelog.add("NhChange", "nh", change, [
+            (account or phone, name, {"phone": phone, "account": account})
+            for name, phone, account in sorted(customers)
+        ])
     
      
-    nh_ws.Range("A2:AW1048576").ClearContents()
-
-
+    # A2부터 기존 값과 비교해 바뀐 셀만 기록 (남는 옛 행은 지움)
+    # 날짜 컬럼들은 엑셀 날짜로 변환되지 않도록 문자열로 강제 (sheet_writer.DATE_TEXT_COLS)
+    new_data = frame_to_rows(dates_as_text(df_use))
+    diff = write_diff(nh_ws, old_data, new_data, start_row=2, start_col=1, n_cols=NH_LAST_COL)
+    sheet_cache.store(SHEET_NH_DATA, region, new_data)
+
+    parkpark_wb.shared[SHARED_FRAME] = df_use
+    print(
+        f"   → {rows}행 중 변경 셀 {diff.cells}개 기록 "
+        f"(범위 {diff.ranges}개, COM 호출 {diff.com_calls}회)"
+    )
 
-    start_row = 2  # A2에서 시작
-    for i, (_, row) in enumerate(df_use.iterrows(), start=start_row):
-        # 현재 행의 값들을 파이썬 리스트로 변환
-        # 날짜 컬럼들은 엑셀 날짜로 변환되지 않도록 문자열로 강제
-        DATE_COLS = ["계약일자", "만료일자", "해지일자", "운용시작일자"]
+    # 5) 확인용 로그
 
-        row_values = []
-        for col_name, val in zip(df_use.columns, row.values):
-            if col_name in DATE_COLS:
-                if val == "" or pd.isna(val):
-                    row_values.append("")
-                else:
-                    # 어떤 타입이든 그대로 문자열화
-                    row_values.append(str(val))
-            else:
-                row_values.append(val)
+    print("✅ NH_DATA 시트 업데이트 완료.")
+    return {
+        "rows": rows,
+        "added": len(added_customers),
+        "removed": len(removed_customers),
+        "cells_written": diff.cells,
+    }
 
-        # A열부터 연속으로 cols개 셀에 한 줄씩 세팅
-        nh_ws.Range(
-            nh_ws.Cells(i, 1),  # A{i}
-            nh_ws.Cells(i, cols)  # (A+cols-1){i}
-        ).Value = row_values
 
-        # 진행 상황 가끔 찍기
-        if (i - start_row + 1) % 200 == 0 or i == start_row + rows - 1:
-            print(f"   → {i - start_row + 1}/{rows} 행 붙여넣기 완료")
+def applied_frame(wb):
+    """wb 의 NH_DATA 에 방금 쓴 고객 프레임 (같은 워크북 세션에서 쓴 적 없으면 None)"""
+    return wb.shared.get(SHARED_FRAME)
 
-    # 5) 확인용 로그
 
-    print("✅ NH_DATA 시트 업데이트 완료.")
 # ===========================
 # 4. 두 번째 파일 → Daily 시트 수치 업데이트
 # ===========================
-def update_daily_sheet_from_second(balance_file_path: str, customer_wb):
-
-    df = pd.read_excel(balance_file_path)
-
-    def norm_col(s: str) -> str:
-        s = str(s)
-        for token in ["_x000D_", "\r", "\n", " "]:
-            s = s.replace(token, "")
-        return s
-
-    original_cols = list(df.columns)
-    df.columns = [norm_col(c) for c in df.columns]
-
-
-    code_col = "상품코드"
-    asset_col = "총합계"
-    if code_col not in df.columns or asset_col not in df.columns:
-        raise KeyError(
-            "잔고파일에서 '상품코드' 또는 '총합계' 컬럼을 찾지 못했습니다.\n"
-            f"원본 컬럼: {original_cols}\n정규화 후 컬럼: {df.columns.tolist()}"
-        )
-
-    df2 = df[[code_col, asset_col]].copy()
-    df2[code_col] = pd.to_numeric(df2[code_col], errors="coerce")
-    df2[asset_col] = pd.to_numeric(df2[asset_col], errors="coerce")
-    df2 = df2.dropna(subset=[code_col, asset_col])
-
-    sum_4_5_won = df2.loc[df2[code_col].isin([4, 5]), asset_col].sum()
-    sum_1_4_5_won = df2.loc[df2[code_col].isin([1, 4, 5]), asset_col].sum()
+def load_balance_sums(balance_file_path: str):
+    """잔고파일 → (코드 4,5 합계(억), 코드 1,4,5 합계(억))"""
+    # 상품코드 / 총합계 두 열만 한 행씩 읽으면서 합산 (숫자가 아닌 행은 제외)
+    sums = column_sums(
+        balance_file_path, "상품코드", "총합계",
+        {"4_5": {4, 5}, "1_4_5": {1, 4, 5}},
+    )
+    sum_4_5_won, sum_1_4_5_won = sums["4_5"], sums["1_4_5"]
 
     print(f"📊 코드 4,5 총합계(원): {sum_4_5_won:,.0f}")
     print(f"📊 코드 1,4,5 총합계(원): {sum_1_4_5_won:,.0f}")
@@ -334,65 +300,63 @@ def update_daily_sheet_from_second(balance_file_path: str, customer_wb):
 
     print(f"📊 코드 4,5 총합계(억): {sum_4_5_억}")
     print(f"📊 코드 1,4,5 총합계(억): {sum_1_4_5_억}")
+    return float(sum_4_5_억), float(sum_1_4_5_억)
+
+
+def update_daily_sheet_from_second(sums, customer_wb):
+    sum_4_5_억, sum_1_4_5_억 = sums
 
-    daily_ws = customer_wb.Worksheets(SHEET_DAILY)
-    daily_ws.Range("B14").Value = float(sum_4_5_억)   # 4,5번 합계(억)
-    daily_ws.Range("C6").Value = float(sum_1_4_5_억)  # 1,4,5번 합계(억)
+    daily_ws = customer_wb.sheet(SHEET_DAILY)
+    daily_ws.set_value("B14", float(sum_4_5_억))   # 4,5번 합계(억)
+    daily_ws.set_value("C6", float(sum_1_4_5_억))  # 1,4,5번 합계(억)
 
     print("✅ Daily 시트 B14(4·5억), C6(1·4·5억) 업데이트 완료.")
+    return {"sum_4_5": sum_4_5_억, "sum_1_4_5": sum_1_4_5_억}
+
+
 # ===========================
 # 5. main 실행부
 # ===========================
-def main():
-    # 1) HTS 폴더에서 두 개 xls 파일 찾기 (작은 번호=고객, 큰 번호=잔고)
-    customer_hts, balance_hts = find_two_hts_files_today(HTS_FOLDER, HTS_PREFIX)
-    excel = None
-    wb = None
+def find_inputs() -> dict:
+    """HTS 폴더에서 두 개 xls 파일 찾기 (작은 번호=고객, 큰 번호=잔고)"""
+    customer_hts, balance_hts = find_two_hts_files_today()
+    return {"customer": customer_hts, "balance": balance_hts}
 
-    try:
-        excel = win32.DispatchEx("Excel.Application")
-        try:
-            excel.Visible = False
-        except Exception as e:
-            print(f"⚠ Excel.Visible 설정 실패, 무시하고 진행합니다: {e}")
 
-        print("📘 parkpark 고객 파일 여는 중...")
-        wb = excel.Workbooks.Open(CUSTOMER_FILE, False, False, None, PASSWORD)
+def prepare(inputs: dict):
+    """워크북 없이 두 파일 읽어서 정리 (미리 읽기 단계에서 별도 프로세스로 실행 가능)"""
+    return load_customer_frame(inputs["customer"]), load_balance_sums(inputs["balance"])
 
-        # 2) NH_DATA : 고객정보 파일 붙여넣기
-        update_nh_data_sheet(excel, wb, customer_hts)
 
-        # 3) Daily : 잔고파일로 B14, C6 업데이트
-        update_daily_sheet_from_second(balance_hts, wb)
+def apply(wb, prepared) -> dict:
+    """이미 열린 고객 워크북(wb)에 정리된 결과 적용 (저장은 호출한 쪽에서)"""
+    df_use, sums = prepared
 
-        wb.Save()
-        print("💾 parkpark 파일 저장 완료.")
+    # NH_DATA : 고객정보 파일 붙여넣기
+    summary = update_nh_data_sheet(wb, df_use)
+
+    # Daily : 잔고파일로 B14, C6 업데이트
+    summary.update(update_daily_sheet_from_second(sums, wb))
+    return summary
+
+
+def run(wb, inputs: dict = None) -> dict:
+    """이미 열린 고객 워크북(wb)에 NH_DATA / Daily 업데이트 적용 (저장은 호출한 쪽에서)"""
+    # 1) 고객 / 잔고 파일
+    inputs = inputs or find_inputs()
+
+    # 2) 읽기 → 적용
+    return apply(wb, prepare(inputs))
+
+
+def main():
+    with open_customer_workbook() as wb:
+        run(wb)
 
-        # ===========================
-        # 실제 저장된 위치 출력
-        # ===========================
-        try:
-            saved_path = wb.FullName
-            saved_dir = os.path.dirname(saved_path)
-            print(f"📂 실제 저장된 폴더: {saved_dir}")
-            print(f"📄 실제 저장된 파일: {saved_path}")
-        except Exception as e:
-            print("⚠ 저장 위치 확인 실패:", e)
-
-    finally:
-        if wb is not None:
-            try:
-                wb.Close(False)
-            except Exception:
-                pass
-
-        if excel is not None:
-            try:
-                excel.Quit()
-            except Exception:
-                pass
-
-        print("📁 엑셀 프로세스 종료")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="NH_DATA / Daily 업데이트")
+    parser.add_argument("--profile", action="store_true", help=profiling.PROFILE_HELP)
+    args = parser.parse_args()
+    with profiling.profiled("NhChange", enabled=args.profile):
+        main()
@@ -1,88 +1,79 @@
-# import os
-# import sys
-# import subprocess
-# from datetime import datetime
-
-# SCRIPTS = [
-#     "FokChange.py",
-#     "NhChange.py",
-#     "NH_1_Change.py",
-#     "KiwoomCount.py",
-#     "Han.py",
-#     "SamChange.py",
-# ]
-
-# WORKDIR = r"C:\Code"
-# STOP_ON_ERROR = True
-
-# def now():
-#     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-# def run_one(script: str) -> int:
-#     script_path = os.path.join(WORKDIR, script)
-
-#     if not os.path.exists(script_path):
-#         print(f"❌ NOT FOUND: {script_path}")
-#         return 2
-
-#     print(f"\n▶ START: {script}  ({now()})")
-
-#     # ✅ 핵심: UTF-8 강제 + 이모지 출력 에러 방지
-#     # -X utf8 : 파이썬 UTF-8 모드
-#     # PYTHONIOENCODING=utf-8 : stdout/stderr 강제
-#     env = os.environ.copy()
-#     env["PYTHONIOENCODING"] = "utf-8"
-
-#     cmd = [
-#         sys.executable,
-#         "-X", "utf8",
-#         script_path,
-#     ]
-
-#     # 출력은 "그대로 콘솔에 흘려보내기" (프린트 진행내역 보임)
-#     p = subprocess.Popen(
-#         cmd,
-#         cwd=WORKDIR,
-#         env=env,
-#         text=True,
-#         encoding="utf-8",
-#         errors="replace",   # 혹시라도 인코딩 문제 생기면 깨진 글자 대신 대체문자
-#         stdout=subprocess.PIPE,
-#         stderr=subprocess.STDOUT,  # 에러도 같은 스트림으로 합쳐서 순서대로 보이게
-#         bufsize=1,
-#     )
-
-#     # 실시간 출력
-#     assert p.stdout is not None
-#     for line in p.stdout:
-#         print(line, end="")
-
-#     p.wait()
-
-#     if p.returncode == 0:
-#         print(f"✅ OK  : {script}  ({now()})")
-#     else:
-#         print(f"\n---- ERROR (code={p.returncode}) ----")
-#         print(f"❌ FAIL: {script}")
-
-#     return p.returncode
-
-# def main():
-#     print("=== RunAll START ===")
-#     print(f"WORKDIR={WORKDIR}")
-#     print(f"STOP_ON_ERROR={STOP_ON_ERROR}")
-
-#     results = []
-#     for s in SCRIPTS:
-#         code = run_one(s)
-#         results.append((s, code))
-#         if code != 0 and STOP_ON_ERROR:
-#             break
-
-#     print("\n=== RunAll SUMMARY ===")
-#     for s, code in results:
-#         status = "OK " if code == 0 else "FAIL"
-#         print(f"- {status} | {s} | code={code}")
-
-# if __name__ == "__main__":
-#     main()
\ No newline at end of file
+import argparse
+
+import profiling
+import tracing
+from pipeline import FAIL, run_steps
+from workbook_backend import BACKENDS
+import FokChange
+import NhChange
+import NH_1_Change
+import KiwoomCount
+import Han
+import SamChange
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+# (이름, 업데이트 모듈) - 순서대로 실행
+# NH_1_Change 는 NhChange 가 채운 NH_DATA 를 읽으므로 반드시 그 뒤에 둔다.
+STEPS = [
+    ("FokChange", FokChange),
+    ("NhChange", NhChange),
+    ("NH_1_Change", NH_1_Change),
+    ("KiwoomCount", KiwoomCount),
+    ("Han", Han),
+    ("SamChange", SamChange),
+]
+
+STOP_ON_ERROR = True
+
+
+# ===========================
+# 2. 실행
+# ===========================
+def main(backend: str = None, force: bool = False, prefetch: bool = True):
+    print("=== RunAll START ===")
+    print(f"STOP_ON_ERROR={STOP_ON_ERROR} FORCE={force} PREFETCH={prefetch}")
+
+    # 입력 파일이 지난번과 같은 단계는 워크북을 열기 전에 건너뜀
+    # 나머지 단계의 증권사 파일은 워크북을 여는 동안 별도 프로세스에서 미리 읽음
+    results = run_steps(
+        STEPS, backend=backend, force=force, stop_on_error=STOP_ON_ERROR, prefetch=prefetch
+    )
+
+    print("\n=== RunAll SUMMARY ===")
+    for name, status in results:
+        print(f"- {status} | {name}")
+
+    # 단계별 시간 / 행 수 / COM 호출 수 (자세한 기록은 tracing.trace_path() 의 JSON lines)
+    tracing.print_summary()
+
+    if any(status == FAIL for _, status in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="고객data 전체 업데이트")
+    parser.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        help="워크북 백엔드 (기본: WORKBOOK_BACKEND 환경변수 또는 com)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="입력 파일이 지난번과 같아도 모든 단계 실행",
+    )
+    parser.add_argument(
+        "--no-prefetch",
+        dest="prefetch",
+        action="store_false",
+        help="증권사 파일을 미리 읽지 않고 단계마다 순서대로 읽기",
+    )
+    parser.add_argument("--profile", action="store_true", help=profiling.PROFILE_HELP)
+    args = parser.parse_args()
+
+    # 미리 읽기 프로세스 안의 시간은 잡히지 않으므로 프로파일할 때는 순서대로 읽음
+    prefetch = args.prefetch and not args.profile
+    with profiling.profiled("RunAll", enabled=args.profile):
+        main(args.backend, args.force, prefetch)
@@ -1,24 +1,23 @@
+import argparse
 import os
-import pandas as pd
-import win32com.client as win32
-import time
-import gc
-import pywintypes
-from config import get_fixed_customer_path
+import changelog
+import sheet_cache
+from broker_io import stream_columns
+from downloads import latest_file
+from excel_session import open_customer_workbook
+from sheet_writer import write_diff
+import profiling
+import tracing
 
 # ===========================
 # 1) 설정
 # ===========================
-DOWNLOAD_DIR = os.path.join(os.path.expanduser("~"), "Downloads")
-SRC_PREFIX = "통합 문서1"
-
 SHEET_DST = "삼성_DATA"
 DST_START_ROW = 6
 DST_START_COL = 2
 PASTE_COLS = 23
 CONTRACT_REL_IDX = 3   # B기준 E열
-
-PASSWORD = "nilla17()"
+CACHE_REGION = (DST_START_ROW, 1, DST_START_COL + PASTE_COLS - 1)   # 로컬 스냅샷: A6:X
 
 # ===========================
 # 2) 유틸
@@ -27,6 +26,8 @@ def excel_date_to_str(x):
     """
     엑셀 날짜(serial) / 문자열 날짜 모두 처리
     """
+    import pandas as pd
+
     if pd.isna(x) or x == "":
         return ""
     try:
@@ -37,103 +38,97 @@ def excel_date_to_str(x):
         return pd.to_datetime(x).strftime("%Y/%m/%d")
     except Exception:
         return ""
-def com_call_with_retry(fn, tries=30, delay=0.5):
-    for _ in range(tries):
-        try:
-            return fn()
-        except pywintypes.com_error:
-            time.sleep(delay)
-    raise
-
-CUSTOMER_FILE = get_fixed_customer_path()
 
 def find_latest_source_file():
-    files = [
-        f for f in os.listdir(DOWNLOAD_DIR)
-        if f.startswith(SRC_PREFIX) and f.lower().endswith((".xls", ".xlsx"))
-    ]
-    if not files:
-        raise FileNotFoundError("증권사 파일 없음")
-    files.sort(key=lambda f: os.path.getmtime(os.path.join(DOWNLOAD_DIR, f)), reverse=True)
-    path = os.path.join(DOWNLOAD_DIR, files[0])
+    path = latest_file("samsung")
     print(f"📂 최신 증권사 파일: {path}")
     return path
 
-def convert_xls_to_xlsx(path):
-    if path.lower().endswith(".xlsx"):
-        return path
-    excel = win32.DispatchEx("Excel.Application")
-    excel.Visible = False
-    wb = excel.Workbooks.Open(path)
-    new_path = path.replace(".xls", ".xlsx")
-    wb.SaveAs(new_path, FileFormat=51)
-    wb.Close(False)
-    excel.Quit()
-    return new_path
-
 # ===========================
 # 3) 증권사 파일 읽기
 # ===========================
-def read_and_sort_source(src_path):
-    src_xlsx = convert_xls_to_xlsx(src_path)
-
-    df = pd.read_excel(src_xlsx)
-    df_bx = df.iloc[:, 1:1 + PASTE_COLS].copy()
-
-    # 계약번호: PLVA로 시작하는 행만
-    df_bx["__contract__"] = df_bx.iloc[:, CONTRACT_REL_IDX].astype(str).str.strip()
-    df_bx = df_bx[df_bx["__contract__"].str.startswith("PLVA")]
-
-    # 날짜 컬럼 처리
-    DATE_COLS = {"최초계약일", "연장계약일", "만료일"}
-    for col in df_bx.columns:
-        if str(col).strip() in DATE_COLS:
-            df_bx[col] = df_bx[col].apply(excel_date_to_str)
-
-    df_bx = df_bx.sort_values("__contract__")
-
-    values_df = df_bx.drop(columns="__contract__").fillna("").astype(str)
-    values = values_df.values.tolist()
-
-    # 🔥 무조건 텍스트 처리할 컬럼
-    TARGET_COLS = {"계좌번호", "수수료출금계좌"}
-    target_idx = [
-        i for i, c in enumerate(values_df.columns)
-        if str(c).strip() in TARGET_COLS
-    ]
-
-    for row in values:
-        for i in target_idx:
-            s = row[i].strip()
-            if not s:
-                continue
-            if "E+" in s or "e+" in s:
-                s = format(int(float(s)), "d")
-            if s.endswith(".0"):
-                s = s[:-2]
-            row[i] = "'" + s   # ✅ 무조건 텍스트
+def cell_text(v) -> str:
+    """DataFrame 의 fillna("").astype(str) 과 같은 글자 (정수 값 실수는 .0 없이)"""
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
 
-    contracts = df_bx["__contract__"].tolist()
-    print(f"✅ 유효 계약 수: {len(contracts)}")
 
-    return values, contracts
+def read_and_sort_source(src_path):
+    # B열부터 PASTE_COLS 개 열만, 계약번호(E열)가 PLVA 로 시작하는 행만 읽으면서 거름
+    columns = list(range(1, 1 + PASTE_COLS))
+    with tracing.span("read", file=os.path.basename(src_path), columns=PASTE_COLS) as s:
+        header, rows = stream_columns(
+            src_path, columns,
+            where={columns[CONTRACT_REL_IDX]: lambda v: str(v).strip().startswith("PLVA")},
+        )
+        picked = list(rows)
+        s.set(rows=len(picked))
+
+    with tracing.span("normalize", rows=len(picked)):
+        # 날짜 컬럼 처리
+        DATE_COLS = {"최초계약일", "연장계약일", "만료일"}
+        date_idx = [i for i, c in enumerate(header) if str(c).strip() in DATE_COLS]
+
+        # 🔥 무조건 텍스트 처리할 컬럼
+        TARGET_COLS = {"계좌번호", "수수료출금계좌"}
+        target_idx = [i for i, c in enumerate(header) if str(c).strip() in TARGET_COLS]
+
+        picked.sort(key=lambda r: str(r[CONTRACT_REL_IDX]).strip())
+
+        values, contracts = [], []
+        date_text = {}
+        for r in picked:
+            row = [cell_text(v) for v in r]
+            for i in date_idx:
+                v = r[i]
+                if v not in date_text:   # 같은 날짜가 반복되므로 값마다 한 번만 변환
+                    date_text[v] = excel_date_to_str(v)
+                row[i] = date_text[v]
+
+            for i in target_idx:
+                s = row[i].strip()
+                if not s:
+                    continue
+                if "E+" in s or "e+" in s:
+                    s = format(int(float(s)), "d")
+                if s.endswith(".0"):
+                    s = s[:-2]
+                row[i] = "'" + s   # ✅ 무조건 텍스트
+
+            values.append(row)
+            contracts.append(str(r[CONTRACT_REL_IDX]).strip())
+
+        print(f"✅ 유효 계약 수: {len(contracts)}")
+
+        return values, contracts
 
 # ===========================
 # 4) 기존 비고 + 계약 목록
 # ===========================
-def build_remark_map(ws):
-    xlUp = -4162
-    last_row = ws.Cells(ws.Rows.Count, 5).End(xlUp).Row
+def read_current_rows(ws):
+    """
+    6행 ~ UsedRange 끝까지 A~X열 현재 값 (비고/계약 목록 + 변경 비교용)
+    지난번 저장 직후 로컬 스냅샷이 유효하면 시트를 읽지 않고 그것을 사용
+    """
+    cached = sheet_cache.load(SHEET_DST, CACHE_REGION)
+    if cached is not None:
+        return cached
 
+    last_row = ws.used_extent()[0]
+    if last_row < DST_START_ROW:
+        return []
+    return ws.read(DST_START_ROW, 1, last_row, DST_START_COL + PASTE_COLS - 1)
+
+
+def build_remark_map(current_rows):
     name_map = {} 
     remark_map = {}
     old_contracts = []
 
-    if last_row < DST_START_ROW:
-        return remark_map, name_map,old_contracts
-
-    rng = ws.Range(ws.Cells(DST_START_ROW, 1), ws.Cells(last_row, 6)).Value
-    for r in rng:
+    for r in current_rows:
         contract = "" if r[4] is None else str(r[4]).strip()
         name = "" if r[5] is None else str(r[5]).strip()   # 🔹 C열 = 이름 (필요시 수정)
         if contract.startswith("PLVA"):
@@ -147,14 +142,11 @@ def build_remark_map(ws):
 # ===========================
 # 5) parkpark 쓰기
 # ===========================
-def write_to_parkpark(rows, contracts):
-    excel = win32.DispatchEx("Excel.Application")
-    excel.Visible = False
+def write_to_parkpark(wb, rows, contracts):
+    ws = wb.sheet(SHEET_DST)
 
-    wb = excel.Workbooks.Open(CUSTOMER_FILE, False, False, None, PASSWORD)
-    ws = wb.Worksheets(SHEET_DST)
-
-    remark_map,  name_map ,old_contracts = build_remark_map(ws)
+    current_rows = read_current_rows(ws)
+    remark_map,  name_map ,old_contracts = build_remark_map(current_rows)
 
     new_set = set(contracts)
     old_set = set(old_contracts)
@@ -170,53 +162,61 @@ def write_to_parkpark(rows, contracts):
         print("🚫 해지된 계약 목록")
         for c in removed:
             print(f"   - {name_map.get(c, '이름없음')} / {c}")
-    # 5행 헤더 유지, 데이터만 삭제
-    last_used = ws.UsedRange.Row + ws.UsedRange.Rows.Count
-    ws.Range(
-        ws.Cells(DST_START_ROW, 1),
-        ws.Cells(last_used, 24)
-    ).ClearContents()
-
-    # 비고
-    remarks = [remark_map.get(c, "") for c in contracts]
-    ws.Range(
-        ws.Cells(DST_START_ROW, 1),
-        ws.Cells(DST_START_ROW + len(rows) - 1, 1)
-    ).Value = tuple((v,) for v in remarks)
-
-    # 본 데이터
-    ws.Range(
-        ws.Cells(DST_START_ROW, DST_START_COL),
-        ws.Cells(DST_START_ROW + len(rows) - 1, DST_START_COL + PASTE_COLS - 1)
-    ).Value = tuple(tuple(r) for r in rows)
-
-    print("💾 저장 중...")
-    wb.Save()
-    # ===========================
-    # 실제 저장된 위치 출력
-    # ===========================
-    try:
-        saved_path = wb.FullName
-        saved_dir = os.path.dirname(saved_path)
-        print(f"📂 실제 저장된 폴더: {saved_dir}")
-        print(f"📄 실제 저장된 파일: {saved_path}")
-    except Exception as e:
-        print("⚠ 저장 위치 확인 실패:", e)
-
-    wb.Close(False)
-    excel.Quit()
-    gc.collect()
-    print("📁 완료")
 
+    # 변경 기록 (저장이 끝나면 changelog 에 기록)
+    changelog.add("SamChange", "samsung", changelog.ADDED, [(c, "", None) for c in added])
+    changelog.add("SamChange", "samsung", changelog.REMOVED, [(c, name_map.get(c, ""), None) for c in removed])
+    # 5행 헤더 유지, 비고(A열) + 본 데이터(B열~) 중 바뀐 셀만 기록
+    target_rows = [
+        [remark_map.get(c, "")] + list(row) for c, row in zip(contracts, rows)
+    ]
+    diff = write_diff(
+        ws, current_rows, target_rows, DST_START_ROW, 1, n_cols=DST_START_COL + PASTE_COLS - 1
+    )
+    sheet_cache.store(SHEET_DST, CACHE_REGION, target_rows)
+    print(f"✏ 변경 셀 {diff.cells}개 (범위 {diff.ranges}개, COM 호출 {diff.com_calls}회)")
+
+    print("📁 완료")
+    return {
+        "contracts": len(contracts),
+        "added": len(added),
+        "removed": len(removed),
+        "cells_written": diff.cells,
+    }
 
 
 # ===========================
 # 6) main
 # ===========================
+def find_inputs() -> dict:
+    """이번 실행에 쓸 삼성 파일 {역할: 경로}"""
+    return {"samsung": find_latest_source_file()}
+
+
+def prepare(inputs: dict):
+    """워크북 없이 삼성 파일 읽어서 (rows, contracts) 정리 (별도 프로세스 가능)"""
+    return read_and_sort_source(inputs["samsung"])
+
+
+def apply(wb, prepared) -> dict:
+    """이미 열린 고객 워크북(wb)에 정리된 결과 적용 (저장은 호출한 쪽에서)"""
+    rows, contracts = prepared
+    return write_to_parkpark(wb, rows, contracts)
+
+
+def run(wb, inputs: dict = None) -> dict:
+    """이미 열린 고객 워크북(wb)에 삼성_DATA 업데이트 적용 (저장은 호출한 쪽에서)"""
+    inputs = inputs or find_inputs()
+    return apply(wb, prepare(inputs))
+
+
 def main():
-    src = find_latest_source_file()
-    rows, contracts = read_and_sort_source(src)
-    write_to_parkpark(rows, contracts)
+    with open_customer_workbook() as wb:
+        run(wb)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="삼성_DATA 업데이트")
+    parser.add_argument("--profile", action="store_true", help=profiling.PROFILE_HELP)
+    args = parser.parse_args()
+    with profiling.profiled("SamChange", enabled=args.profile):
+        main()
@@ -0,0 +1,6 @@
+"""
+합성 증권사 파일로 각 업데이트 단계를 재는 벤치마크 (Excel 없이 fake_excel 위에서 실행)
+
+    python -m benchmarks.run_bench --scales 1000 10000 100000 --out bench.json
+    python -m benchmarks.startup --repeat 5          # 진입 스크립트 import + 고객 파일 경로 찾기
+"""
@@ -0,0 +1,151 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import changelog
+from benchmarks import synthetic
+from broker_io import read_broker_export
+from fake_excel import FakeExcel, open_fake_book
+from RunAll import STEPS
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+FAKE_BOOK_PATH = "C:/bench/고객data_v101.xlsx"
+
+# 원본 읽기(read) 단계에서 파일별로 쓰는 read_broker_export 인자
+READ_KWARGS = {"t1": {"header": None}, "fok": {"dtype": {"계약번호": str}}}
+
+
+# ===========================
+# 2. 측정 도구
+# ===========================
+class Recorder:
+    """단계별 측정값을 {scale, updater, stage, seconds, rows, com_calls} 레코드로 모음"""
+
+    def __init__(self, counter=None):
+        self.counter = counter
+        self.records = []
+
+    @contextlib.contextmanager
+    def stage(self, scale: int, updater: str, stage: str, rows: int = None):
+        before = self.counter.total() if self.counter else 0
+        quiet = io.StringIO()  # 업데이트 모듈의 안내 출력은 버림
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(quiet):
+                yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.records.append({
+                "scale": scale,
+                "updater": updater,
+                "stage": stage,
+                "seconds": round(seconds, 6),
+                "rows": rows,
+                "com_calls": (self.counter.total() - before) if self.counter else 0,
+            })
+
+
+# ===========================
+# 3. 한 규모 실행
+# ===========================
+def bench_scale(scale: int, data_dir: str, seed: int) -> list:
+    exports = synthetic.make_exports(scale, seed)
+    folder = os.path.join(data_dir, f"n{scale}_s{seed}")
+    paths = synthetic.write_exports(exports, folder)
+    inputs = synthetic.updater_inputs(paths)
+
+    excel = FakeExcel()
+    rec = Recorder(excel.counter)
+
+    # 원본 읽기 (파일 종류별, 정리 전)
+    for kind, path in paths.items():
+        with rec.stage(scale, kind, "read", rows=len(exports[kind])):
+            read_broker_export(path, **READ_KWARGS.get(kind, {}))
+
+    # 고객 파일 (어제 상태) → 가짜 Excel 에서 열기
+    with rec.stage(scale, "-", "workbook_open"):
+        excel.add_workbook(FAKE_BOOK_PATH, synthetic.customer_sheets(exports, seed))
+        book = open_fake_book(excel, FAKE_BOOK_PATH, "pw")
+
+    # 업데이트 모듈별: 정리(prepare) → 시트 적용(apply)
+    for name, module in STEPS:
+        with rec.stage(scale, name, "prepare"):
+            prepared = module.prepare(inputs[name])
+        with excel.counter.stage(name), rec.stage(scale, name, "apply"):
+            module.apply(book, prepared)
+
+    with rec.stage(scale, "-", "save"):
+        book.save()
+        book.close()
+    changelog.discard()  # 합성 데이터 변경은 실제 변경 기록에 남기지 않음
+
+    return rec.records
+
+
+# ===========================
+# 4. 실행 / 결과 파일
+# ===========================
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "backend": "fake_excel",
+    }
+
+
+def print_table(records: list):
+    print(f"{'scale':>8}  {'updater':<14} {'stage':<14} {'seconds':>9} {'rows':>8} {'com':>6}")
+    for r in records:
+        rows = "" if r["rows"] is None else r["rows"]
+        print(
+            f"{r['scale']:>8}  {r['updater']:<14} {r['stage']:<14} "
+            f"{r['seconds']:>9.3f} {rows:>8} {r['com_calls']:>6}"
+        )
+
+
+def main(scales=DEFAULT_SCALES, out: str = None, data_dir: str = None, seed: int = synthetic.SEED):
+    keep_data = data_dir is not None
+    data_dir = data_dir or tempfile.mkdtemp(prefix="parkpark_bench_")
+
+    records = []
+    try:
+        for scale in scales:
+            print(f"▶ {scale:,}행 측정 중...")
+            records += bench_scale(scale, data_dir, seed)
+    finally:
+        if not keep_data:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    print_table(records)
+
+    result = {"environment": environment(), "scales": list(scales), "seed": seed, "results": records}
+    out = out or f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"📄 결과 저장: {out}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="합성 증권사 파일로 업데이트 단계별 시간 측정")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES), help="행 수 목록")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: bench_<시각>.json)")
+    parser.add_argument("--data-dir", help="합성 파일 보관 폴더 (지정하면 지우지 않고 다음에 재사용)")
+    parser.add_argument("--seed", type=int, default=synthetic.SEED)
+    args = parser.parse_args()
+    main(args.scales, args.out, args.data_dir, args.seed)
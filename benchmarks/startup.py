@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+ENTRY_MODULES = (
+    "RunAll", "watcher",
+    "FokChange", "NhChange", "NH_1_Change", "KiwoomCount", "Han", "SamChange",
+)
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "win32com", "sqlite3", "cProfile")
+DEFAULT_REPEAT = 5
+
+# 새 파이썬 프로세스 안에서 실행: import 시간 + 고객 파일 경로 찾기 (첫 호출 / 두 번째 호출)
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+import config
+try:
+    config.get_fixed_customer_path()
+except FileNotFoundError:
+    pass
+t2 = time.perf_counter()
+try:
+    config.get_fixed_customer_path()
+except FileNotFoundError:
+    pass
+t3 = time.perf_counter()
+print(json.dumps({{
+    "import": t1 - t0,
+    "path_first": t2 - t1,
+    "path_cached": t3 - t2,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+# ===========================
+# 2. 측정
+# ===========================
+def probe(module: str, env: dict) -> dict:
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench_module(module: str, repeat: int, customer_file: str = None) -> dict:
+    """repeat 번 새 프로세스로 실행한 중앙값 (첫 번째는 .pyc 생성 등을 빼려고 버림)"""
+    env = dict(os.environ)
+    env.pop("PARKPARK_CUSTOMER_FILE", None)
+    if customer_file:
+        env["PARKPARK_CUSTOMER_FILE"] = customer_file
+
+    probe(module, env)
+    runs = [probe(module, env) for _ in range(repeat)]
+    return {
+        "module": module,
+        "path_override": bool(customer_file),
+        "import_seconds": round(statistics.median(r["import"] for r in runs), 6),
+        "path_first_seconds": round(statistics.median(r["path_first"] for r in runs), 6),
+        "path_cached_seconds": round(statistics.median(r["path_cached"] for r in runs), 6),
+        "heavy_loaded": runs[-1]["heavy"],
+    }
+
+
+def print_table(records: list):
+    print(f"{'module':<14} {'override':>8} {'import ms':>10} {'path ms':>9} {'cached ms':>10}  heavy")
+    for r in records:
+        print(
+            f"{r['module']:<14} {str(r['path_override']):>8} {r['import_seconds'] * 1000:>10.1f} "
+            f"{r['path_first_seconds'] * 1000:>9.2f} {r['path_cached_seconds'] * 1000:>10.3f}  "
+            f"{', '.join(r['heavy_loaded']) or '-'}"
+        )
+
+
+def main(modules=ENTRY_MODULES, repeat: int = DEFAULT_REPEAT, customer_file: str = None, out: str = None):
+    records = []
+    for module in modules:
+        print(f"▶ {module} 측정 중...")
+        records.append(bench_module(module, repeat))
+        if customer_file:
+            records.append(bench_module(module, repeat, customer_file))
+
+    print_table(records)
+
+    env_info = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+    result = {"environment": env_info, "repeat": repeat, "results": records}
+    out = out or f"startup_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"📄 결과 저장: {out}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="진입 스크립트 import + 고객 파일 경로 찾기 시간 측정")
+    parser.add_argument("--modules", nargs="+", default=list(ENTRY_MODULES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--customer-file", help="PARKPARK_CUSTOMER_FILE 로 지정했을 때도 측정")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: startup_<시각>.json)")
+    args = parser.parse_args()
+    main(args.modules, args.repeat, args.customer_file, args.out)
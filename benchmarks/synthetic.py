@@ -0,0 +1,371 @@
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from KiwoomCount import HEADER_ROW as KIWOOM_HEADER_ROW
+from SamChange import DST_START_ROW as SAM_START_ROW, PASTE_COLS
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+SEED = 17
+CHURN = 0.01          # 고객 파일 대비 신규/해지 비율
+CHANGE = 0.10         # 기존 계약 중 자산/수익률이 바뀐 비율
+
+# NH HTS 고객파일: '자문사' ~ '자문관리사원명' 49열 (A~AW) + 앞쪽 잡열
+NH_NAMED = [
+    "자문사", "고객성명", "휴대전화", "계좌번호", "상품",
+    "계약일자", "만료일자", "해지일자", "운용시작일자", "투자성향등록일자",
+]
+NH_COLUMNS = NH_NAMED + [f"항목{i}" for i in range(len(NH_NAMED) + 1, 49)] + ["자문관리사원명"]
+NH_FILLED_EXTRA = 3   # 값이 들어 있는 '항목' 열 수 (나머지는 빈 칸)
+
+FOK_COLUMNS = ["계약번호", "고객명", "계좌자산", "수익률", "계약요청상태", "계약일자", "상품명"]
+FOK_STATUSES = ["계약완료(승인)", "계약완료(승인)", "계약완료(승인)", "계약요청", "계약해지"]
+
+# 삼성 통합 문서1: 0열 잡열 + 1~23열 붙여넣기 구간 (계약번호 = 4열, 이름 = 5열)
+SAM_COLUMNS = (
+    ["No", "구분", "상품구분", "계좌번호", "계약번호", "고객명", "최초계약일", "연장계약일", "만료일",
+     "수수료출금계좌"]
+    + [f"항목{i}" for i in range(10, 1 + PASTE_COLS)]
+)
+
+KIWOOM_COLUMNS = ["이름", "계약계좌번호", "계좌유형", "생년월일", "투자유형", "연락처", "이메일", "계약일"]
+KIWOOM_TYPES = ["위탁종합", "위탁종합", "ISA", "연금저축"]
+KIWOOM_SHEET_HEADER = [
+    "NO.", "구분", "플랫폼", "이름", "계좌(계약)번호", "유형", "계약일", "계약종료일",
+    "잔고", "생년", "전화번호", "이메일", "투자성향",
+]
+INVEST_TYPES = ["안정형", "안정추구형", "위험중립형", "적극투자형", "공격투자형"]
+
+SURNAMES = list("김이박최정강조윤장임한오서신권황안송류홍")
+SYLLABLES = list("민서준지현수영도윤하은우진예주건시아연재태성")
+
+
+# ===========================
+# 2. 공통 값 생성
+# ===========================
+def korean_names(rng, n: int) -> np.ndarray:
+    s = rng.choice(SURNAMES, n)
+    a = rng.choice(SYLLABLES, n)
+    b = rng.choice(SYLLABLES, n)
+    return np.char.add(np.char.add(s, a), b)
+
+
+def digits(rng, n: int, width: int) -> np.ndarray:
+    """width 자리 숫자 문자열 (앞자리 0 없음)"""
+    low, high = 10 ** (width - 1), 10 ** width
+    return rng.integers(low, high, n).astype(str)
+
+
+def date_strings(rng, n: int, fmt: str = "%Y-%m-%d") -> np.ndarray:
+    base = np.datetime64("2019-01-01")
+    days = rng.integers(0, 2500, n)
+    return pd.to_datetime(base + days.astype("timedelta64[D]")).strftime(fmt).to_numpy()
+
+
+# ===========================
+# 3. 증권사 파일 (DataFrame)
+# ===========================
+def nh_customer_frame(rng, n: int) -> pd.DataFrame:
+    df = pd.DataFrame({"No": np.arange(1, n + 1)})
+    df["자문사"] = "플레인바닐라"
+    df["고객성명"] = korean_names(rng, n)
+    df["휴대전화"] = np.char.add("010-", np.char.add(np.char.add(digits(rng, n, 4), "-"), digits(rng, n, 4)))
+    df["계좌번호"] = np.char.add(np.char.add(digits(rng, n, 3), "-"), digits(rng, n, 6))
+    df["상품"] = rng.choice([1, 2, 3, 4, 5, 6], n).astype(float)   # HTS 는 1.0 처럼 내려옴
+    df["계약일자"] = date_strings(rng, n)
+    df["만료일자"] = date_strings(rng, n)
+    df["해지일자"] = np.where(rng.random(n) < 0.05, date_strings(rng, n), None)
+    df["운용시작일자"] = date_strings(rng, n)
+    df["투자성향등록일자"] = date_strings(rng, n)
+    for i, col in enumerate(NH_COLUMNS[len(NH_NAMED):-1]):
+        df[col] = digits(rng, n, 5) if i < NH_FILLED_EXTRA else None
+    df["자문관리사원명"] = rng.choice(["박박", "이재욱", "홍길동"], n)
+    return df
+
+
+def nh_balance_frame(rng, n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "계좌번호": np.char.add(np.char.add(digits(rng, n, 3), "-"), digits(rng, n, 6)),
+        "고객명": korean_names(rng, n),
+        "상품코드": rng.choice([1, 2, 3, 4, 5, 6], n),
+        "총합계": rng.integers(1_000_000, 500_000_000, n),
+    })
+
+
+def fok_frame(rng, n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "계약번호": (2_000_000 + rng.permutation(n * 2)[:n]).astype(str),
+        "고객명": korean_names(rng, n),
+        "계좌자산": rng.integers(1_000_000, 300_000_000, n),
+        "수익률": np.round(rng.normal(3, 8, n), 2),
+        "계약요청상태": rng.choice(FOK_STATUSES, n),
+        "계약일자": date_strings(rng, n),
+        "상품명": rng.choice(["주식형", "채권형", "혼합형"], n),
+    })
+
+
+def samsung_frame(rng, n: int) -> pd.DataFrame:
+    # 계약번호는 발급 순 (오늘 신규분 = 마지막 행들 = 가장 큰 번호)
+    serials = np.sort(rng.permutation(n * 2)[:n])
+    contracts = np.char.add("PLVA", np.char.zfill(serials.astype(str), 7))
+    temp = rng.random(n) < 0.05   # PLVA 가 아닌 행 (필터 대상)
+    contracts = np.where(temp, np.char.add("TEMP", digits(rng, n, 6)), contracts)
+
+    df = pd.DataFrame({"No": np.arange(1, n + 1)})
+    df["구분"] = rng.choice(["일임", "자문"], n)
+    df["상품구분"] = rng.choice(["국내", "해외"], n)
+    df["계좌번호"] = rng.integers(10 ** 11, 10 ** 12, n)          # 큰 숫자 → E+ 표기 경로
+    df["계약번호"] = contracts
+    df["고객명"] = korean_names(rng, n)
+    df["최초계약일"] = date_strings(rng, n)
+    df["연장계약일"] = date_strings(rng, n)
+    df["만료일"] = date_strings(rng, n)
+    df["수수료출금계좌"] = rng.integers(10 ** 11, 10 ** 12, n)
+    for col in SAM_COLUMNS[10:]:
+        df[col] = rng.integers(0, 1_000_000, n)
+    return df
+
+
+def kiwoom_frame(rng, n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "이름": korean_names(rng, n),
+        "계약계좌번호": digits(rng, n, 8),
+        "계좌유형": rng.choice(KIWOOM_TYPES, n),
+        "생년월일": digits(rng, n, 6),
+        "투자유형": rng.choice(INVEST_TYPES, n),
+        "연락처": np.char.add("10", digits(rng, n, 8)),
+        "이메일": np.char.add(digits(rng, n, 6), "@example.com"),
+        "계약일": date_strings(rng, n, "%Y.%m.%d"),
+    })
+
+
+def t1_frame(rng) -> pd.DataFrame:
+    """T1 실적조회: 머리글 없이 E4 / E5 / E6 에 '1,234원' 형식 금액"""
+    rows = [[None] * 6 for _ in range(8)]
+    rows[0][0] = "자문결합계좌 실적조회"
+    for r in (3, 4, 5):
+        rows[r][3] = f"항목{r + 1}"
+        rows[r][4] = f"{int(rng.integers(10 ** 8, 10 ** 11)):,}원"
+    return pd.DataFrame(rows)
+
+
+def make_exports(n: int, seed: int = SEED) -> dict:
+    """규모 n 의 증권사 파일 세트 {종류: DataFrame}"""
+    rng = np.random.default_rng(seed + n)
+    return {
+        "nh_customer": nh_customer_frame(rng, n),
+        "nh_balance": nh_balance_frame(rng, n),
+        "fok": fok_frame(rng, n),
+        "samsung": samsung_frame(rng, n),
+        "kiwoom": kiwoom_frame(rng, n),
+        "t1": t1_frame(rng),
+    }
+
+
+# ===========================
+# 4. 파일로 쓰기
+# ===========================
+# 실제 다운로드와 같은 이름 / 형식 (downloads.EXPORT_TYPES 가 분류하는 이름)
+#   xls  : 구형 BIFF (OLE2)                     - FOK, 키움
+#   html : HTML 표를 .xls 로 내려주는 HTS 내보내기 - NH 고객정보 / 잔고, T1 실적조회
+#   xlsx : 삼성 통합 문서1
+EXPORT_FILES = {
+    "nh_customer": ("Excel_1.xls", "html"),
+    "nh_balance": ("Excel_2.xls", "html"),
+    "fok": ("file_bench.xls", "xls"),
+    "samsung": ("통합 문서1.xlsx", "xlsx"),
+    "kiwoom": ("Excel_List_bench.xls", "xls"),
+    "t1": ("자문결합계좌 실적조회.xls", "html"),
+}
+XLS_MAX_ROWS = 65536        # 구형 .xls 한 시트 최대 행 수
+HTML_ENCODING = "cp949"     # HTS 내보내기 인코딩
+
+
+def frame_rows(df: pd.DataFrame, header: bool) -> list:
+    """DataFrame → 2-D 리스트 (NaN → None, numpy 값 → 파이썬 값)"""
+    rows = df.astype(object).where(df.notna(), None).to_numpy().tolist()
+    return [list(df.columns)] + rows if header else rows
+
+
+def write_xls(df: pd.DataFrame, path: str, header: bool = True):
+    """xlwt 로 구형 .xls (BIFF8) 저장 - 벤치마크에서만 쓰는 의존성이라 여기서 import"""
+    import xlwt
+
+    book = xlwt.Workbook(encoding="utf-8")
+    sheet = book.add_sheet("Sheet1")
+    for r, row in enumerate(frame_rows(df, header)):
+        for c, v in enumerate(row):
+            if v is not None:
+                sheet.write(r, c, v)
+    book.save(path)
+
+
+def html_cell(v) -> str:
+    from html import escape
+
+    if v is None:
+        return "<td></td>"
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return f"<td>{v:,}</td>"   # HTS 는 천 단위 쉼표를 붙여 내려줌
+    return f"<td>{escape(str(v))}</td>"
+
+
+def write_html(df: pd.DataFrame, path: str, header: bool = True):
+    """HTS 처럼 첫 번째 <table> 하나짜리 HTML 을 .xls 이름으로 저장"""
+    with open(path, "w", encoding=HTML_ENCODING) as f:
+        f.write(
+            '<html><head><meta http-equiv="Content-Type" content="text/html; charset=euc-kr">'
+            '</head><body>\n<table border="1">\n'
+        )
+        for row in frame_rows(df, header):
+            f.write("<tr>" + "".join(html_cell(v) for v in row) + "</tr>\n")
+        f.write("</table></body></html>\n")
+
+
+def write_xlsx(df: pd.DataFrame, path: str, header: bool = True):
+    df.to_excel(path, index=False, header=header, engine="openpyxl")
+
+
+WRITERS = {"xls": write_xls, "html": write_html, "xlsx": write_xlsx}
+
+
+def write_exports(exports: dict, folder: str) -> dict:
+    """
+    {종류: DataFrame} → folder 에 실제 다운로드와 같은 이름 / 형식으로 저장, {종류: 경로}
+    (이미 있으면 재사용)
+    ※ XLS_MAX_ROWS 를 넘는 규모는 .xls 에 담을 수 없어 이름은 그대로 두고 내용만 xlsx
+      (읽는 쪽은 확장자가 아니라 내용으로 판별)
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = {}
+    for kind, df in exports.items():
+        name, fmt = EXPORT_FILES[kind]
+        path = os.path.join(folder, name)
+        header = kind != "t1"
+        if fmt == "xls" and len(df) + header > XLS_MAX_ROWS:
+            fmt = "xlsx"
+        if not os.path.exists(path):
+            WRITERS[fmt](df, path, header)
+        paths[kind] = path
+    return paths
+
+
+def updater_inputs(paths: dict) -> dict:
+    """업데이트 모듈별 find_inputs() 와 같은 모양 {모듈: {역할: 경로}}"""
+    return {
+        "FokChange": {"fok": paths["fok"]},
+        "NhChange": {"customer": paths["nh_customer"], "balance": paths["nh_balance"]},
+        "NH_1_Change": {"customer": paths["nh_customer"], "balance": paths["nh_balance"]},
+        "KiwoomCount": {"kiwoom": paths["kiwoom"]},
+        "Han": {"t1": paths["t1"]},
+        "SamChange": {"samsung": paths["samsung"]},
+    }
+
+
+# ===========================
+# 5. 고객 파일 (어제 상태)
+# ===========================
+NUMBER_RE = re.compile(r"-?\d+(\.\d+)?")
+DATE_RE = re.compile(r"\d{4}[-/]\d{2}[-/]\d{2}")
+
+
+def excel_stored(v):
+    """
+    문자열을 일반 서식 셀에 쓰면 엑셀이 실제로 저장하는 값
+    "'123" → "123", "00123" → 123.0, "2024-03-01" → datetime
+    """
+    if not isinstance(v, str):
+        return v
+    if v.startswith("'"):
+        return v[1:]
+    if NUMBER_RE.fullmatch(v):
+        return float(v)
+    if DATE_RE.fullmatch(v):
+        return datetime.strptime(v.replace("/", "-"), "%Y-%m-%d")
+    return v
+
+
+def stored_rows(rows) -> list:
+    return [[excel_stored(v) for v in row] for row in rows]
+
+
+def churn(rng, df: pd.DataFrame, rate: float = CHURN):
+    """어제 상태 재료: (유지된 행 - 오늘 신규분 rate 제외, 그 사이 해지될 행 rate)"""
+    n = len(df)
+    k = max(1, int(n * rate))
+    keep = df.iloc[: n - k]
+    gone = df.sample(k, random_state=int(rng.integers(1 << 31))).copy()
+    return keep, gone
+
+
+def fok_sheet(rng, df: pd.DataFrame) -> list:
+    keep, gone = churn(rng, df)
+    gone["계약번호"] = (9_000_000 + np.arange(len(gone))).astype(str)
+    old = pd.concat([keep, gone]).copy()
+    changed = rng.random(len(old)) < CHANGE
+    old.loc[changed, "계좌자산"] = old.loc[changed, "계좌자산"] - 1000
+    old["계약요청상태"] = old["계약요청상태"].replace("계약해지", "계약완료(승인)")
+    old["계약번호"] = old["계약번호"].astype(int)   # 시트에는 숫자로 저장
+    return [FOK_COLUMNS] + stored_rows(old[FOK_COLUMNS].astype(object).to_numpy().tolist())
+
+
+def nh_sheet(rng, df: pd.DataFrame) -> list:
+    keep, gone = churn(rng, df)
+    gone["고객성명"] = gone["고객성명"] + "해"
+    old = pd.concat([keep, gone])[NH_COLUMNS].copy()
+    old["상품"] = old["상품"].map(lambda v: f"{int(v):03d}")
+    old = old.astype(object).where(old.notna(), None)
+    return [NH_COLUMNS] + stored_rows(old.to_numpy().tolist())
+
+
+def kiwoom_sheet(rng, df: pd.DataFrame) -> list:
+    keep, gone = churn(rng, df)
+    old = pd.concat([keep, gone])
+    types = old["계좌유형"].map(lambda t: "일반" if t == "위탁종합" else t)
+    rows = [[None] * len(KIWOOM_SHEET_HEADER) for _ in range(KIWOOM_HEADER_ROW - 1)]
+    rows.append(list(KIWOOM_SHEET_HEADER))
+    for no, (name, acct, typ, birth, invest) in enumerate(
+        zip(old["이름"], old["계약계좌번호"], types, old["생년월일"], old["투자유형"]), start=1
+    ):
+        rows.append([no, "", "키움증권", name, acct, typ, "2024.01.02", "2025.01.02",
+                     "", birth[:2], "", "", invest])
+    # 키움 블록 아래 다른 플랫폼 고객
+    for i in range(max(1, len(old) // 50)):
+        rows.append([len(old) + i + 1, "", "다른증권", f"타사{i}", str(i), "일반"] + [None] * 7)
+    return rows
+
+
+def samsung_sheet(rng, df: pd.DataFrame) -> list:
+    plva = df[df["계약번호"].str.startswith("PLVA")]
+    keep, gone = churn(rng, plva)
+    gone["계약번호"] = np.char.add("PLVA9", np.char.zfill(np.arange(len(gone)).astype(str), 6))
+    old = pd.concat([keep, gone]).sort_values("계약번호")
+    # SamChange 가 쓰는 모양: 날짜 "YYYY/MM/DD", 계좌 텍스트, 나머지 문자열
+    for col in ("최초계약일", "연장계약일", "만료일"):
+        old[col] = pd.to_datetime(old[col]).dt.strftime("%Y/%m/%d")
+    for col in ("계좌번호", "수수료출금계좌"):
+        old[col] = "'" + old[col].astype(str)
+    body = stored_rows(old.iloc[:, 1:1 + PASTE_COLS].astype(str).to_numpy().tolist())
+    remarks = rng.choice(["", "", "", "VIP", "연락요망"], len(body))
+    rows = [[None] * (1 + PASTE_COLS) for _ in range(SAM_START_ROW - 1)]
+    rows[SAM_START_ROW - 2][0] = "비고"
+    rows += [[remark or None] + row for remark, row in zip(remarks, body)]
+    return rows
+
+
+def customer_sheets(exports: dict, seed: int = SEED) -> dict:
+    """fake_excel.FakeExcel.add_workbook 에 넣을 {시트명: 2-D 행} (어제 실행 후 상태)"""
+    rng = np.random.default_rng(seed)
+    return {
+        "FOK_DATA": fok_sheet(rng, exports["fok"]),
+        "NH_DATA": nh_sheet(rng, exports["nh_customer"]),
+        "NH_DATA_1": [],
+        "Daily": [],
+        "키움_DATA_": kiwoom_sheet(rng, exports["kiwoom"]),
+        "삼성_DATA": samsung_sheet(rng, exports["samsung"]),
+    }
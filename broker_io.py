@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+import io
+import os
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING
+
+import tracing
+from workbook_backend import parse_address
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"   # 구형 .xls (BIFF)
+ZIP_MAGIC = b"PK\x03\x04"                          # .xlsx
+HTML_ENCODINGS = ("utf-8", "cp949")                 # HTML 형식 .xls (HTS 내보내기)
+SNIFF_BYTES = 2048
+STREAM_CHUNK = 64 * 1024                            # HTML 을 나눠 읽는 크기
+
+
+# ===========================
+# 2. 증권사 파일 읽기
+# ===========================
+def sniff_format(data: bytes) -> str:
+    """파일 앞부분으로 실제 형식 판별 ('xls' / 'xlsx' / 'html')"""
+    if data.startswith(OLE2_MAGIC):
+        return "xls"
+    if data.startswith(ZIP_MAGIC):
+        return "xlsx"
+    head = data[:SNIFF_BYTES].lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if head.startswith((b"<html", b"<!doctype", b"<table", b"<meta")) or b"<table" in head:
+        return "html"
+    raise ValueError("지원하지 않는 엑셀 파일 형식입니다.")
+
+
+def read_broker_export(path: str, **read_kwargs) -> pd.DataFrame:
+    """
+    증권사 내보내기 파일(.xls / .xlsx)을 메모리에서 바로 DataFrame으로 읽는다.
+    - Excel 실행 / 중간 .xlsx 저장 없이 확장자가 아니라 파일 내용으로 판별
+      · 구형 .xls  → xlrd
+      · .xlsx      → openpyxl
+      · HTML .xls  → 첫 번째 표를 FirstTableRows 로 파싱 (lxml 없이 표준 라이브러리만)
+    - read_kwargs 는 pandas.read_excel 에 그대로 전달 (header, dtype 등)
+      · HTML 은 header / skiprows / dtype 만 사용, 숫자의 천 단위 쉼표는 제거
+    """
+    import pandas as pd
+
+    fmt = sniff_file(path)
+
+    with tracing.span("read", file=os.path.basename(path), format=fmt) as s:
+        if fmt == "html":
+            from pandas.io.parsers import TextParser
+
+            rows = list(iter_rows(path, fmt))
+            while rows and is_blank_row(rows[-1]):   # 표 끝의 빈 행은 Excel 사용 범위 밖
+                rows.pop()
+            if rows:
+                parse_kwargs = {k: v for k, v in read_kwargs.items() if k in ("header", "skiprows", "dtype")}
+                parse_kwargs.setdefault("header", 0)   # read_excel 과 같이 첫 행이 헤더
+                df = TextParser(rows, thousands=",", **parse_kwargs).read()
+            else:
+                df = pd.DataFrame()
+        else:
+            with open(path, "rb") as f:
+                data = f.read()
+            engine = "xlrd" if fmt == "xls" else "openpyxl"
+            df = pd.read_excel(io.BytesIO(data), engine=engine, **read_kwargs)
+        s.set(rows=len(df))
+    return df
+
+
+# ===========================
+# 3. 행 단위로 읽기 (DataFrame 없이, 파일에서 조금씩)
+# ===========================
+class FirstTableRows(HTMLParser):
+    """
+    HTML 형식 .xls 의 첫 번째 표를 행 단위로 모음 (rows 는 가져간 쪽에서 비움)
+    - Excel 로 열었을 때처럼 <th> 행도 한 행, colspan / rowspan 은 같은 값으로 채움
+    - max_row 행까지 채우거나 첫 표가 끝나면 done
+    """
+
+    def __init__(self, max_row: int = None, max_col: int = None):
+        super().__init__(convert_charrefs=True)
+        self.max_row = max_row
+        self.max_col = max_col
+        self.rows = []
+        self.count = 0
+        self.done = False
+        self._depth = 0         # 표 중첩 깊이 (안쪽 표 내용은 바깥 셀 글자로 취급)
+        self._row = None
+        self._cell = None       # [글자, colspan, rowspan]
+        self._carry = {}        # 열 → (값, 남은 행 수) - rowspan
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            self._depth += 1
+        elif self._depth != 1:
+            return
+        elif tag == "tr":
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            a = dict(attrs)
+            self._cell = ["", span_attr(a.get("colspan")), span_attr(a.get("rowspan"))]
+        elif tag == "br" and self._cell is not None:
+            self._cell[0] += "\n"
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag == "table":
+            self._depth -= 1
+            if self._depth == 0:
+                self.end_row()
+                self.done = True
+        elif self._depth != 1:
+            return
+        elif tag in ("td", "th"):
+            self.end_cell()
+        elif tag == "tr":
+            self.end_row()
+
+    def handle_data(self, data):
+        if self._cell is not None and not self.done:
+            self._cell[0] += data
+
+    def fill_carried(self):
+        while len(self._row) in self._carry:
+            col = len(self._row)
+            value, left = self._carry[col]
+            self._row.append(value)
+            if left <= 1:
+                del self._carry[col]
+            else:
+                self._carry[col] = (value, left - 1)
+
+    def end_cell(self):
+        if self._cell is None:
+            return
+        text, colspan, rowspan = self._cell
+        value = " ".join(text.split()) or None
+        self._cell = None
+        for _ in range(colspan):
+            self.fill_carried()
+            if rowspan > 1:
+                self._carry[len(self._row)] = (value, rowspan - 1)
+            self._row.append(value)
+
+    def end_row(self):
+        if self._row is None:
+            return
+        self.end_cell()
+        self.fill_carried()
+        self.rows.append(self._row[: self.max_col] if self.max_col else self._row)
+        self._row = None
+        self.count += 1
+        if self.max_row and self.count >= self.max_row:
+            self.done = True
+
+
+def span_attr(v) -> int:
+    try:
+        return max(1, int(v))
+    except (TypeError, ValueError):
+        return 1
+
+
+def sniff_file(path: str) -> str:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"파일을 찾을 수 없습니다: {path}")
+    with open(path, "rb") as f:
+        return sniff_format(f.read(SNIFF_BYTES))
+
+
+def html_encoding(path: str) -> str:
+    """HTML 형식 파일 인코딩 (파일 전체를 조각으로 디코딩해 확인, 내용은 남기지 않음)"""
+    import codecs
+
+    for enc in HTML_ENCODINGS:
+        decoder = codecs.getincrementaldecoder(enc)()
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(STREAM_CHUNK), b""):
+                    decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"HTML 형식 파일 인코딩을 알 수 없습니다: {path}")
+
+
+def iter_rows(path: str, fmt: str = None, max_row: int = None, max_col: int = None):
+    """
+    첫 번째 시트를 위에서부터 한 행씩 (값 리스트, 길이는 행마다 다를 수 있음)
+    - max_row / max_col 을 주면 그 행 / 열까지만
+      · .xlsx: openpyxl read_only 로 시트 XML 을 풀면서 읽음 (파일을 통째로 올리지 않음)
+      · .xls : xlrd 는 시트를 한 번에 읽으므로 첫 시트만 (on_demand)
+      · HTML : 첫 번째 표만 조각 단위로 파싱
+    """
+    fmt = fmt or sniff_file(path)
+
+    if fmt == "xlsx":
+        import openpyxl
+
+        with open(path, "rb") as f:   # 파일 객체로 넘겨야 확장자(.xls)를 따지지 않음
+            wb = openpyxl.load_workbook(f, read_only=True, data_only=True)
+            try:
+                ws = wb.worksheets[0]
+                ws.reset_dimensions()   # 내보내기 파일의 시트 크기 정보가 틀린 경우가 있음
+                for row in ws.iter_rows(max_row=max_row, max_col=max_col, values_only=True):
+                    yield list(row)
+            finally:
+                wb.close()
+        return
+
+    if fmt == "xls":
+        import xlrd
+
+        book = xlrd.open_workbook(path, on_demand=True)
+        try:
+            sh = book.sheet_by_index(0)
+            for r in range(min(max_row or sh.nrows, sh.nrows)):
+                yield sh.row_values(r, 0, min(max_col, sh.row_len(r)) if max_col else None)
+        finally:
+            book.release_resources()
+        return
+
+    parser = FirstTableRows(max_row, max_col)
+    with open(path, encoding=html_encoding(path)) as f:
+        while not parser.done:
+            chunk = f.read(STREAM_CHUNK)
+            if not chunk:
+                parser.close()
+                parser.end_row()
+                parser.done = True
+            else:
+                parser.feed(chunk)
+            yield from parser.rows
+            parser.rows.clear()
+
+
+# ===========================
+# 4. 고정 위치 셀 읽기 (실적조회 같은 정해진 양식)
+# ===========================
+def to_number(v) -> float:
+    """'1,234원' / '-5,000' / 1234.0 → float (숫자 / 마이너스 / 점 말고는 전부 무시, 빈 값은 0)"""
+    s = str(v)
+    s_clean = "".join(ch for ch in s if ch.isdigit() or ch in "-.")
+    try:
+        return float(s_clean) if s_clean not in ("", "-", ".", "-.") else 0.0
+    except ValueError:
+        return 0.0
+
+
+def read_cells(path: str, addresses) -> dict:
+    """
+    증권사 파일 첫 번째 시트에서 지정한 셀만 읽기: read_cells(path, ["E4", "E5"]) → {"E4": 값, "E5": 값}
+    - 주소는 Excel 로 열었을 때 기준 (머리글 없이 1행 = 파일 첫 행)
+    - 가장 아래 주소의 행까지만 읽고 멈춤 (DataFrame 을 만들지 않음)
+    - 빈 칸 / 범위 밖은 None
+    """
+    fmt = sniff_file(path)
+    targets = {addr: parse_address(addr) for addr in addresses}
+    if not targets:
+        return {}
+    max_row = max(r for r, _ in targets.values())
+    max_col = max(c for _, c in targets.values())
+
+    with tracing.span("read", file=os.path.basename(path), format=fmt, cells=len(targets)) as s:
+        rows = list(iter_rows(path, fmt, max_row, max_col))
+        s.set(rows=len(rows))
+
+    values = {}
+    for addr, (r, c) in targets.items():
+        row = rows[r - 1] if r <= len(rows) else []
+        v = row[c - 1] if c <= len(row) else None
+        values[addr] = None if v == "" else v
+    return values
+
+
+def read_numbers(path: str, addresses) -> dict:
+    """read_cells + to_number: {주소: float}"""
+    return {addr: to_number(v) for addr, v in read_cells(path, addresses).items()}
+
+
+# ===========================
+# 5. 필요한 열만 읽기 (큰 내보내기 파일)
+# ===========================
+def norm_header(s) -> str:
+    """헤더 비교용: 줄바꿈(_x000D_ 포함) / 공백 제거"""
+    s = str(s)
+    for token in ("_x000D_", "\r", "\n", " "):
+        s = s.replace(token, "")
+    return s.strip()
+
+
+def is_blank_row(row) -> bool:
+    return all(v is None or v == "" for v in row)
+
+
+def to_float(v):
+    """
+    숫자로 바꿀 수 있으면 float, 아니면 None
+    - HTML 형식 내보내기의 '1,234,567' / ' -5,000 ' 처럼 천 단위 쉼표와 공백은 to_number 와 같이 제거
+    - 그 밖의 글자가 섞이면 (합계 행 등) None
+    """
+    if v is None or isinstance(v, bool):
+        return None
+    if isinstance(v, (int, float)):
+        return None if v != v else float(v)
+    text = "".join(str(v).replace(",", "").split())
+    try:
+        f = float(text)
+    except ValueError:
+        return None
+    return None if f != f else f
+
+
+def stream_columns(path: str, columns, where: dict = None, normalize=norm_header):
+    """
+    헤더(첫 번째 빈 줄 아닌 행) 아래를 한 행씩 읽으면서 필요한 열만 골라냄
+    - columns: 정규화한 헤더 이름 또는 0부터 센 열 번호
+    - where: {columns 중 하나: 값 → bool} - 모두 참인 행만 (읽는 중에 거름)
+    반환: (헤더, 행들)
+      - 헤더: columns 순서대로 파일의 원래 헤더 값
+      - 행들: 선택한 열 값 tuple 을 하나씩 내주는 generator (빈 줄은 건너뜀)
+    ※ generator 안에서는 span 을 열지 않으므로 시간 측정은 다 읽는 쪽에서
+    """
+    rows = iter_rows(path)
+    header = next((r for r in rows if not is_blank_row(r)), None)
+    if header is None:
+        raise ValueError(f"헤더 행이 없는 파일입니다: {path}")
+
+    normalized = [normalize(h) if h is not None else "" for h in header]
+    positions, missing = [], []
+    for col in columns:
+        if isinstance(col, int):
+            positions.append(col)
+        elif col in normalized:
+            positions.append(normalized.index(col))
+        else:
+            missing.append(col)
+    if missing:
+        rows.close()
+        raise KeyError(
+            f"파일에서 {missing} 컬럼을 찾지 못했습니다.\n"
+            f"원본 컬럼: {header}\n정규화 후 컬럼: {normalized}"
+        )
+
+    keys = list(columns)
+    checks = [(keys.index(col), test) for col, test in (where or {}).items()]
+    width = max(positions) + 1 if positions else 0
+    picked_header = [header[i] if i < len(header) else None for i in positions]
+
+    def picked():
+        for row in rows:
+            if is_blank_row(row):
+                continue
+            if len(row) < width:
+                row = row + [None] * (width - len(row))
+            values = tuple(row[i] for i in positions)
+            if all(test(values[i]) for i, test in checks):
+                yield values
+
+    return picked_header, picked()
+
+
+def column_sums(path: str, key_col: str, value_col: str, groups: dict, normalize=norm_header) -> dict:
+    """
+    key_col / value_col 이 모두 숫자인 행만, groups {이름: key 값 집합} 별 value_col 합계
+    예) column_sums(path, "상품코드", "총합계", {"4_5": {4, 5}, "1_4_5": {1, 4, 5}})
+    읽으면서 더하므로 파일 크기와 상관없이 메모리 일정
+    - 숫자 행이 하나도 없는 그룹은 0 (거래 없는 날) - 헤더 / 파일을 잘못 읽은 것일 수도 있어 경고만 출력
+    """
+    sums = {name: 0.0 for name in groups}
+    matched = {name: 0 for name in groups}
+    with tracing.span("read", file=os.path.basename(path), columns=2) as s:
+        _, rows = stream_columns(path, [key_col, value_col], normalize=normalize)
+        n = 0
+        for key, value in rows:
+            n += 1
+            key, value = to_float(key), to_float(value)
+            if key is None or value is None:
+                continue
+            for name, keys in groups.items():
+                if key in keys:
+                    sums[name] += value
+                    matched[name] += 1
+        s.set(rows=n)
+
+    empty = [name for name, k in matched.items() if k == 0]
+    if empty:
+        print(
+            f"⚠ {os.path.basename(path)}: '{key_col}' 가 {[sorted(groups[name]) for name in empty]} 이고 "
+            f"'{value_col}' 가 숫자인 행이 없어 0 으로 계산합니다 ({n}행 읽음)"
+        )
+    return sums
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+
+import tracing
+from config import get_state_dir
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+CHANGELOG_NAME = "changes.sqlite3"
+
+# 변경 종류
+ADDED = "added"                   # NH 신규 고객 / 삼성 신규 계약
+REMOVED = "removed"               # NH 빠진 고객 / 삼성 빠진 PLVA 계약
+NEW = "new"                       # FOK / 키움 신규
+CANCELLED = "cancelled"           # FOK / 키움 해지
+STATUS_CHANGED = "status_changed" # FOK 계약완료 → 계약해지
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    id           INTEGER PRIMARY KEY,
+    change_date  TEXT NOT NULL,   -- YYYY-MM-DD (업데이트한 날)
+    recorded_at  TEXT NOT NULL,
+    run          TEXT,            -- tracing 실행 ID
+    updater      TEXT NOT NULL,
+    broker       TEXT NOT NULL,
+    change       TEXT NOT NULL,
+    customer_key TEXT NOT NULL,   -- 계약번호 / 계좌번호 등 증권사별 고객 키
+    name         TEXT,
+    detail       TEXT             -- JSON
+);
+CREATE INDEX IF NOT EXISTS changes_date ON changes (change_date);
+CREATE INDEX IF NOT EXISTS changes_broker_date ON changes (broker, change_date);
+CREATE INDEX IF NOT EXISTS changes_customer ON changes (customer_key);
+"""
+
+# 저장이 끝나기 전까지 모아 두는 변경 (저장 실패 시 버림)
+_pending = []
+
+
+def changelog_path() -> str:
+    return os.path.join(get_state_dir(), CHANGELOG_NAME)
+
+
+def connect(path: str = None) -> sqlite3.Connection:
+    import sqlite3
+
+    conn = sqlite3.connect(path or changelog_path())
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# ===========================
+# 2. 기록
+# ===========================
+def add(updater: str, broker: str, change: str, changes):
+    """
+    변경 목록을 저장 대기열에 추가
+    changes: [(고객 키, 이름, 상세 dict 또는 None)]
+    """
+    for key, name, detail in changes:
+        _pending.append((updater, broker, change, str(key), name or "", detail))
+
+
+def pending() -> int:
+    """저장 대기 중인 변경 수 (단계 시작 시점 표시용)"""
+    return len(_pending)
+
+
+def discard(keep: int = 0):
+    """대기 중인 변경 중 앞의 keep 건만 남기고 버림 (실패한 단계가 넣은 변경만 버릴 때 keep 지정)"""
+    del _pending[keep:]
+
+
+def flush(path: str = None) -> int:
+    """대기 중인 변경을 SQLite 에 한 번에 기록 (워크북 저장이 끝난 뒤 호출)"""
+    if not _pending:
+        return 0
+
+    now = datetime.now()
+    rows = [
+        (
+            now.strftime("%Y-%m-%d"),
+            now.isoformat(timespec="seconds"),
+            tracing.run_id() or None,
+            updater, broker, change, key, name,
+            json.dumps(detail, ensure_ascii=False, default=str) if detail else None,
+        )
+        for updater, broker, change, key, name, detail in _pending
+    ]
+    conn = connect(path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO changes (change_date, recorded_at, run, updater, broker, change,"
+                " customer_key, name, detail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+    finally:
+        conn.close()
+
+    _pending.clear()
+    print(f"🗂 변경 기록 {len(rows)}건 저장: {path or changelog_path()}")
+    return len(rows)
+
+
+# ===========================
+# 3. 조회
+# ===========================
+def query(
+    since: str = None,
+    until: str = None,
+    broker: str = None,
+    change: str = None,
+    key: str = None,
+    path: str = None,
+) -> list:
+    """
+    조건에 맞는 변경 [dict] (최근 순)
+    예) 지난 분기 해지: query(since="2026-07-01", until="2026-09-30", change="cancelled")
+    """
+    where, args = [], []
+    for clause, value in (
+        ("change_date >= ?", since),
+        ("change_date <= ?", until),
+        ("broker = ?", broker),
+        ("change = ?", change),
+        ("customer_key = ?", key),
+    ):
+        if value is not None:
+            where.append(clause)
+            args.append(str(value))
+
+    sql = "SELECT * FROM changes"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY change_date DESC, id DESC"
+
+    conn = connect(path)
+    try:
+        return [dict(r) for r in conn.execute(sql, args)]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="고객 변경 기록 조회")
+    parser.add_argument("--since", help="시작일 YYYY-MM-DD")
+    parser.add_argument("--until", help="종료일 YYYY-MM-DD (기본: 오늘)", default=date.today().isoformat())
+    parser.add_argument("--broker", choices=["fok", "nh", "samsung", "kiwoom"])
+    parser.add_argument("--change", choices=[ADDED, REMOVED, NEW, CANCELLED, STATUS_CHANGED])
+    parser.add_argument("--key", help="고객 키 (계약번호 / 계좌번호)")
+    args = parser.parse_args()
+
+    for r in query(args.since, args.until, args.broker, args.change, args.key):
+        print(f"{r['change_date']}  {r['broker']:<8} {r['change']:<15} {r['customer_key']:<20} {r['name']}")
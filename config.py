@@ -1,11 +1,25 @@
 import os
-from pathlib import Path
+
+# 고객data 파일 경로 직접 지정 (있으면 OneDrive 경로들을 확인하지 않음)
+CUSTOMER_FILE_ENV = "PARKPARK_CUSTOMER_FILE"
+
+_customer_path = None   # 한 번 찾은 경로 (프로세스 안에서 재사용)
+
 
 def get_fixed_customer_path():
     """
     고객data_v101.xlsx 파일의 고정된 경로를 반환합니다.
     다양한 OneDrive 경로 구조를 지원합니다.
+    PARKPARK_CUSTOMER_FILE 환경변수가 있으면 그 경로를 그대로 사용하고,
+    찾은 경로는 기억해 두었다가 다음 호출부터 다시 확인하지 않습니다.
     """
+    global _customer_path
+    override = os.environ.get(CUSTOMER_FILE_ENV)
+    if override:
+        return override
+    if _customer_path is not None:
+        return _customer_path
+
     import getpass
     
     # 현재 사용자 이름 가져오기
@@ -31,6 +45,7 @@ def get_fixed_customer_path():
     # 가능한 경로들을 확인
     for path in possible_paths:
         if os.path.exists(path):
+            _customer_path = path
             return path
     
     # 어떤 경로도 찾지 못한 경우
@@ -43,4 +58,15 @@ def get_fixed_customer_path():
 
 def find_customer_file():
     """이전 버전과의 호환성을 위한 함수 - 이제는 고정된 경로를 사용합니다."""
-    return get_fixed_customer_path()
\ No newline at end of file
+    return get_fixed_customer_path()
+
+def get_state_dir():
+    """
+    실행 기록(매니페스트 등)을 저장할 로컬 폴더.
+    PARKPARK_STATE_DIR 환경변수가 있으면 그 경로를 사용합니다.
+    """
+    state_dir = os.environ.get("PARKPARK_STATE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".parkpark"
+    )
+    os.makedirs(state_dir, exist_ok=True)
+    return state_dir
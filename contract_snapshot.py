@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from record_store import RecordStore, compact_column
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# ===========================
+# 1. 계약번호 정리 (컬럼 단위)
+# ===========================
+def normalize_keys(values) -> pd.Series:
+    """
+    계약번호 컬럼을 한 번에 정리
+    - 앞뒤 공백 제거, 숫자로 읽힌 "1234.0" → "1234"
+    - None / NaN → ""
+    """
+    import pandas as pd
+
+    s = pd.Series(values, dtype=object)
+    text = s.astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    return text.where(s.notna(), "")
+
+
+# ===========================
+# 2. 계약 스냅샷
+# ===========================
+class ContractSnapshot(RecordStore):
+    """
+    증권사 파일 한 개를 계약번호 기준으로 정리한 스냅샷
+    - 컬럼 배열로 보관 (record_store.RecordStore, 행마다 dict 를 만들지 않음)
+    - positions 로 여러 계약번호의 위치를 한 번에 조회
+    - 같은 계약번호가 여러 행이면 값은 마지막 행, 순서는 처음 나온 위치
+    """
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, key_col: str) -> "ContractSnapshot":
+        keys = normalize_keys(df[key_col].to_numpy())
+        keys.index = df.index
+        df = df.assign(**{key_col: keys})
+        df = df[keys != ""]
+
+        first_order = df[key_col].drop_duplicates(keep="first")
+        last = df.drop_duplicates(subset=key_col, keep="last").set_index(key_col, drop=False)
+        last = last.loc[first_order.to_numpy()]
+
+        columns = {str(c): compact_column(last.iloc[:, j]) for j, c in enumerate(last.columns)}
+        return cls(first_order.tolist(), columns)
+
+    def row(self, key) -> dict:
+        """계약번호 한 건의 전체 필드 {컬럼명: 값}"""
+        return self[key].to_dict()
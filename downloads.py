@@ -0,0 +1,89 @@
+import os
+from collections import namedtuple
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+DOWNLOAD_DIR = os.path.join(os.path.expanduser("~"), "Downloads")
+HTS_DIR = os.path.join(DOWNLOAD_DIR, "hts")
+
+# 증권사 파일 종류: (폴더, 파일명 접두사, 허용 확장자)
+EXPORT_TYPES = {
+    "fok": (DOWNLOAD_DIR, "file_", (".xls",)),
+    "samsung": (DOWNLOAD_DIR, "통합 문서1", (".xls", ".xlsx")),
+    "t1": (DOWNLOAD_DIR, "자문결합계좌 실적조회", (".xls", ".xlsx")),
+    "kiwoom": (DOWNLOAD_DIR, "Excel_List_", (".xls", ".xlsx")),
+    "nh_hts": (HTS_DIR, "Excel", (".xls", ".xlsx")),
+}
+
+DownloadFile = namedtuple("DownloadFile", ["kind", "name", "path", "mtime", "size"])
+
+_inventory = None
+
+
+# ===========================
+# 2. 폴더 스캔 (폴더당 한 번)
+# ===========================
+def classify(folder: str, name: str):
+    """파일명 → 증권사 파일 종류 (해당 없으면 None)"""
+    lower = name.lower()
+    for kind, (kind_folder, prefix, exts) in EXPORT_TYPES.items():
+        if kind_folder == folder and name.startswith(prefix) and lower.endswith(exts):
+            return kind
+    return None
+
+
+def scan_inventory() -> dict:
+    """
+    다운로드 폴더들을 os.scandir 로 한 번씩만 훑어서
+    종류별 파일 목록(최신 수정시간 순)으로 분류
+    """
+    inventory = {kind: [] for kind in EXPORT_TYPES}
+    folders = sorted({folder for folder, _, _ in EXPORT_TYPES.values()})
+
+    for folder in folders:
+        try:
+            it = os.scandir(folder)
+        except FileNotFoundError:
+            continue
+
+        with it:
+            for entry in it:
+                kind = classify(folder, entry.name)
+                if kind is None or not entry.is_file():
+                    continue
+                st = entry.stat()
+                inventory[kind].append(
+                    DownloadFile(kind, entry.name, entry.path, st.st_mtime, st.st_size)
+                )
+
+    for files in inventory.values():
+        files.sort(key=lambda f: f.mtime, reverse=True)
+    return inventory
+
+
+def get_inventory(refresh: bool = False) -> dict:
+    """실행 중에는 한 번 스캔한 결과를 재사용 (refresh=True 면 다시 스캔)"""
+    global _inventory
+    if _inventory is None or refresh:
+        _inventory = scan_inventory()
+    return _inventory
+
+
+# ===========================
+# 3. 로더용 조회
+# ===========================
+def files_of(kind: str) -> list:
+    """종류별 파일 목록 (최신 순)"""
+    return get_inventory()[kind]
+
+
+def latest_file(kind: str) -> str:
+    """종류별 가장 최근 파일 경로"""
+    files = files_of(kind)
+    if not files:
+        folder, prefix, exts = EXPORT_TYPES[kind]
+        raise FileNotFoundError(
+            f"{folder} 에 '{prefix}*{'/'.join(exts)}' 파일이 없습니다."
+        )
+    return files[0].path
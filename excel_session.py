@@ -0,0 +1,73 @@
+import os
+from contextlib import contextmanager
+
+import changelog
+import sheet_cache
+import tracing
+from config import get_fixed_customer_path
+from workbook_backend import open_workbook
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+PASSWORD = "nilla17()"
+
+
+# ===========================
+# 2. 고객 파일 세션
+# ===========================
+def print_saved_path(wb):
+    """실제 저장된 위치 출력"""
+    try:
+        saved_path = wb.full_name
+        print(f"📂 실제 저장된 폴더: {os.path.dirname(saved_path)}")
+        print(f"📄 실제 저장된 파일: {saved_path}")
+    except Exception as e:
+        print("⚠ 저장 위치 확인 실패:", e)
+
+
+def save_workbook(wb):
+    """
+    저장 + 저장 위치 출력 (tracing span "save")
+    저장이 끝난 뒤에만 changelog 변경 / 데이터 시트 로컬 스냅샷(sheet_cache) 기록
+    - 저장은 이미 끝났으므로 기록 실패는 경고만 (다른 기록 / 매니페스트 기록은 그대로 진행)
+    """
+    print("💾 저장 중...")
+    with tracing.span("save"):
+        wb.save()
+    print_saved_path(wb)
+    for label, flush in (("변경 기록(changelog)", changelog.flush), ("시트 스냅샷(sheet_cache)", sheet_cache.flush)):
+        try:
+            flush()
+        except Exception as e:
+            print(f"⚠ {label} 저장 실패 (고객 파일은 저장됨): {e}")
+
+
+@contextmanager
+def open_customer_workbook(
+    path: str = None, password: str = PASSWORD, save: bool = True, backend: str = None
+):
+    """
+    고객data 파일을 한 번 열어서 워크북(workbook_backend.Book)을 넘겨준다.
+    - backend: "com"(Excel) / "openpyxl"(Excel 없음), 미지정 시 WORKBOOK_BACKEND 환경변수
+    - with 블록이 정상 종료되고 save=True 이면 저장
+    - 예외가 나면 저장하지 않고 닫기 (저장 전에 모인 changelog 변경도 버림)
+    """
+    path = path or get_fixed_customer_path()
+    changelog.discard()
+
+    print("📘 parkpark 고객 파일 여는 중...")
+    wb = open_workbook(path, password, backend)
+    sheet_cache.begin(path)
+
+    try:
+        yield wb
+
+        if save:
+            save_workbook(wb)
+    finally:
+        changelog.discard()
+        sheet_cache.discard()
+        wb.shared.clear()   # 단계끼리 넘긴 값 (프레임 등) 을 세션과 함께 정리
+        wb.close()
+        print("📁 엑셀 종료")
@@ -0,0 +1,403 @@
+"""
+Excel COM 객체 모델을 흉내 내는 메모리 전용 대체품 (Linux / 성능 점검용)
+
+- 이 스크립트들이 쓰는 부분만 구현:
+  Workbooks.Open, Worksheets(name), Cells, Range(...).Value, End(xlUp/xlToLeft),
+  UsedRange, Rows(n).Insert, ClearContents, MergeCells/MergeArea, Columns(n).NumberFormat, Save
+- 모든 COM 호출(메서드 호출 / 속성 읽기·쓰기)을 CallCounter 에 단계별로 집계
+- CallCounter.reject_next(n) 으로 "Excel 바쁨" 거절(RPC_E_CALL_REJECTED) 흉내
+- workbook_backend.ComBook.open(path, password, excel=FakeExcel(...)) 로 그대로 끼워 넣어 사용
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+
+from workbook_backend import RPC_E_CALL_REJECTED, XL_MAX_ROWS, parse_address, xlToLeft, xlUp
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+XL_MAX_COLS = 16384
+
+# 단계별 COM 호출 예산 (행 수와 무관하게 일정해야 함 → 행 단위 루프가 생기면 초과)
+COM_BUDGETS = {
+    "FokChange": 40,
+    "NhChange": 40,
+    "NH_1_Change": 40,
+    "KiwoomCount": 60,
+    "Han": 30,
+    "SamChange": 40,
+}
+
+# write_diff 로 바뀐 셀만 쓰는 시트 수 (위 고정 예산과 별도로 범위마다 Range + Value = 2회,
+# 범위는 최대 MAX_DIFF_RANGES 개 + 남은 행 지우기 1회 → 바뀐 양에 따라 늘지만 행 수와 무관한 상한)
+DIFF_SHEETS = {
+    "FokChange": 1,
+    "NhChange": 1,
+    "SamChange": 1,
+}
+
+
+def com_budget(stage: str) -> int:
+    """stage 의 COM 호출 예산 = 고정 예산 + write_diff 시트별 범위 기록 상한"""
+    from sheet_writer import MAX_DIFF_RANGES
+
+    return COM_BUDGETS[stage] + DIFF_SHEETS.get(stage, 0) * 2 * (MAX_DIFF_RANGES + 1)
+
+
+# ===========================
+# 2. 호출 집계
+# ===========================
+class FakeComError(Exception):
+    """pywintypes.com_error 와 같은 모양: (hresult, 메시지, excepinfo, argerror)"""
+
+    def __init__(self, hresult: int, message: str = "Call was rejected by callee."):
+        super().__init__(hresult - (1 << 32), message, None, None)
+        self.hresult = hresult - (1 << 32)
+
+
+class CallCounter:
+    """COM 호출 수를 단계(stage)별 / 종류별로 집계"""
+
+    def __init__(self):
+        self.stage_name = "-"
+        self.calls = defaultdict(lambda: defaultdict(int))
+        self.rejects = 0   # 남은 거절 횟수 (호출은 실행되지 않음)
+        self.reject_hresult = RPC_E_CALL_REJECTED
+
+    def reject_next(self, n: int, hresult: int = RPC_E_CALL_REJECTED):
+        """다음 n 번의 COM 호출을 Excel 이 바쁠 때처럼 거절"""
+        self.rejects = n
+        self.reject_hresult = hresult
+
+    def hit(self, kind: str):
+        self.calls[self.stage_name][kind] += 1
+        if self.rejects > 0:
+            self.rejects -= 1
+            raise FakeComError(self.reject_hresult)
+
+    @contextmanager
+    def stage(self, name: str):
+        prev = self.stage_name
+        self.stage_name = name
+        try:
+            yield self
+        finally:
+            self.stage_name = prev
+
+    def total(self, stage: str = None) -> int:
+        if stage is not None:
+            return sum(self.calls[stage].values())
+        return sum(sum(kinds.values()) for kinds in self.calls.values())
+
+    def summary(self) -> dict:
+        return {stage: dict(kinds) for stage, kinds in self.calls.items()}
+
+    def check_budget(self, stage: str, budget: int = None):
+        """stage 의 COM 호출 수가 예산을 넘으면 AssertionError"""
+        budget = com_budget(stage) if budget is None else budget
+        used = self.total(stage)
+        if used > budget:
+            detail = ", ".join(f"{k}={v}" for k, v in sorted(self.calls[stage].items()))
+            raise AssertionError(f"{stage}: COM 호출 {used}회 > 예산 {budget}회 ({detail})")
+        return used
+
+
+# ===========================
+# 3. Range / Worksheet
+# ===========================
+class FakeCollection:
+    """ws.Rows / ws.Columns / rng.Rows 처럼 호출도 되고 .Count 도 있는 객체"""
+
+    def __init__(self, counter, count: int, getter=None):
+        self._counter = counter
+        self._count = count
+        self._getter = getter
+
+    @property
+    def Count(self):
+        self._counter.hit("Count")
+        return self._count
+
+    def __call__(self, key):
+        self._counter.hit("Rows/Columns()")
+        return self._getter(key)
+
+
+class FakeRange:
+    def __init__(self, ws, r1, c1, r2, c2):
+        self.ws = ws
+        self.r1, self.c1 = min(r1, r2), min(c1, c2)
+        self.r2, self.c2 = max(r1, r2), max(c1, c2)
+
+    def _hit(self, kind):
+        self.ws.counter.hit(kind)
+
+    # ---- 위치 ----
+    @property
+    def Row(self):
+        self._hit("Row")
+        return self.r1
+
+    @property
+    def Column(self):
+        self._hit("Column")
+        return self.c1
+
+    @property
+    def Rows(self):
+        self._hit("Rows")
+        return FakeCollection(self.ws.counter, self.r2 - self.r1 + 1)
+
+    @property
+    def Columns(self):
+        self._hit("Columns")
+        return FakeCollection(self.ws.counter, self.c2 - self.c1 + 1)
+
+    def Cells(self, r, c):
+        self._hit("Cells")
+        row, col = self.r1 + r - 1, self.c1 + c - 1
+        return FakeRange(self.ws, row, col, row, col)
+
+    # ---- 값 ----
+    @property
+    def Value(self):
+        self._hit("Value.get")
+        grid = self.ws.grid
+        if self.r1 == self.r2 and self.c1 == self.c2:
+            return grid.get((self.r1, self.c1))
+        return tuple(
+            tuple(grid.get((r, c)) for c in range(self.c1, self.c2 + 1))
+            for r in range(self.r1, self.r2 + 1)
+        )
+
+    @Value.setter
+    def Value(self, value):
+        self._hit("Value.set")
+        if not isinstance(value, (tuple, list)):
+            value = [[value] * (self.c2 - self.c1 + 1)] * (self.r2 - self.r1 + 1)
+        elif value and not isinstance(value[0], (tuple, list)):
+            value = [value]  # 1-D → 한 행
+        for i, row in enumerate(value):
+            for j, v in enumerate(row):
+                self.ws.set_cell(self.r1 + i, self.c1 + j, v)
+
+    @property
+    def Text(self):
+        self._hit("Text")
+        v = self.ws.grid.get((self.r1, self.c1))
+        if isinstance(v, float) and v.is_integer():
+            return str(int(v))
+        return "" if v is None else str(v)
+
+    def ClearContents(self):
+        self._hit("ClearContents")
+        grid = self.ws.grid
+        for key in [k for k in grid if self.r1 <= k[0] <= self.r2 and self.c1 <= k[1] <= self.c2]:
+            del grid[key]
+
+    def End(self, direction):
+        self._hit("End")
+        grid = self.ws.grid
+        if direction == xlUp:
+            rows = [r for (r, c) in grid if c == self.c1 and r < self.r1]
+            row = max(rows) if rows else 1
+            return FakeRange(self.ws, row, self.c1, row, self.c1)
+        if direction == xlToLeft:
+            cols = [c for (r, c) in grid if r == self.r1 and c < self.c1]
+            col = max(cols) if cols else 1
+            return FakeRange(self.ws, self.r1, col, self.r1, col)
+        raise NotImplementedError(f"End({direction}) 미구현")
+
+    # ---- 행 삽입 / 서식 / 병합 ----
+    def Insert(self):
+        self._hit("Insert")
+        self.ws.insert_rows(self.r1, self.r2 - self.r1 + 1)
+
+    @property
+    def NumberFormat(self):
+        self._hit("NumberFormat.get")
+        return self.ws.formats.get(self.c1, "General")
+
+    @NumberFormat.setter
+    def NumberFormat(self, fmt):
+        self._hit("NumberFormat.set")
+        for c in range(self.c1, self.c2 + 1):
+            self.ws.formats[c] = fmt
+
+    @property
+    def MergeCells(self):
+        self._hit("MergeCells")
+        return self.ws.merge_area(self.r1, self.c1) is not None
+
+    @property
+    def MergeArea(self):
+        self._hit("MergeArea")
+        area = self.ws.merge_area(self.r1, self.c1)
+        return FakeRange(self.ws, *area) if area else self
+
+
+class FakeWorksheet:
+    def __init__(self, name: str, counter: CallCounter, rows=None, merged=()):
+        self._name = name
+        self.counter = counter
+        self.grid = {}
+        self.formats = {}
+        self.merged = list(merged)  # [(r1, c1, r2, c2), ...]
+        for r, row in enumerate(rows or [], start=1):
+            for c, v in enumerate(row, start=1):
+                self.set_cell(r, c, v)
+
+    # ---- 내부 (집계 안 함) ----
+    def set_cell(self, r, c, v):
+        if v is None or v == "":
+            self.grid.pop((r, c), None)
+        else:
+            self.grid[(r, c)] = v
+
+    def insert_rows(self, row, count):
+        self.grid = {
+            ((r + count) if r >= row else r, c): v for (r, c), v in self.grid.items()
+        }
+        self.merged = [
+            (r1 + count, c1, r2 + count, c2) if r1 >= row else (r1, c1, r2, c2)
+            for r1, c1, r2, c2 in self.merged
+        ]
+
+    def merge_area(self, r, c):
+        for r1, c1, r2, c2 in self.merged:
+            if r1 <= r <= r2 and c1 <= c <= c2:
+                return (r1, c1, r2, c2)
+        return None
+
+    def to_rows(self) -> list:
+        """확인용: A1 ~ 마지막 셀까지 2-D 리스트"""
+        if not self.grid:
+            return []
+        max_r = max(r for r, _ in self.grid)
+        max_c = max(c for _, c in self.grid)
+        return [[self.grid.get((r, c)) for c in range(1, max_c + 1)] for r in range(1, max_r + 1)]
+
+    # ---- COM 흉내 ----
+    @property
+    def Name(self):
+        self.counter.hit("Name")
+        return self._name
+
+    def Cells(self, r, c):
+        self.counter.hit("Cells")
+        return FakeRange(self, r, c, r, c)
+
+    def Range(self, a, b=None):
+        self.counter.hit("Range")
+        if isinstance(a, FakeRange):
+            b = b or a
+            return FakeRange(self, a.r1, a.c1, b.r2, b.c2)
+        if ":" in a:
+            a, b = a.split(":")
+        r1, c1 = parse_address(a)
+        r2, c2 = parse_address(b) if b else (r1, c1)
+        return FakeRange(self, r1, c1, r2, c2)
+
+    def _row_range(self, key):
+        if isinstance(key, str) and ":" in key:
+            r1, r2 = (int(x) for x in key.split(":"))
+        else:
+            r1 = r2 = int(key)
+        return FakeRange(self, r1, 1, r2, XL_MAX_COLS)
+
+    def _col_range(self, key):
+        return FakeRange(self, 1, int(key), XL_MAX_ROWS, int(key))
+
+    @property
+    def Rows(self):
+        self.counter.hit("Rows")
+        return FakeCollection(self.counter, XL_MAX_ROWS, self._row_range)
+
+    @property
+    def Columns(self):
+        self.counter.hit("Columns")
+        return FakeCollection(self.counter, XL_MAX_COLS, self._col_range)
+
+    @property
+    def UsedRange(self):
+        self.counter.hit("UsedRange")
+        if not self.grid:
+            return FakeRange(self, 1, 1, 1, 1)
+        rows = [r for r, _ in self.grid]
+        cols = [c for _, c in self.grid]
+        return FakeRange(self, min(rows), min(cols), max(rows), max(cols))
+
+
+# ===========================
+# 4. Workbook / Application
+# ===========================
+class FakeWorkbook:
+    def __init__(self, path: str, counter: CallCounter, sheets: dict = None):
+        """sheets: {시트명: 2-D 행 리스트}"""
+        self.path = path
+        self.counter = counter
+        self.sheets = {
+            name: FakeWorksheet(name, counter, rows) for name, rows in (sheets or {}).items()
+        }
+        self.save_count = 0
+        self.closed = False
+
+    def add_sheet(self, name: str, rows=None, merged=()) -> FakeWorksheet:
+        self.sheets[name] = FakeWorksheet(name, self.counter, rows, merged)
+        return self.sheets[name]
+
+    def Worksheets(self, name):
+        self.counter.hit("Worksheets")
+        return self.sheets[name]
+
+    @property
+    def FullName(self):
+        self.counter.hit("FullName")
+        return self.path
+
+    def Save(self):
+        self.counter.hit("Save")
+        self.save_count += 1
+
+    def Close(self, *args, **kwargs):
+        self.counter.hit("Close")
+        self.closed = True
+
+
+class FakeWorkbooks:
+    def __init__(self, app):
+        self.app = app
+
+    def Open(self, path, *args, **kwargs):
+        self.app.counter.hit("Open")
+        if path not in self.app.books:
+            raise FileNotFoundError(f"가짜 Excel 에 등록되지 않은 파일: {path}")
+        return self.app.books[path]
+
+
+class FakeExcel:
+    """DispatchEx("Excel.Application") 대체품"""
+
+    def __init__(self, counter: CallCounter = None):
+        self.counter = counter or CallCounter()
+        self.books = {}
+        self.Workbooks = FakeWorkbooks(self)
+        self.Visible = False
+        self.ScreenUpdating = False
+        self.DisplayAlerts = False
+        self.quit_count = 0
+
+    def add_workbook(self, path: str, sheets: dict = None) -> FakeWorkbook:
+        self.books[path] = FakeWorkbook(path, self.counter, sheets)
+        return self.books[path]
+
+    def Quit(self):
+        self.counter.hit("Quit")
+        self.quit_count += 1
+
+
+def open_fake_book(excel: FakeExcel, path: str, password: str = None):
+    """가짜 Excel 위에서 실제 COM 백엔드(ComBook) 그대로 열기"""
+    from workbook_backend import ComBook
+
+    return ComBook.open(path, password, excel=excel)
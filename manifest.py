@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from config import get_state_dir
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+MANIFEST_NAME = "manifest.json"
+HASH_CHUNK = 1024 * 1024
+
+
+def manifest_path() -> str:
+    return os.path.join(get_state_dir(), MANIFEST_NAME)
+
+
+# ===========================
+# 2. 입력 파일 지문
+# ===========================
+def file_fingerprint(path: str) -> dict:
+    """파일 내용 sha256 + 크기/수정시간 (내용이 같으면 다시 받아도 같은 지문)"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    st = os.stat(path)
+    return {
+        "path": path,
+        "sha256": h.hexdigest(),
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+    }
+
+
+def input_fingerprints(inputs: dict) -> dict:
+    """{역할: 경로} → {역할: 지문}"""
+    return {role: file_fingerprint(path) for role, path in inputs.items()}
+
+
+# ===========================
+# 3. 매니페스트 읽기 / 쓰기
+# ===========================
+def load_manifest() -> dict:
+    path = manifest_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠ 매니페스트를 읽지 못해 새로 시작합니다: {e}")
+        return {}
+
+
+def save_manifest(manifest: dict):
+    path = manifest_path()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_unchanged(updater: str, fingerprints: dict, manifest: dict = None) -> bool:
+    """마지막으로 처리한 입력과 내용(sha256)이 모두 같으면 True"""
+    manifest = load_manifest() if manifest is None else manifest
+    entry = manifest.get(updater)
+    if not entry or not fingerprints:
+        return False
+    last = entry.get("inputs", {})
+    if set(last) != set(fingerprints):
+        return False
+    return all(last[role].get("sha256") == fp["sha256"] for role, fp in fingerprints.items())
+
+
+def record(updater: str, fingerprints: dict, summary: dict = None):
+    """처리 완료(저장까지 끝난 뒤) 기록"""
+    manifest = load_manifest()
+    manifest[updater] = {
+        "inputs": fingerprints,
+        "processed_at": datetime.now().isoformat(timespec="seconds"),
+        "summary": summary or {},
+    }
+    save_manifest(manifest)
@@ -0,0 +1,192 @@
+import importlib
+import traceback
+from datetime import datetime
+
+import changelog
+import manifest
+import tracing
+from excel_session import open_customer_workbook, save_workbook
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+# 단계 상태
+OK = "OK "
+FAIL = "FAIL"
+SKIP = "SKIP"
+
+# 증권사 파일 미리 읽기(prepare)에 쓸 최대 프로세스 수
+PREFETCH_WORKERS = 4
+
+
+def now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ===========================
+# 2. 입력 확인 (워크북 열기 전)
+# ===========================
+def plan_steps(steps, force: bool = False):
+    """
+    steps: [(이름, 모듈)] - 모듈은 find_inputs() / run(wb, inputs) 를 가진 업데이트 모듈
+    반환: (실행할 [(이름, 모듈, 입력, 지문)], 결과 [(이름, 상태)])
+    - 지난번 처리한 입력 파일과 내용이 같으면 SKIP (force=True 면 항상 실행)
+    - 입력 파일을 못 찾으면 FAIL
+    """
+    last = manifest.load_manifest()
+    todo, results = [], []
+
+    for name, module in steps:
+        try:
+            inputs = module.find_inputs()
+            fingerprints = manifest.input_fingerprints(inputs)
+        except Exception:
+            traceback.print_exc()
+            print(f"❌ FAIL: {name} 입력 파일 확인 실패  ({now()})")
+            results.append((name, FAIL))
+            continue
+
+        if not force and manifest.is_unchanged(name, fingerprints, last):
+            print(f"⏭ SKIP: {name} (입력 파일 변경 없음, 마지막 처리 {last[name]['processed_at']})")
+            results.append((name, SKIP))
+            continue
+
+        todo.append((name, module, inputs, fingerprints))
+
+    return todo, results
+
+
+# ===========================
+# 3. 미리 읽기 (워크북 여는 동안)
+# ===========================
+def prepare_step(module_name: str, inputs: dict):
+    """별도 프로세스에서 실행: 모듈의 prepare(inputs) (워크북 없이 증권사 파일만 읽고 정리)"""
+    try:
+        with tracing.span("prepare", step=module_name, prefetch=True):
+            return importlib.import_module(module_name).prepare(inputs)
+    finally:
+        tracing.flush()   # 풀 프로세스는 계속 살아 있으므로 결과를 돌려주기 전에 기록
+
+
+def start_prefetch(todo):
+    """
+    실행할 단계들의 prepare 를 프로세스 풀에 한꺼번에 넘김
+    반환: (풀, {이름: Future}) - 풀을 못 만들면 (None, {}) → 단계 실행 때 직접 읽음
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    try:
+        pool = ProcessPoolExecutor(max_workers=min(PREFETCH_WORKERS, len(todo)))
+        futures = {
+            name: pool.submit(prepare_step, module.__name__, inputs)
+            for name, module, inputs, _ in todo
+        }
+    except (OSError, BrokenProcessPool) as e:
+        print(f"⚠ 미리 읽기 프로세스를 시작하지 못해 순서대로 읽습니다: {e}")
+        return None, {}
+    print(f"⚡ 증권사 파일 {len(futures)}개 미리 읽는 중 (워크북 여는 동안)")
+    return pool, futures
+
+
+def prepared_result(module, inputs: dict, future=None):
+    """미리 읽은 결과 (없거나 풀이 깨졌으면 지금 직접 읽기)"""
+    if future is not None:
+        from concurrent.futures.process import BrokenProcessPool
+
+        try:
+            with tracing.span("prefetch_wait"):
+                return future.result()
+        except BrokenProcessPool:
+            print("⚠ 미리 읽기 프로세스가 중단되어 직접 읽습니다.")
+    with tracing.span("prepare"):
+        return module.prepare(inputs)
+
+
+# ===========================
+# 4. 단계 실행
+# ===========================
+def run_one(name: str, module, wb, inputs: dict, future=None):
+    """
+    (성공 여부, 요약)
+    - 실패하면 이 단계가 changelog 에 넣은 변경은 버림 (시트에 반영되지 않은 변경이 기록되지 않도록)
+    """
+    print(f"\n▶ START: {name}  ({now()})")
+    logged = changelog.pending()
+    try:
+        with tracing.span("step", step=name):
+            prepared = prepared_result(module, inputs, future)
+            with tracing.span("apply"):
+                summary = module.apply(wb, prepared)
+    except Exception:
+        changelog.discard(logged)
+        traceback.print_exc()
+        print(f"❌ FAIL: {name}  ({now()})")
+        return False, None
+
+    print(f"✅ OK  : {name}  ({now()})")
+    return True, summary
+
+
+def run_steps(
+    steps,
+    backend: str = None,
+    force: bool = False,
+    stop_on_error: bool = True,
+    prefetch: bool = True,
+) -> list:
+    """
+    입력이 바뀐 단계만 고객 파일 한 번 열어서 실행 → 한 번 저장 → 매니페스트 기록
+    - 워크북에 쓰다가 실패한 단계가 하나라도 있으면 저장하지 않고 닫음 (실패 단계의 일부 기록이 남지 않도록)
+    - prefetch=True 면 고객 파일을 여는 동안 증권사 파일들을 별도 프로세스에서 미리 읽음
+    반환: [(이름, 상태)] (steps 순서)
+    """
+    tracing.start_run()
+    with tracing.span("discover", steps=len(steps)):
+        todo, results = plan_steps(steps, force)
+    failed_early = any(status == FAIL for _, status in results)
+
+    if not todo or (failed_early and stop_on_error):
+        if not todo:
+            print("⏭ 변경된 입력이 없어 고객 파일을 열지 않습니다.")
+        tracing.flush()
+        order = [name for name, _ in steps]
+        return sorted(results, key=lambda r: order.index(r[0]))
+
+    done = []  # (이름, 지문, 요약) - 저장이 끝난 뒤에만 매니페스트에 기록
+    failed_apply = False  # 워크북에 쓰다가 실패한 단계가 있는지 (입력 확인 실패는 워크북을 건드리지 않음)
+    pool, futures = start_prefetch(todo) if prefetch else (None, {})
+
+    try:
+        # 고객 파일은 한 번만 열고, 모든 단계가 같은 워크북을 사용한 뒤 마지막에 한 번 저장
+        with open_customer_workbook(save=False, backend=backend) as wb:
+            print(f"BACKEND={wb.backend}")
+            for name, module, inputs, fingerprints in todo:
+                ok, summary = run_one(name, module, wb, inputs, futures.get(name))
+                results.append((name, OK if ok else FAIL))
+                if ok:
+                    done.append((name, fingerprints, summary))
+                else:
+                    failed_apply = True
+                    if stop_on_error:
+                        break
+
+            # 실패한 단계가 중간까지 쓴 값(끼워 넣은 빈 행 등)이 저장되지 않도록 하나라도 실패하면 저장 안 함
+            # → 성공한 단계도 매니페스트에 기록하지 않으므로 다음 실행 때 다시 처리
+            if failed_apply:
+                print("⚠ 실패한 단계가 있어 저장하지 않습니다. (성공한 단계도 다음 실행 때 다시 처리)")
+                done = []
+            elif done:
+                save_workbook(wb)
+            else:
+                print("⚠ 성공한 단계가 없어 저장하지 않습니다.")
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        tracing.flush()   # 이번 실행 span 기록을 trace 파일에 한 번에
+
+    for name, fingerprints, summary in done:
+        manifest.record(name, fingerprints, summary)
+
+    order = [name for name, _ in steps]
+    return sorted(results, key=lambda r: order.index(r[0]))
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import io
+import os
+import re
+import sys
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import tracing
+from config import get_state_dir
+
+if TYPE_CHECKING:
+    import cProfile
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+PROFILE_DIR_NAME = "profiles"
+PROFILE_HELP = "cProfile + tracemalloc 으로 실행하고 결과를 ~/.parkpark/profiles/ 에 저장"
+
+TOP_N = 30                 # 시간 / 메모리 보고서에 넣을 항목 수
+SAMPLE_INTERVAL = 0.005    # 스택 샘플링 주기(초)
+TRACE_FRAMES = 10          # tracemalloc 이 할당마다 기억할 스택 깊이
+NO_STAGE = "(no stage)"    # 어떤 span 에도 속하지 않은 구간
+
+
+def profile_dir(name: str) -> str:
+    folder = os.path.join(get_state_dir(), PROFILE_DIR_NAME, f"{datetime.now():%Y%m%d_%H%M%S}_{name}")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+# ===========================
+# 2. 스택 샘플러 (단계별 collapsed stacks)
+# ===========================
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame) -> str:
+    """프레임 → "바깥;...;안쪽" (flamegraph.pl / speedscope 의 collapsed 형식)"""
+    names = []
+    while frame is not None:
+        names.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler(threading.Thread):
+    """
+    대상 스레드의 스택을 interval 마다 찍어 tracing 단계(열려 있는 span)별로 모음
+    - samples: {단계 경로: Counter(collapsed stack → 횟수)}
+    - peak_memory: {최상위 단계: 샘플 시점 tracemalloc 최대값(바이트)}
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = defaultdict(Counter)
+        self.peak_memory = defaultdict(int)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        import tracemalloc
+
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stages = tracing.current_stages() or (NO_STAGE,)
+            self.samples[stages][collapse(frame)] += 1
+            if tracemalloc.is_tracing():
+                current = tracemalloc.get_traced_memory()[0]
+                self.peak_memory[stages[0]] = max(self.peak_memory[stages[0]], current)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def write_collapsed(sampler: StackSampler, folder: str) -> list:
+    """
+    최상위 단계마다 stacks/<단계>.folded 하나 (줄 앞에 span 경로를 프레임처럼 붙임)
+    + 전체를 합친 stacks/all.folded
+    """
+    by_stage = defaultdict(list)
+    for stages, stacks in sampler.samples.items():
+        prefix = ";".join(stages)
+        for stack, n in stacks.items():
+            by_stage[stages[0]].append(f"{prefix};{stack} {n}")
+
+    stack_dir = os.path.join(folder, "stacks")
+    os.makedirs(stack_dir, exist_ok=True)
+    paths = []
+    for stage, lines in sorted(by_stage.items()):
+        path = os.path.join(stack_dir, re.sub(r"[^\w.-]+", "_", stage).strip("_") + ".folded")
+        with open(path, "a", encoding="utf-8") as f:   # 파일 이름으로 바꾸면 같아지는 단계는 이어 붙임
+            f.write("\n".join(lines) + "\n")
+        paths.append(path)
+
+    with open(os.path.join(stack_dir, "all.folded"), "w", encoding="utf-8") as f:
+        for lines in by_stage.values():
+            f.write("\n".join(lines) + "\n")
+    return sorted(set(paths))
+
+
+# ===========================
+# 3. 보고서
+# ===========================
+def write_stats(profiler: cProfile.Profile, folder: str, top: int) -> str:
+    """profile.pstats (snakeviz / pstats 로 열기) + 누적 시간 상위 top 개 텍스트"""
+    import pstats
+
+    path = os.path.join(folder, "profile.pstats")
+    profiler.dump_stats(path)
+
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(top)
+    with open(os.path.join(folder, "profile_top.txt"), "w", encoding="utf-8") as f:
+        f.write(text.getvalue())
+    return path
+
+
+def write_allocations(before, after, peak: int, sampler: StackSampler, folder: str, top: int) -> str:
+    """실행 전후 tracemalloc 스냅샷 차이 상위 top 개 (코드 줄 기준) + 단계별 최대 메모리"""
+    import tracemalloc
+
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+
+    lines = [
+        f"peak traced memory: {peak / 1024 / 1024:,.1f} MiB",
+        "",
+        "== 단계별 최대 메모리 (샘플 기준) ==",
+    ]
+    for stage, size in sorted(sampler.peak_memory.items(), key=lambda kv: -kv[1]):
+        lines.append(f"{size / 1024 / 1024:>10,.1f} MiB  {stage}")
+
+    lines += ["", f"== 실행 후 남은 할당 상위 {top} (코드 줄 기준) =="]
+    for stat in diff[:top]:
+        lines.append(str(stat))
+
+    path = os.path.join(folder, "allocations.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+# ===========================
+# 4. 실행
+# ===========================
+@contextmanager
+def profiled(name: str, enabled: bool = True, top: int = TOP_N):
+    """
+    with profiled("RunAll", enabled=args.profile):
+        main()
+    - cProfile (이 스레드) + tracemalloc + 단계별 스택 샘플링
+    - 결과 폴더: profile.pstats / profile_top.txt / allocations.txt / stacks/*.folded
+    """
+    if not enabled:
+        yield None
+        return
+
+    import cProfile
+    import tracemalloc
+
+    folder = profile_dir(name)
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(TRACE_FRAMES)
+    before = tracemalloc.take_snapshot()
+
+    sampler = StackSampler(threading.get_ident())
+    profiler = cProfile.Profile()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield folder
+    finally:
+        profiler.disable()
+        sampler.stop()
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+        write_stats(profiler, folder, top)
+        write_allocations(before, after, peak, sampler, folder, top)
+        stacks = write_collapsed(sampler, folder)
+        print(f"\n📈 프로파일 저장: {folder}")
+        print(f"   profile.pstats / profile_top.txt / allocations.txt / stacks/ ({len(stacks)}개 단계)")
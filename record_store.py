@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+# ===========================
+# 1. 컬럼 보관 방식
+# ===========================
+def compact_column(values: pd.Series):
+    """
+    컬럼 한 개를 작게 보관
+    - 정수(결측 없음) → array('q'), 실수 → array('d') (결측은 NaN)
+    - 나머지 → 리스트 (문자열은 sys.intern 으로 같은 값 한 벌만, 결측 → None)
+    """
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return values.tolist()
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return array("q", values.to_numpy(dtype=np.int64))
+    if pd.api.types.is_float_dtype(values.dtype):
+        return array("d", values.to_numpy(dtype=np.float64))
+
+    out = values.astype(object).where(values.notna(), None).tolist()
+    return [sys.intern(v) if type(v) is str else v for v in out]
+
+
+def cell(column, i):
+    """보관된 값 꺼내기 (실수 컬럼의 NaN → None)"""
+    v = column[i]
+    if type(column) is array and column.typecode == "d" and v != v:
+        return None
+    return v
+
+
+# ===========================
+# 2. 레코드 저장소
+# ===========================
+class Record:
+    """저장소 안 한 행을 가리키는 가벼운 보기 (값을 복사하지 않음)"""
+
+    __slots__ = ("store", "i")
+
+    def __init__(self, store, i: int):
+        self.store = store
+        self.i = i
+
+    def __getitem__(self, field):
+        return cell(self.store.columns[field], self.i)
+
+    def get(self, field, default=None):
+        column = self.store.columns.get(field)
+        return default if column is None else cell(column, self.i)
+
+    def to_dict(self) -> dict:
+        return {name: cell(column, self.i) for name, column in self.store.columns.items()}
+
+
+class RecordStore:
+    """
+    정리된 증권사 행 모음 (컬럼 배열 + 키 → 행 번호)
+    - 행마다 dict / Series 를 만들지 않아 수년치 파일을 함께 올려도 메모리가 작음
+    - 같은 키가 여러 번 나오면 마지막 행을 가리킴
+    """
+
+    def __init__(self, keys, columns: dict):
+        self.keys = list(keys)
+        self.columns = columns  # {컬럼명: 값 배열}
+        self.index = {k: i for i, k in enumerate(self.keys)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, keys) -> "RecordStore":
+        """df 의 각 행을 keys(행 순서대로) 로 보관"""
+        columns = {str(c): compact_column(df.iloc[:, j]) for j, c in enumerate(df.columns)}
+        return cls(keys, columns)
+
+    # ---- 조회 ----
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self.index
+
+    def __getitem__(self, key) -> Record:
+        return Record(self, self.index[key])
+
+    def get(self, key, default=None):
+        i = self.index.get(key)
+        return default if i is None else Record(self, i)
+
+    def positions(self, keys) -> np.ndarray:
+        """키 목록 → 행 번호 배열 (없으면 -1)"""
+        import numpy as np
+
+        index = self.index
+        return np.fromiter((index.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    def column(self, name: str):
+        return self.columns[name]
+
+    def at(self, i: int, name: str):
+        """행 번호 i 의 name 값"""
+        return cell(self.columns[name], i)
+
+    def value(self, key, name: str, default=None):
+        i = self.index.get(key)
+        return default if i is None else cell(self.columns[name], i)
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import pickle
+
+import tracing
+from config import get_state_dir
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+CACHE_DIR_NAME = "sheet_cache"
+CACHE_VERSION = 1
+
+# 업데이트가 끝난 뒤 내용을 로컬에 남겨 두는 시트 (다음 실행의 "이전 상태")
+CACHED_SHEETS = ("NH_DATA", "FOK_DATA", "삼성_DATA", "키움_DATA_")
+
+# 지금 열려 있는 고객 파일 (open_customer_workbook 이 begin / discard)
+_session = {"path": None, "stamp": None}
+_pending = {}      # 시트 → (영역, 행들) - 저장이 끝나면 기록
+_touched = set()   # 이번 세션에 load 한 시트 (저장 후 내용이 바뀌었을 수 있음)
+
+
+def cache_dir() -> str:
+    folder = os.path.join(get_state_dir(), CACHE_DIR_NAME)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def cache_file(sheet: str) -> str:
+    return os.path.join(cache_dir(), hashlib.sha1(sheet.encode("utf-8")).hexdigest()[:16] + ".pickle")
+
+
+def file_stamp(path: str):
+    """고객 파일 수정 표시 (크기, 수정시각 ns) - 못 읽으면 None"""
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+def same_path(a: str, b: str) -> bool:
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+# ===========================
+# 2. 세션
+# ===========================
+def begin(path: str):
+    """고객 파일을 연 직후: 이 시점의 수정 표시가 캐시 유효성 기준"""
+    _session["path"] = path
+    _session["stamp"] = file_stamp(path)
+    _pending.clear()
+    _touched.clear()
+
+
+def discard():
+    """저장하지 못하고 닫을 때: 모아 둔 스냅샷을 버림"""
+    _session["path"] = _session["stamp"] = None
+    _pending.clear()
+    _touched.clear()
+
+
+def read_entry(sheet: str):
+    try:
+        with open(cache_file(sheet), "rb") as f:
+            entry = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(entry, dict) or entry.get("version") != CACHE_VERSION:
+        return None
+    return entry
+
+
+def write_entry(sheet: str, entry: dict):
+    path = cache_file(sheet)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+# ===========================
+# 3. 읽기 / 쓰기
+# ===========================
+def load(sheet: str, region: tuple):
+    """
+    지난번 저장 직후 남긴 시트 내용 (행 리스트) - 못 쓰면 None → 호출한 쪽에서 시트를 직접 읽음
+    유효 조건: 같은 고객 파일 / 수정 표시가 그때 그대로 / 같은 영역(region) / 내용 해시 일치
+    """
+    _touched.add(sheet)
+    if _session["stamp"] is None:
+        return None
+
+    entry = read_entry(sheet)
+    if (
+        entry is None
+        or entry.get("sheet") != sheet
+        or tuple(entry.get("region", ())) != tuple(region)
+        or tuple(entry.get("stamp", ())) != _session["stamp"]
+        or not same_path(entry.get("workbook", ""), _session["path"])
+        or hashlib.sha256(entry.get("payload", b"")).hexdigest() != entry.get("digest")
+    ):
+        return None
+
+    rows = pickle.loads(entry["payload"])
+    tracing.count("cache_hits")
+    print(f"🗃 {sheet}: 이전 상태를 로컬 스냅샷에서 읽음 ({len(rows)}행)")
+    return rows
+
+
+def store(sheet: str, region: tuple, rows):
+    """업데이트 후 시트 내용 (저장이 끝나면 flush 가 기록)"""
+    _pending[sheet] = (tuple(region), [tuple(r) for r in rows])
+
+
+def flush() -> int:
+    """
+    워크북 저장 직후 호출
+    - 이번에 업데이트한 시트: 새 수정 표시로 스냅샷 기록
+    - 건드리지 않은 시트의 스냅샷: 열 때 유효했으면 새 수정 표시로 갱신
+    """
+    path, opened = _session["path"], _session["stamp"]
+    stamp = file_stamp(path) if path else None
+    if stamp is None:
+        discard()
+        return 0
+
+    with tracing.span("snapshot", sheets=len(_pending)):
+        for sheet, (region, rows) in _pending.items():
+            payload = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+            write_entry(sheet, {
+                "version": CACHE_VERSION,
+                "workbook": path,
+                "stamp": stamp,
+                "sheet": sheet,
+                "region": region,
+                "digest": hashlib.sha256(payload).hexdigest(),
+                "payload": payload,
+            })
+
+        for sheet in CACHED_SHEETS:
+            if sheet in _pending or sheet in _touched:
+                continue
+            entry = read_entry(sheet)
+            if entry and opened is not None and tuple(entry.get("stamp", ())) == opened:
+                entry["stamp"] = stamp
+                write_entry(sheet, entry)
+
+    written = len(_pending)
+    _session["stamp"] = stamp
+    _pending.clear()
+    _touched.clear()
+    return written
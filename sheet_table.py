@@ -0,0 +1,66 @@
+# ===========================
+# 1. 셀 값 → 텍스트
+# ===========================
+def value_text(v) -> str:
+    """
+    Range.Value 로 읽은 값을 화면 표시(Text)와 비슷한 문자열로
+    - None → ""
+    - 12.0 → "12" (계좌번호/NO. 등 숫자로 저장된 값)
+    """
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v).strip()
+
+
+# ===========================
+# 2. 메모리 표
+# ===========================
+class SheetTable:
+    """
+    시트 영역을 Range.Value 한 번으로 읽어 둔 메모리 표
+    행/열 번호는 시트 기준(1-based) 그대로 사용
+    """
+
+    def __init__(self, values, first_row: int, first_col: int = 1):
+        self.rows = [list(r) for r in values] if values else []
+        self.first_row = first_row
+        self.first_col = first_col
+
+    @property
+    def end_row(self) -> int:
+        return self.first_row + len(self.rows) - 1
+
+    def value(self, r: int, c: int):
+        i = r - self.first_row
+        j = c - self.first_col
+        if 0 <= i < len(self.rows) and 0 <= j < len(self.rows[i]):
+            return self.rows[i][j]
+        return None
+
+    def text(self, r: int, c: int) -> str:
+        return value_text(self.value(r, c))
+
+    def last_row(self, col: int) -> int:
+        """End(xlUp) 과 같은 의미: col 에서 값이 있는 마지막 행 (없으면 first_row)"""
+        for r in range(self.end_row, self.first_row - 1, -1):
+            if self.text(r, col):
+                return r
+        return self.first_row
+
+    def header_map(self, header_row: int) -> dict:
+        """헤더명 → 열 번호"""
+        header = {}
+        i = header_row - self.first_row
+        for j, v in enumerate(self.rows[i] if 0 <= i < len(self.rows) else []):
+            if v:
+                header[str(v).strip()] = self.first_col + j
+        return header
+
+
+def read_table(ws, first_row: int, last_col: int, first_col: int = 1) -> SheetTable:
+    """first_row ~ UsedRange 마지막 행까지 한 번에 읽기 (ws = workbook_backend.Sheet)"""
+    last_row = max(ws.used_extent()[0], first_row)
+    values = ws.read(first_row, first_col, last_row, last_col)
+    return SheetTable(values, first_row, first_col)
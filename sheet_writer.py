@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from collections import namedtuple
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import tracing
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+# 엑셀이 날짜로 바꾸지 않도록 텍스트로 강제할 컬럼
+DATE_TEXT_COLS = ("계약일자", "만료일자", "해지일자", "운용시작일자")
+
+# 한 번의 Range.Value 로 보낼 최대 행 수
+CHUNK_ROWS = 2000
+
+# 변경 범위가 이보다 많으면 (행 삭제로 아래가 전부 밀린 경우 등) 바뀐 행 구간을 블록으로 통째 기록
+MAX_DIFF_RANGES = 200
+
+# 엑셀이 날짜 문자열을 날짜로 바꿔 저장한 경우 비교용 형식
+DIFF_DATE_FMTS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d")
+
+# write_diff 결과: 바뀐 셀 수 / 기록한 범위 수 / COM 호출 수
+DiffResult = namedtuple("DiffResult", ["cells", "ranges", "com_calls"])
+
+
+# ===========================
+# 2. 공통 유틸
+# ===========================
+def dates_as_text(df: pd.DataFrame, date_cols=DATE_TEXT_COLS, date_fmt: str = None) -> pd.DataFrame:
+    """
+    날짜 컬럼을 컬럼 단위로 한 번에 문자열화
+    - 빈 값 / NaN → ""
+    - date_fmt 가 있으면 datetime 값은 그 형식으로 (예: "%Y-%m-%d")
+    - 나머지는 str(값) 에서 줄바꿈/공백만 정리
+    """
+    import pandas as pd
+
+    out = df.copy()
+    for j, col in enumerate(out.columns):
+        if str(col).strip() not in date_cols:
+            continue
+
+        s = out.iloc[:, j]
+        text = (
+            s.astype(str)
+            .str.replace("\r", "", regex=False)
+            .str.replace("\n", "", regex=False)
+            .str.strip()
+        )
+        blank = s.isna() | text.eq("")
+        if date_fmt is not None:
+            if pd.api.types.is_datetime64_any_dtype(s):
+                text = s.dt.strftime(date_fmt)
+            else:
+                is_dt = s.map(lambda v: isinstance(v, datetime)) & ~blank
+                if is_dt.any():
+                    text[is_dt] = s[is_dt].map(lambda v: v.strftime(date_fmt))
+
+        out.isetitem(j, text.where(~blank, ""))
+    return out
+
+
+def frame_to_rows(df: pd.DataFrame) -> list:
+    """DataFrame → 2-D 리스트 (NaN → "")"""
+    return df.astype(object).where(df.notna(), "").to_numpy().tolist()
+
+
+# ===========================
+# 3. 블록 쓰기
+# ===========================
+def write_block(ws, rows, start_row: int, start_col: int = 1, chunk_rows: int = CHUNK_ROWS) -> int:
+    """
+    2-D rows 를 chunk_rows 행씩 잘라 청크마다 ws.write 한 번으로 기록
+    (ws = workbook_backend.Sheet, COM 이면 Range(주소).Value 한 번)
+    반환값: 사용한 COM 호출 수 (청크당 Range 1 + Value 1)
+    """
+    if not rows:
+        return 0
+
+    n_cols = max(len(r) for r in rows)
+    com_calls = 0
+
+    with tracing.span("write_block", sheet=getattr(ws, "name", ""), rows=len(rows)):
+        for i in range(0, len(rows), chunk_rows):
+            chunk = rows[i:i + chunk_rows]
+            ws.write(
+                start_row + i,
+                start_col,
+                [tuple(r) + ("",) * (n_cols - len(r)) for r in chunk],
+            )
+            com_calls += 2
+
+    return com_calls
+
+
+def write_frame(
+    ws,
+    df: pd.DataFrame,
+    start_row: int,
+    start_col: int = 1,
+    chunk_rows: int = CHUNK_ROWS,
+    date_cols=DATE_TEXT_COLS,
+    date_fmt: str = None,
+) -> int:
+    """
+    DataFrame 을 날짜 텍스트 처리 후 블록 단위로 기록 (헤더 제외)
+    반환값: 사용한 COM 호출 수
+    """
+    if date_cols:
+        df = dates_as_text(df, date_cols, date_fmt)
+    return write_block(ws, frame_to_rows(df), start_row, start_col, chunk_rows)
+
+
+# ===========================
+# 4. 변경된 셀만 쓰기
+# ===========================
+def is_missing(v) -> bool:
+    """None / "" / NaN / NaT (NaN 과 NaT 는 자기 자신과 같지 않음 → pandas 없이 셀마다 빠르게)"""
+    try:
+        return v is None or v == "" or bool(v != v)
+    except (TypeError, ValueError):
+        return False
+
+
+def same_cell(current, target) -> bool:
+    """
+    시트에서 읽은 값(current)과 새로 쓸 값(target)이 같은지
+    - None / "" / NaN 은 모두 빈 칸
+    - "'123" 은 엑셀이 텍스트 "123" 으로 저장
+    - 숫자 셀 vs 숫자 문자열, 날짜 셀 vs 날짜 문자열은 엑셀이 변환해 저장한 값으로 비교
+    애매하면 False (한 번 더 쓰는 건 괜찮고, 빠뜨리는 건 안 됨)
+    """
+    if current is None or current == "":
+        return is_missing(target)
+    if is_missing(target):
+        return False
+
+    if isinstance(target, str):
+        if target.startswith("'"):
+            return isinstance(current, str) and current == target[1:]
+        if isinstance(current, str):
+            return current == target
+        if isinstance(current, datetime):
+            dt = current.replace(tzinfo=None)
+            return any(dt.strftime(fmt) == target for fmt in DIFF_DATE_FMTS)
+        if isinstance(current, (int, float)) and not isinstance(current, bool):
+            try:
+                return float(target.strip()) == float(current)
+            except ValueError:
+                return False
+        return False
+
+    if isinstance(target, datetime):
+        return isinstance(current, datetime) and (
+            current.replace(tzinfo=None) == target.replace(tzinfo=None)
+        )
+
+    if isinstance(current, str) or isinstance(target, bool) or isinstance(current, bool):
+        return current == target
+
+    try:
+        return float(current) == float(target)
+    except (TypeError, ValueError):
+        return current == target
+
+
+def diff_ranges(current_rows, target_rows, n_cols: int):
+    """
+    바뀐 셀을 직사각형 범위로 묶기 (0-based, 끝 포함)
+    - 행 안에서 연속으로 바뀐 열을 한 구간으로
+    - 위아래로 이어진 같은 열 구간은 한 범위로
+    반환: ([(i1, j1, i2, j2)], 바뀐 셀 수)
+    """
+    n_cur = len(current_rows)
+    ranges = []
+    open_runs = {}  # (j1, j2) → ranges 안의 index (바로 윗행까지 이어진 범위)
+    cells = 0
+
+    for i, target in enumerate(target_rows):
+        current = current_rows[i] if i < n_cur else ()
+        runs = []
+        j = 0
+        while j < n_cols:
+            cur = current[j] if j < len(current) else None
+            tgt = target[j] if j < len(target) else None
+            if same_cell(cur, tgt):
+                j += 1
+                continue
+            j1 = j
+            while j < n_cols:
+                cur = current[j] if j < len(current) else None
+                tgt = target[j] if j < len(target) else None
+                if same_cell(cur, tgt):
+                    break
+                j += 1
+            runs.append((j1, j - 1))
+            cells += j - j1
+
+        next_open = {}
+        for run in runs:
+            k = open_runs.get(run)
+            if k is not None:
+                i1, j1, _, j2 = ranges[k]
+                ranges[k] = (i1, j1, i, j2)
+            else:
+                k = len(ranges)
+                ranges.append((i, run[0], i, run[1]))
+            next_open[run] = k
+        open_runs = next_open
+
+    return ranges, cells
+
+
+def write_diff(
+    ws,
+    current_rows,
+    target_rows,
+    start_row: int,
+    start_col: int = 1,
+    n_cols: int = None,
+    max_ranges: int = MAX_DIFF_RANGES,
+) -> DiffResult:
+    """
+    current_rows(지금 시트 내용)와 target_rows(새 내용)를 비교해 바뀐 셀만 기록
+    - 바뀐 셀은 연속 범위로 묶어 범위마다 ws.write 한 번
+    - 범위가 max_ranges 보다 많으면 바뀐 첫 행 ~ 마지막 행을 write_block 으로 통째 기록
+    - target 보다 긴 current 의 나머지 행은 ws.clear 한 번
+    """
+    if n_cols is None:
+        widths = [len(r) for r in current_rows] + [len(r) for r in target_rows]
+        n_cols = max(widths) if widths else 0
+    if n_cols == 0:
+        return DiffResult(0, 0, 0)
+
+    sheet = getattr(ws, "name", "")
+    with tracing.span("diff", sheet=sheet) as s:
+        ranges, cells = diff_ranges(current_rows, target_rows, n_cols)
+        s.set(rows=len(target_rows), cells=cells, ranges=len(ranges))
+
+    def padded(i, j1, j2):
+        row = target_rows[i]
+        return [row[j] if j < len(row) else "" for j in range(j1, j2 + 1)]
+
+    with tracing.span("write", sheet=sheet) as s:
+        com_calls = 0
+        if len(ranges) > max_ranges:
+            i1 = min(r[0] for r in ranges)
+            i2 = max(r[2] for r in ranges)
+            block = [padded(i, 0, n_cols - 1) for i in range(i1, i2 + 1)]
+            com_calls += write_block(ws, block, start_row + i1, start_col)
+            n_ranges = 1
+        else:
+            for i1, j1, i2, j2 in ranges:
+                ws.write(
+                    start_row + i1,
+                    start_col + j1,
+                    [padded(i, j1, j2) for i in range(i1, i2 + 1)],
+                )
+                com_calls += 2
+            n_ranges = len(ranges)
+
+        # 줄어든 행: 남은 옛 행 중 값이 있는 행까지만 한 번에 지우기
+        stale = [
+            i for i in range(len(target_rows), len(current_rows))
+            if any(not same_cell(v, None) for v in current_rows[i])
+        ]
+        if stale:
+            ws.clear(start_row + stale[0], start_col, start_row + stale[-1], start_col + n_cols - 1)
+            cells += sum(
+                1 for i in stale for v in current_rows[i] if not same_cell(v, None)
+            )
+            com_calls += 2
+            n_ranges += 1
+
+        s.set(cells=cells, ranges=n_ranges)
+
+    return DiffResult(cells, n_ranges, com_calls)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# 저장소 루트 모듈(broker_io, sheet_writer ...)을 그대로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """실행 기록 / 캐시 / trace 는 테스트마다 임시 폴더에 (~/.parkpark 를 건드리지 않음)"""
+    state = tmp_path / "state"
+    monkeypatch.setenv("PARKPARK_STATE_DIR", str(state))
+    monkeypatch.setenv("PARKPARK_TRACE_FILE", "off")
+    monkeypatch.delenv("PARKPARK_TRACE_RUN", raising=False)
+    return state
+
+
+def write_html_export(path, rows, encoding="utf-8"):
+    """HTS 가 내보내는 것 같은 HTML 형식 .xls (첫 행은 <th>)"""
+    lines = ["<html><head><meta charset='%s'></head><body><table border=1>" % encoding]
+    for i, row in enumerate(rows):
+        tag = "th" if i == 0 else "td"
+        cells = "".join(f"<{tag}>{'' if v is None else v}</{tag}>" for v in row)
+        lines.append(f"<tr>{cells}</tr>")
+    lines.append("</table></body></html>")
+    with open(path, "w", encoding=encoding) as f:
+        f.write("\n".join(lines))
+    return str(path)
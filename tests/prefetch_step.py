@@ -0,0 +1,22 @@
+"""
+pipeline 미리 읽기(prefetch) 테스트용 업데이트 모듈
+- 풀 프로세스는 모듈 이름으로 import 하므로 테스트 함수 안이 아니라 모듈로 둠
+- prepare 결과에 읽은 프로세스 ID 를 넣어 풀에서 읽었는지 / 직접 읽었는지 구분
+"""
+import os
+
+PATH = None   # 테스트에서 입력 파일 경로 지정
+
+
+def find_inputs():
+    return {"export": PATH}
+
+
+def prepare(inputs):
+    with open(inputs["export"], encoding="utf-8") as f:
+        return f.read(), os.getpid()
+
+
+def apply(wb, prepared):
+    wb.written.append(prepared)
+    return {"rows": 1}
@@ -0,0 +1,183 @@
+import pytest
+
+from broker_io import read_broker_export, sniff_file, sniff_format
+from conftest import write_html_export
+
+ROWS = [["계약번호", "고객명", "평가금액"], ["001", "가", 1234567], ["002", "나", -5000]]
+
+
+def write_xlsx(path, rows):
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    for row in rows:
+        wb.active.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def write_xls(path, rows):
+    xlwt = pytest.importorskip("xlwt")
+    book = xlwt.Workbook()
+    sheet = book.add_sheet("Sheet1")
+    for r, row in enumerate(rows):
+        for c, v in enumerate(row):
+            sheet.write(r, c, v)
+    book.save(str(path))
+    return str(path)
+
+
+# ===========================
+# 1. 형식 판별 (확장자가 아니라 내용으로)
+# ===========================
+def test_sniff_format_magic_bytes():
+    assert sniff_format(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\0" * 8) == "xls"
+    assert sniff_format(b"PK\x03\x04rest") == "xlsx"
+    assert sniff_format(b"\xef\xbb\xbf\r\n<HTML><body><table>") == "html"
+    assert sniff_format(b"<meta charset='euc-kr'>\n<table>") == "html"
+    with pytest.raises(ValueError):
+        sniff_format(b"plain text")
+
+
+def test_sniff_file_ignores_extension(tmp_path):
+    assert sniff_file(write_xls(tmp_path / "a.xls", ROWS)) == "xls"
+    assert sniff_file(write_xlsx(tmp_path / "b.xls", ROWS)) == "xlsx"
+    assert sniff_file(write_html_export(tmp_path / "c.xls", ROWS)) == "html"
+
+
+# ===========================
+# 2. 세 형식 모두 같은 DataFrame
+# ===========================
+@pytest.mark.parametrize("writer", [write_xls, write_xlsx, write_html_export])
+def test_read_broker_export_formats(tmp_path, writer):
+    path = writer(tmp_path / "export.xls", ROWS)
+    df = read_broker_export(path, dtype={"계약번호": str})
+
+    assert list(df.columns) == ["계약번호", "고객명", "평가금액"]
+    assert df["계약번호"].tolist() == ["001", "002"]
+    assert df["평가금액"].tolist() == [1234567, -5000]
+
+
+def test_read_html_export_thousands_and_cp949(tmp_path):
+    rows = [["상품코드", "총합계"], ["4", "1,234,567"], ["5", " -2,000 "], [None, None]]
+    path = write_html_export(tmp_path / "hts.xls", rows, encoding="cp949")
+    df = read_broker_export(path)
+
+    assert df["총합계"].tolist() == [1234567, -2000]
+    assert df["상품코드"].tolist() == [4, 5]
+
+
+def test_read_html_export_without_header(tmp_path):
+    path = write_html_export(tmp_path / "t1.xls", ROWS)
+    df = read_broker_export(path, header=None)
+
+    assert df.shape == (3, 3)
+    assert df.iloc[0].tolist() == ["계약번호", "고객명", "평가금액"]
+
+
+# ===========================
+# 3. 필요한 열만 합계 (HTML 형식 잔고파일)
+# ===========================
+BALANCE = [
+    ["계좌번호", "상품코드", "총합계"],
+    ["001-1", "4", "1,234,567"],
+    ["001-2", "5", " 2,000,000 "],
+    ["001-3", "1", "100,000,000"],
+    ["001-4", "6", "999"],
+    ["합계", None, "103,235,566"],
+]
+
+
+def test_to_float_thousands_separators():
+    from broker_io import to_float
+
+    assert to_float("1,234,567") == 1234567.0
+    assert to_float(" -5,000 ") == -5000.0
+    assert to_float(12) == 12.0
+    assert to_float("합계") is None
+    assert to_float("") is None
+    assert to_float(float("nan")) is None
+
+
+def test_column_sums_html_export(tmp_path):
+    from broker_io import column_sums
+
+    path = write_html_export(tmp_path / "Excel_2.xls", BALANCE, encoding="cp949")
+    sums = column_sums(path, "상품코드", "총합계", {"4_5": {4, 5}, "1_4_5": {1, 4, 5}})
+    assert sums == {"4_5": 3234567.0, "1_4_5": 103234567.0}
+
+
+def test_column_sums_empty_group_is_zero_with_warning(tmp_path, capsys):
+    from broker_io import column_sums
+
+    rows = BALANCE[:1] + [row[:2] + ["-"] for row in BALANCE[1:]]   # 금액 칸이 전부 숫자가 아님
+    path = write_html_export(tmp_path / "Excel_2.xls", rows)
+    assert column_sums(path, "상품코드", "총합계", {"4_5": {4, 5}}) == {"4_5": 0.0}
+    assert "총합계" in capsys.readouterr().out
+
+
+def test_column_sums_quiet_day_without_group_rows(tmp_path, capsys):
+    from broker_io import column_sums
+
+    path = write_html_export(tmp_path / "Excel_2.xls", BALANCE)
+    assert column_sums(path, "상품코드", "총합계", {"9": {9}, "4_5": {4, 5}}) == {"9": 0.0, "4_5": 3234567.0}
+    assert "[9]" in capsys.readouterr().out
+
+
+def test_nh_balance_sums_from_html_export(tmp_path):
+    import NhChange
+
+    path = write_html_export(tmp_path / "Excel_2.xls", BALANCE, encoding="cp949")
+    assert NhChange.load_balance_sums(path) == pytest.approx((0.03234567, 1.03234567))
+
+
+# ===========================
+# 4. 지정한 셀만 읽기 (read_cells)
+# ===========================
+# 위 3행이 비어 있는 실적조회 파일 모양 (값은 E4 / E5)
+CELLS = [
+    [None] * 5,
+    [None] * 5,
+    [None] * 5,
+    ["기준일", "2024-01-05", None, "수익", "1,234"],
+    ["", "", "", "손실", -56.5],
+]
+
+
+def write_xlsx_blank_top(path, rows):
+    """openpyxl 은 빈 행을 기록하지 않음 → 값이 있는 셀만 제자리에"""
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    for r, row in enumerate(rows, start=1):
+        for c, v in enumerate(row, start=1):
+            if v not in (None, ""):
+                wb.active.cell(r, c, v)
+    wb.save(path)
+    return str(path)
+
+
+def write_xls_blank_top(path, rows):
+    return write_xls(path, [[("" if v is None else v) for v in row] for row in rows])
+
+
+@pytest.mark.parametrize("writer", [write_xls_blank_top, write_xlsx_blank_top, write_html_export])
+def test_read_cells_with_leading_empty_rows(tmp_path, writer):
+    from broker_io import read_cells, read_numbers
+
+    path = writer(tmp_path / "자문결합계좌 실적조회.xls", CELLS)
+    values = read_cells(path, ["D4", "B4", "A1", "C4", "Z99"])
+
+    assert values["D4"] == "수익" and values["B4"] == "2024-01-05"
+    assert values["A1"] is None and values["C4"] is None and values["Z99"] is None
+    # 숫자는 형식마다 값 / 표시 문자열이 달라도 read_numbers 로 같은 값
+    assert read_numbers(path, ["E4", "E5"]) == {"E4": 1234.0, "E5": -56.5}
+
+
+def test_read_cells_xlsx_content_with_xls_extension(tmp_path):
+    from broker_io import read_cells
+
+    path = write_xlsx_blank_top(tmp_path / "통합 문서1.xls", CELLS)   # 확장자는 .xls, 내용은 xlsx
+    assert sniff_file(path) == "xlsx"
+    assert read_cells(path, ["D4", "E5"]) == {"D4": "수익", "E5": -56.5}
+    assert read_cells(path, []) == {}
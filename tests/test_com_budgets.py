@@ -0,0 +1,54 @@
+import pytest
+
+import changelog
+from benchmarks import synthetic
+from fake_excel import COM_BUDGETS, FakeExcel, com_budget, open_fake_book
+from RunAll import STEPS
+
+BOOK_PATH = "C:/test/고객data_v101.xlsx"
+
+
+def run_all_on_fake(tmp_path, scale: int) -> FakeExcel:
+    """합성 파일 → 가짜 Excel 의 어제 상태 고객 파일에 모든 업데이트 모듈을 순서대로 적용"""
+    exports = synthetic.make_exports(scale)
+    paths = synthetic.write_exports(exports, str(tmp_path / f"n{scale}"))
+    inputs = synthetic.updater_inputs(paths)
+
+    excel = FakeExcel()
+    excel.add_workbook(BOOK_PATH, synthetic.customer_sheets(exports))
+    book = open_fake_book(excel, BOOK_PATH, "pw")
+    for name, module in STEPS:
+        with excel.counter.stage(name):
+            module.apply(book, module.prepare(inputs[name]))
+    book.save()
+    book.close()
+    changelog.discard()
+    return excel
+
+
+def test_every_step_has_a_budget():
+    assert [name for name, _ in STEPS] == list(COM_BUDGETS)
+
+
+@pytest.mark.parametrize("scale", [200, 3000])
+def test_updaters_stay_within_com_budget(tmp_path, scale):
+    """행 수가 15배가 되어도 단계별 COM 호출 수는 예산 안 (3000행에서 행 단위 COM 루프가 생기면 실패)"""
+    counter = run_all_on_fake(tmp_path, scale).counter
+    for name, _ in STEPS:
+        used = counter.check_budget(name)
+        assert used > 0, f"{name}: COM 호출이 집계되지 않음"
+
+
+def test_diff_sheets_get_range_allowance():
+    assert com_budget("Han") == COM_BUDGETS["Han"]
+    assert com_budget("FokChange") > COM_BUDGETS["FokChange"]
+    assert com_budget("FokChange") < 3000   # 행 단위 루프는 여전히 초과
+
+
+def test_check_budget_reports_overrun():
+    excel = FakeExcel()
+    with excel.counter.stage("Han"):
+        for _ in range(COM_BUDGETS["Han"] + 1):
+            excel.counter.hit("Value.get")
+    with pytest.raises(AssertionError, match="Han: COM 호출 31회 > 예산 30회"):
+        excel.counter.check_budget("Han")
@@ -0,0 +1,101 @@
+import math
+
+import pandas as pd
+
+import FokChange
+from contract_snapshot import ContractSnapshot, normalize_keys
+from FokChange import ASSET_COL, KEY_COL, NAME_COL, RET_COL, STATUS_COL
+
+NAN = float("nan")
+
+# 같은 계약번호가 여러 행 (값이 다른 중복 / 완전히 같은 중복), 결측값
+FRAME = pd.DataFrame({
+    KEY_COL: ["1001", "1002", "1001", " 1003 ", "1002", "1004.0", "1002"],
+    NAME_COL: ["홍길동", "김철수", "홍길동", "이영희", "김철수", "박민수", "김철수"],
+    ASSET_COL: [100.0, 200.0, 150.0, NAN, 250.0, 400.0, 250.0],
+    RET_COL: [0.1, 0.2, 0.15, 0.3, NAN, 0.4, NAN],
+    STATUS_COL: ["계약완료(승인)", "계약완료(승인)", "계약해지", None, "계약완료(승인)", "계약완료(승인)", "계약완료(승인)"],
+})
+
+
+def plain(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+# ===========================
+# 1. 기준: 예전 FokChange.load_broker_maps (drop_duplicates + 행마다 dict)
+# ===========================
+def to_int_if_possible(x):
+    if x is None:
+        return x
+    s = str(x).strip()
+    return int(s) if s.isdigit() else x
+
+
+def normalize_key(val) -> str:
+    if val is None:
+        return ""
+    s = str(val).strip()
+    return s[:-2] if s.endswith(".0") else s
+
+
+def baseline_rows(df) -> dict:
+    df = df.copy()
+    df[KEY_COL] = df[KEY_COL].apply(to_int_if_possible).map(normalize_key)
+    df = df[df[KEY_COL] != ""].drop_duplicates()
+    rows = {}
+    for _, row in df.iterrows():
+        rows[row[KEY_COL]] = {k: plain(v) for k, v in row.to_dict().items()}
+    return rows
+
+
+# ===========================
+# 2. ContractSnapshot
+# ===========================
+def test_normalize_keys():
+    assert normalize_keys(["1001", " 1002 ", 1003.0, "1004.0", None, NAN, "A-1"]).tolist() == [
+        "1001", "1002", "1003", "1004", "", "", "A-1",
+    ]
+
+
+def test_dedupe_matches_baseline():
+    snap = ContractSnapshot.from_frame(FRAME.drop_duplicates(), KEY_COL)
+    expected = baseline_rows(FRAME)
+
+    assert snap.keys == list(expected) == ["1001", "1002", "1003", "1004"]   # 순서는 처음 나온 위치
+    assert {k: snap.row(k) for k in snap.keys} == expected                 # 값은 마지막 행
+    assert snap.row("1001")[ASSET_COL] == 150.0 and snap.row("1001")[STATUS_COL] == "계약해지"
+
+
+def test_missing_values_read_as_none():
+    snap = ContractSnapshot.from_frame(FRAME, KEY_COL)
+    assert snap.row("1003")[ASSET_COL] is None and snap.row("1003")[STATUS_COL] is None
+    assert snap.value("1002", RET_COL) is None
+
+
+def test_blank_keys_are_dropped():
+    # 예전 코드는 결측 계약번호를 "nan" 계약으로 만들었음 - 빈 키는 계약이 아니므로 뺌
+    df = pd.concat([FRAME, pd.DataFrame({KEY_COL: [None, "", "  "], NAME_COL: ["합계", "", ""]})], ignore_index=True)
+    snap = ContractSnapshot.from_frame(df, KEY_COL)
+    assert snap.keys == ["1001", "1002", "1003", "1004"]
+    assert "" not in snap and "nan" not in snap
+
+
+def test_positions():
+    snap = ContractSnapshot.from_frame(FRAME, KEY_COL)
+    assert snap.positions(["1004", "9999", "1001", "1002"]).tolist() == [3, -1, 0, 1]
+    assert snap.positions([]).tolist() == []
+    assert snap.at(3, NAME_COL) == "박민수"
+
+
+def test_fok_snapshot_from_file_matches_baseline(tmp_path):
+    # 엑셀에서 텍스트로 읽힌 "00123" 도 예전처럼 123 과 같은 계약
+    df = pd.concat([FRAME, FRAME.iloc[[0]].assign(**{KEY_COL: "001001", ASSET_COL: 175.0})], ignore_index=True)
+    path = tmp_path / "fok.xlsx"
+    df.to_excel(path, index=False)
+
+    snap = FokChange.load_broker_snapshot(str(path))
+    expected = baseline_rows(pd.read_excel(path, dtype={KEY_COL: str}))
+    assert snap.keys == list(expected)
+    assert {k: snap.row(k) for k in snap.keys} == expected
+    assert snap.value("1001", ASSET_COL) == 175.0
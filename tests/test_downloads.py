@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+import downloads
+
+
+@pytest.fixture
+def folders(tmp_path, monkeypatch):
+    """Downloads / hts 를 임시 폴더로 바꾼 EXPORT_TYPES (스캔 결과 캐시도 비움)"""
+    dl, hts = tmp_path / "Downloads", tmp_path / "Downloads" / "hts"
+    hts.mkdir(parents=True)
+    types = {
+        kind: (str(hts) if folder == downloads.HTS_DIR else str(dl), prefix, exts)
+        for kind, (folder, prefix, exts) in downloads.EXPORT_TYPES.items()
+    }
+    monkeypatch.setattr(downloads, "EXPORT_TYPES", types)
+    monkeypatch.setattr(downloads, "_inventory", None)
+    return dl, hts
+
+
+def touch(folder, name, mtime):
+    path = folder / name
+    path.write_bytes(b"x")
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+# ===========================
+# 1. 파일명 → 종류
+# ===========================
+@pytest.mark.parametrize("name, kind", [
+    ("file_20240105.xls", "fok"),
+    ("file_20240105.XLS", "fok"),          # 확장자 대소문자 무시
+    ("file_20240105.xlsx", None),          # FOK 는 .xls 만
+    ("통합 문서1 (2).xlsx", "samsung"),
+    ("자문결합계좌 실적조회.xls", "t1"),
+    ("Excel_List_0105.xlsx", "kiwoom"),
+    ("Excel_2.xls", None),                 # NH HTS 파일은 hts 폴더에만
+    ("my_file_1.xls", None),               # 접두사는 파일명 맨 앞
+    ("file_1.csv", None),
+])
+def test_classify_download_folder(folders, name, kind):
+    dl, _ = folders
+    assert downloads.classify(str(dl), name) == kind
+
+
+def test_classify_hts_folder(folders):
+    _, hts = folders
+    assert downloads.classify(str(hts), "Excel_2.xls") == "nh_hts"
+    assert downloads.classify(str(hts), "file_1.xls") is None
+
+
+# ===========================
+# 2. 최신 파일 선택
+# ===========================
+def test_latest_file_is_newest_by_mtime(folders):
+    dl, hts = folders
+    touch(dl, "file_3.xls", 1_000)
+    newest = touch(dl, "file_1.xls", 3_000)   # 이름 순서가 아니라 수정시각 순
+    touch(dl, "file_2.xls", 2_000)
+    touch(dl, "file_9.xlsx", 9_000)           # FOK 패턴 아님
+    (dl / "file_dir.xls").mkdir()             # 폴더는 제외
+    touch(hts, "Excel_1.xls", 500)
+
+    assert downloads.latest_file("fok") == newest
+    assert [f.name for f in downloads.files_of("fok")] == ["file_1.xls", "file_2.xls", "file_3.xls"]
+    assert [f.name for f in downloads.files_of("nh_hts")] == ["Excel_1.xls"]
+
+
+def test_latest_file_missing(folders):
+    with pytest.raises(FileNotFoundError, match="Excel_List_"):
+        downloads.latest_file("kiwoom")
+
+
+def test_missing_folder_is_empty(folders):
+    dl, hts = folders
+    hts.rmdir()
+    touch(dl, "Excel_List_1.xls", 1_000)
+    assert downloads.files_of("nh_hts") == []
+    assert downloads.latest_file("kiwoom").endswith("Excel_List_1.xls")
+
+
+def test_inventory_is_scanned_once(folders):
+    dl, _ = folders
+    touch(dl, "file_1.xls", 1_000)
+    assert downloads.latest_file("fok").endswith("file_1.xls")
+
+    touch(dl, "file_2.xls", 2_000)
+    assert downloads.latest_file("fok").endswith("file_1.xls")   # 실행 중에는 처음 스캔 결과
+    downloads.get_inventory(refresh=True)
+    assert downloads.latest_file("fok").endswith("file_2.xls")
@@ -0,0 +1,71 @@
+import importlib.util
+
+import pytest
+
+import EndExcel
+import workbook_backend
+from workbook_backend import owned_excel_pids, record_excel_pid, write_owned_pids
+
+
+@pytest.fixture
+def kill(monkeypatch):
+    """terminate_process 를 PID 별 결과로 바꿔 kill_owned_excel 실행"""
+    monkeypatch.setattr(EndExcel, "stop_server", lambda: False)
+    monkeypatch.setattr(EndExcel.time, "sleep", lambda s: None)
+
+    def run(results):
+        calls = []
+
+        def terminate(pid, created):
+            calls.append((pid, created))
+            return results[pid]
+
+        monkeypatch.setattr(EndExcel, "terminate_process", terminate)
+        EndExcel.kill_owned_excel()
+        return calls
+
+    return run
+
+
+def entry(created):
+    return {"owner": "RunAll.py (pid 1)", "started": "2026-10-18T09:00:00", "created": created}
+
+
+def test_record_excel_pid_keeps_start_time(monkeypatch):
+    monkeypatch.setattr(workbook_backend, "process_start_time", lambda pid: 1000.0 + pid)
+    record_excel_pid(7)
+    assert owned_excel_pids()[7]["created"] == 1007.0
+
+
+def test_passes_recorded_start_time(kill):
+    write_owned_pids({11: entry(1234.5)})
+    assert kill({11: "terminated"}) == [(11, 1234.5)]
+
+
+def test_forgets_only_terminated_or_gone(kill):
+    write_owned_pids({1: entry(1.0), 2: entry(2.0), 3: entry(3.0), 4: entry(4.0), 5: entry(None)})
+    kill({1: "terminated", 2: "gone", 3: "reused", 4: "failed", 5: "unverified"})
+    assert sorted(owned_excel_pids()) == [4, 5]
+
+
+def test_failed_kill_is_retried_next_time(kill):
+    write_owned_pids({9: entry(9.0)})
+    kill({9: "failed"})
+    assert list(owned_excel_pids()) == [9]
+    kill({9: "terminated"})
+    assert owned_excel_pids() == {}
+
+
+def test_same_start():
+    assert workbook_backend.same_start(1000.0, 1000.0004)
+    assert not workbook_backend.same_start(1000.0, 1000.5)
+    assert not workbook_backend.same_start(None, 1000.0)
+    assert not workbook_backend.same_start(1000.0, None)
+
+
+def test_process_helpers_without_pywin32():
+    # pywin32 가 없으면 (Windows 아님) 시작 시각을 모르고 아무것도 종료하지 않음
+    if importlib.util.find_spec("win32api") is not None:
+        pytest.skip("pywin32 설치됨")
+    assert workbook_backend.process_start_time(1) is None
+    assert workbook_backend.terminate_process(1, 1.0) == "failed"
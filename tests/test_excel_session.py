@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import pytest
+
+import changelog
+import excel_session
+import sheet_cache
+
+
+def fake_book(calls):
+    return SimpleNamespace(save=lambda: calls.append("save"), full_name="C:/x/고객data_v101.xlsx")
+
+
+@pytest.mark.parametrize("broken", ["changelog", "sheet_cache"])
+def test_flush_failure_after_save_is_only_a_warning(monkeypatch, capsys, broken):
+    calls = []
+
+    def flusher(name):
+        def flush():
+            calls.append(name)
+            if name == broken:
+                raise OSError("disk full")
+        return flush
+
+    monkeypatch.setattr(changelog, "flush", flusher("changelog"))
+    monkeypatch.setattr(sheet_cache, "flush", flusher("sheet_cache"))
+
+    excel_session.save_workbook(fake_book(calls))
+
+    assert calls == ["save", "changelog", "sheet_cache"]
+    assert "disk full" in capsys.readouterr().out
+
+
+def test_save_failure_skips_flushes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(changelog, "flush", lambda: calls.append("changelog"))
+    monkeypatch.setattr(sheet_cache, "flush", lambda: calls.append("sheet_cache"))
+
+    def broken_save():
+        raise OSError("locked")
+
+    with pytest.raises(OSError):
+        excel_session.save_workbook(SimpleNamespace(save=broken_save, full_name=""))
+    assert calls == []
@@ -0,0 +1,43 @@
+import gc
+import weakref
+
+import changelog
+import NH_1_Change
+import NhChange
+from benchmarks import synthetic
+from fake_excel import FakeExcel, open_fake_book
+
+BOOK_PATH = "C:/test/고객data_v101.xlsx"
+
+
+def nh_session(tmp_path):
+    exports = synthetic.make_exports(100)
+    inputs = synthetic.updater_inputs(synthetic.write_exports(exports, str(tmp_path / "exports")))
+    excel = FakeExcel()
+    excel.add_workbook(BOOK_PATH, synthetic.customer_sheets(exports))
+    return excel, open_fake_book(excel, BOOK_PATH, "pw"), inputs["NhChange"]
+
+
+def test_frame_is_shared_only_within_the_workbook_session(tmp_path):
+    excel, book, inputs = nh_session(tmp_path)
+    NhChange.apply(book, NhChange.prepare(inputs))
+    changelog.discard()
+
+    frame = NhChange.applied_frame(book)
+    assert frame is not None and len(frame) == 100
+    assert NhChange.applied_frame(open_fake_book(excel, BOOK_PATH, "pw")) is None
+
+    NH_1_Change.apply(book)   # 시트를 다시 읽지 않고 같은 프레임 사용
+    assert excel.counter.calls["-"]["Value.get"] == 1 + 1   # NH_DATA 읽기 + NH_1 헤더 한 줄
+
+
+def test_frame_does_not_outlive_the_workbook(tmp_path):
+    _, book, inputs = nh_session(tmp_path)
+    NhChange.apply(book, NhChange.prepare(inputs))
+    changelog.discard()
+
+    frame = weakref.ref(NhChange.applied_frame(book))
+    book.close()
+    del book
+    gc.collect()
+    assert frame() is None
@@ -0,0 +1,242 @@
+import os
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+import manifest
+import pipeline
+from pipeline import FAIL, OK, SKIP
+
+
+class FakeStep:
+    """업데이트 모듈 대역: find_inputs / prepare / apply 와 호출 기록"""
+
+    def __init__(self, name, path, fail=False):
+        self.__name__ = name
+        self.path = path
+        self.fail = fail
+        self.applied = 0
+
+    def find_inputs(self):
+        return {"export": str(self.path)}
+
+    def prepare(self, inputs):
+        with open(inputs["export"], encoding="utf-8") as f:
+            return f.read()
+
+    def apply(self, wb, prepared):
+        if self.fail:
+            raise RuntimeError("apply 실패")
+        self.applied += 1
+        wb.written.append((self.__name__, prepared))
+        return {"rows": 1}
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """고객 파일 대신 메모리 워크북, 저장은 saves 에 기록"""
+    state = SimpleNamespace(saves=0, save_error=None, books=[])
+
+    @contextmanager
+    def fake_open(save=True, backend=None):
+        wb = SimpleNamespace(backend="fake", written=[])
+        state.books.append(wb)
+        yield wb
+
+    def fake_save(wb):
+        if state.save_error:
+            raise state.save_error
+        state.saves += 1
+
+    monkeypatch.setattr(pipeline, "open_customer_workbook", fake_open)
+    monkeypatch.setattr(pipeline, "save_workbook", fake_save)
+    return state
+
+
+def make_steps(tmp_path, **fail):
+    steps = []
+    for name in ("A", "B"):
+        path = tmp_path / f"{name}.xls"
+        path.write_text(f"{name} v1", encoding="utf-8")
+        steps.append((name, FakeStep(name, path, fail.get(name, False))))
+    return steps
+
+
+def run(steps, **kwargs):
+    return pipeline.run_steps(steps, prefetch=False, **kwargs)
+
+
+# ===========================
+# 1. 입력 지문으로 건너뛰기
+# ===========================
+def test_unchanged_inputs_are_skipped(tmp_path, session):
+    steps = make_steps(tmp_path)
+    assert run(steps) == [("A", OK), ("B", OK)]
+
+    assert run(steps) == [("A", SKIP), ("B", SKIP)]
+    assert [m.applied for _, m in steps] == [1, 1]
+    assert len(session.books) == 1   # 전부 건너뛰면 고객 파일을 열지 않음
+
+
+def test_changed_input_reruns_only_that_step(tmp_path, session):
+    steps = make_steps(tmp_path)
+    run(steps)
+    steps[1][1].path.write_text("B v2", encoding="utf-8")
+
+    assert run(steps) == [("A", SKIP), ("B", OK)]
+    assert session.books[-1].written == [("B", "B v2")]
+
+
+def test_force_overrides_skip(tmp_path, session):
+    steps = make_steps(tmp_path)
+    run(steps)
+
+    assert run(steps, force=True) == [("A", OK), ("B", OK)]
+    assert [m.applied for _, m in steps] == [2, 2]
+
+
+# ===========================
+# 2. 매니페스트는 저장이 끝난 뒤에만
+# ===========================
+def test_record_only_after_successful_save(tmp_path, session):
+    steps = make_steps(tmp_path)
+    session.save_error = OSError("저장 실패")
+    with pytest.raises(OSError):
+        run(steps)
+    assert manifest.load_manifest() == {}
+
+    session.save_error = None
+    assert run(steps) == [("A", OK), ("B", OK)]   # 저장 못 한 입력은 다시 처리
+    assert set(manifest.load_manifest()) == {"A", "B"}
+    assert session.saves == 1
+
+
+def test_failed_step_blocks_save_and_record(tmp_path, session):
+    steps = make_steps(tmp_path, B=True)
+    assert run(steps, stop_on_error=False) == [("A", OK), ("B", FAIL)]
+    assert session.saves == 0
+    assert manifest.load_manifest() == {}   # A 도 저장되지 않았으므로 다음에 다시 처리
+
+    steps[1][1].fail = False
+    assert run(steps) == [("A", OK), ("B", OK)]
+    assert session.saves == 1
+    assert manifest.load_manifest()["A"]["summary"] == {"rows": 1}
+
+
+def test_partial_writes_of_failed_step_are_not_saved(tmp_path, monkeypatch):
+    import openpyxl
+
+    import excel_session
+
+    path = str(tmp_path / "cust.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.title = "DATA"
+    wb.save(path)
+
+    @contextmanager
+    def open_book(save=True, backend=None):
+        with excel_session.open_customer_workbook(path, password=None, save=save, backend="openpyxl") as book:
+            yield book
+
+    class Writer(FakeStep):
+        """셀 하나를 쓰고 (fail 이면) 그다음에 실패"""
+
+        def apply(self, wb, prepared):
+            wb.sheet("DATA").write(1 if self.__name__ == "A" else 2, 1, [(prepared,)])
+            if self.fail:
+                raise RuntimeError("쓰는 중 실패")
+            return {"rows": 1}
+
+    monkeypatch.setattr(pipeline, "open_customer_workbook", open_book)
+    steps = [(name, Writer(name, m.path, m.fail)) for name, m in make_steps(tmp_path, B=True)]
+    assert run(steps, stop_on_error=False) == [("A", OK), ("B", FAIL)]
+
+    ws = openpyxl.load_workbook(path)["DATA"]
+    assert ws["A1"].value is None and ws["A2"].value is None
+
+
+def test_record_survives_changelog_failure_after_save(tmp_path, session, monkeypatch):
+    import changelog
+    import excel_session
+
+    def broken_flush():
+        raise OSError("changelog 잠김")
+
+    monkeypatch.setattr(pipeline, "save_workbook", excel_session.save_workbook)
+    monkeypatch.setattr(changelog, "flush", broken_flush)
+
+    @contextmanager
+    def fake_open(save=True, backend=None):
+        yield SimpleNamespace(backend="fake", written=[], save=lambda: None, full_name="C:/x.xlsx")
+
+    monkeypatch.setattr(pipeline, "open_customer_workbook", fake_open)
+    steps = make_steps(tmp_path)
+    assert run(steps) == [("A", OK), ("B", OK)]
+    assert set(manifest.load_manifest()) == {"A", "B"}
+
+
+# ===========================
+# 3. 실패한 단계의 changelog 변경은 버림
+# ===========================
+def test_failed_step_changelog_entries_are_dropped(tmp_path):
+    import changelog
+
+    class Logger(FakeStep):
+        def apply(self, wb, prepared):
+            changelog.add(self.__name__, "NH", changelog.ADDED, [(self.__name__ + "-1", "홍길동", None)])
+            if self.fail:
+                raise RuntimeError("쓰기 실패")
+            return {"rows": 1}
+
+    changelog.discard()
+    wb = SimpleNamespace(written=[])
+    for name, m in make_steps(tmp_path, B=True):
+        step = Logger(name, m.path, m.fail)
+        pipeline.run_one(name, step, wb, step.find_inputs())
+
+    assert changelog.pending() == 1
+    changelog.flush()
+    assert [row["customer_key"] for row in changelog.query()] == ["A-1"]
+
+
+# ===========================
+# 4. 미리 읽기 (프로세스 풀)
+# ===========================
+@pytest.fixture
+def prefetch_step(tmp_path, monkeypatch):
+    import prefetch_step
+
+    path = tmp_path / "P.xls"
+    path.write_text("P v1", encoding="utf-8")
+    monkeypatch.setattr(prefetch_step, "PATH", str(path))
+    return prefetch_step
+
+
+def test_prefetch_prepares_in_pool(session, prefetch_step):
+    assert pipeline.run_steps([("P", prefetch_step)]) == [("P", OK)]
+    [(content, pid)] = session.books[-1].written
+    assert content == "P v1" and pid != os.getpid()
+
+
+def test_prefetch_falls_back_when_pool_cannot_start(session, prefetch_step, monkeypatch, capsys):
+    import concurrent.futures
+
+    def no_pool(*args, **kwargs):
+        raise OSError("프로세스를 만들 수 없음")
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", no_pool)
+    assert pipeline.run_steps([("P", prefetch_step)]) == [("P", OK)]
+    assert session.books[-1].written == [("P v1", os.getpid())]
+    assert "순서대로 읽습니다" in capsys.readouterr().out
+
+
+def test_prepare_inline_when_pool_breaks(prefetch_step, capsys):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    future = Future()
+    future.set_exception(BrokenProcessPool("풀 중단"))
+    inputs = prefetch_step.find_inputs()
+    assert pipeline.prepared_result(prefetch_step, inputs, future) == ("P v1", os.getpid())
+    assert "직접 읽습니다" in capsys.readouterr().out
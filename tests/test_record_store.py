@@ -0,0 +1,90 @@
+import math
+from array import array
+
+import pandas as pd
+
+import KiwoomCount
+from KiwoomCount import BROKER_COL_ACCT, BROKER_COL_CONTRACT, BROKER_COL_NAME, BROKER_COL_TYPE, make_broker_key
+from record_store import RecordStore, compact_column
+
+NAN = float("nan")
+
+
+def plain(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+# ===========================
+# 1. 컬럼 보관 방식
+# ===========================
+def test_compact_column_types():
+    ints = compact_column(pd.Series([1, 2, 3]))
+    floats = compact_column(pd.Series([1.5, NAN]))
+    texts = compact_column(pd.Series(["위탁" + "종합", None, "위탁종합"], dtype=object))
+    flags = compact_column(pd.Series([True, False]))
+
+    assert type(ints) is array and ints.typecode == "q" and list(ints) == [1, 2, 3]
+    assert type(floats) is array and floats.typecode == "d"
+    assert texts[1] is None and texts[0] is texts[2]   # 같은 문자열은 한 벌만
+    assert flags == [True, False]
+
+
+def test_missing_values_read_as_none():
+    df = pd.DataFrame({"금액": [1.5, NAN], "이름": ["a", None], "날짜": [pd.Timestamp("2024-01-05"), pd.NaT]})
+    store = RecordStore.from_frame(df, ["k1", "k2"])
+
+    assert store["k2"].to_dict() == {"금액": None, "이름": None, "날짜": None}
+    assert store["k1"]["금액"] == 1.5 and store.at(1, "금액") is None
+    assert store.value("k2", "이름") is None
+    assert store["k1"].get("없는 컬럼", "기본") == "기본"
+    assert store.get("없는 키") is None and store.value("없는 키", "금액", 0) == 0
+
+
+# ===========================
+# 2. 중복 키 / positions
+# ===========================
+def test_duplicate_key_points_to_last_row():
+    df = pd.DataFrame({"금액": [1, 2, 3], "상태": ["처음", "다른 키", "마지막"]})
+    store = RecordStore.from_frame(df, ["a", "b", "a"])
+
+    assert len(store) == 3 and store.keys == ["a", "b", "a"]
+    assert store["a"].to_dict() == {"금액": 3, "상태": "마지막"}
+    assert "a" in store and "c" not in store
+
+
+def test_positions():
+    store = RecordStore.from_frame(pd.DataFrame({"v": [10, 20, 30]}), ["a", "b", "a"])
+    positions = store.positions(["b", "x", "a"])
+    assert positions.dtype == "int64"
+    assert positions.tolist() == [1, -1, 2]
+    assert store.positions([]).tolist() == []
+
+
+# ===========================
+# 3. 키움: 예전 build_broker_maps (iterrows + 키 → Series) 와 비교
+# ===========================
+def baseline_broker_maps(df):
+    broker_keys, broker_lookup = set(), {}
+    for _, r in df.iterrows():
+        k = make_broker_key(r.get(BROKER_COL_NAME), r.get(BROKER_COL_ACCT), r.get(BROKER_COL_TYPE))
+        if all(k):
+            broker_keys.add(k)
+            broker_lookup[k] = r
+    return broker_keys, broker_lookup
+
+
+def test_kiwoom_broker_maps_match_baseline():
+    df = pd.DataFrame({
+        BROKER_COL_NAME: ["홍길동", "김철수", "홍길동 ", "", "이영희"],
+        BROKER_COL_ACCT: ["123-45", "555-01", "12345", "999", "777-7"],
+        BROKER_COL_TYPE: ["위탁종합", "연금", "위탁종합", "연금", "ISA"],
+        BROKER_COL_CONTRACT: [pd.Timestamp("2024-01-02"), pd.NaT, pd.Timestamp("2024-03-04"), pd.NaT, "2024-05-06"],
+        "금액": [1.0, NAN, 3.0, 4.0, 5.0],
+    })
+    keys, lookup = KiwoomCount.build_broker_maps(df)
+    old_keys, old_lookup = baseline_broker_maps(df)
+
+    assert keys == old_keys and len(keys) == 3
+    for k, row in old_lookup.items():
+        assert lookup[k].to_dict() == {c: plain(v) if v is not pd.NaT else None for c, v in row.items()}
+    assert lookup[("홍길동", "12345", "일반")][BROKER_COL_CONTRACT] == pd.Timestamp("2024-03-04")
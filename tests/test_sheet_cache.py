@@ -0,0 +1,212 @@
+import os
+import pickle
+
+import pandas as pd
+import pytest
+
+import changelog
+import sheet_cache
+from benchmarks import synthetic
+from fake_excel import FakeExcel, FakeWorksheet, open_fake_book
+from RunAll import STEPS
+
+REGION = (2, 1, 10)
+ROWS = [("a", 1), ("b", 2.5)]
+
+
+@pytest.fixture
+def book_file(tmp_path):
+    path = tmp_path / "고객data_v101.xlsx"
+    path.write_bytes(b"v1")
+    return path
+
+
+def saved(path, rows=ROWS, region=REGION, sheet="NH_DATA"):
+    """한 세션: 열기 → store → 저장 직후 flush"""
+    sheet_cache.begin(str(path))
+    sheet_cache.load(sheet, region)
+    sheet_cache.store(sheet, region, rows)
+    return sheet_cache.flush()
+
+
+# ===========================
+# 1. 유효성 (수정 표시 / 영역 / 파일)
+# ===========================
+def test_load_returns_rows_from_last_save(book_file):
+    assert saved(book_file) == 1
+    sheet_cache.begin(str(book_file))
+    assert sheet_cache.load("NH_DATA", REGION) == ROWS
+
+
+def test_size_change_invalidates(book_file):
+    saved(book_file)
+    book_file.write_bytes(b"v1 + saved elsewhere")
+    sheet_cache.begin(str(book_file))
+    assert sheet_cache.load("NH_DATA", REGION) is None
+
+
+def test_mtime_change_with_same_size_invalidates(book_file):
+    saved(book_file)
+    st = os.stat(book_file)
+    os.utime(book_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000))
+    assert os.stat(book_file).st_size == st.st_size
+    sheet_cache.begin(str(book_file))
+    assert sheet_cache.load("NH_DATA", REGION) is None
+
+
+def test_region_or_workbook_change_invalidates(book_file, tmp_path):
+    saved(book_file)
+    sheet_cache.begin(str(book_file))
+    assert sheet_cache.load("NH_DATA", (2, 1, 11)) is None
+
+    other = tmp_path / "다른파일.xlsx"
+    other.write_bytes(b"v1")
+    os.utime(other, ns=(0, os.stat(book_file).st_mtime_ns))
+    sheet_cache.begin(str(other))
+    assert sheet_cache.load("NH_DATA", REGION) is None
+
+
+def test_corrupt_entry_is_ignored(book_file):
+    saved(book_file)
+    with open(sheet_cache.cache_file("NH_DATA"), "r+b") as f:
+        f.seek(-8, os.SEEK_END)
+        f.write(b"\0" * 8)
+    sheet_cache.begin(str(book_file))
+    assert sheet_cache.load("NH_DATA", REGION) is None
+
+
+def test_flush_refreshes_untouched_sheets(book_file):
+    saved(book_file, sheet="FOK_DATA")
+    sheet_cache.begin(str(book_file))       # 다음 실행: NH_DATA 만 바꿔 저장
+    sheet_cache.store("NH_DATA", REGION, ROWS)
+    book_file.write_bytes(b"v2 saved")
+    sheet_cache.flush()
+
+    sheet_cache.begin(str(book_file))
+    assert sheet_cache.load("FOK_DATA", REGION) == ROWS
+
+
+# ===========================
+# 2. 저장 실패 → discard
+# ===========================
+def test_discard_drops_pending_snapshot(book_file):
+    sheet_cache.begin(str(book_file))
+    sheet_cache.store("NH_DATA", REGION, ROWS)
+    sheet_cache.discard()
+    assert sheet_cache.flush() == 0
+    assert not os.path.exists(sheet_cache.cache_file("NH_DATA"))
+
+
+def test_failed_session_does_not_write_snapshot(tmp_path, monkeypatch):
+    import openpyxl
+
+    import excel_session
+
+    path = str(tmp_path / "cust.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.title = "NH_DATA"
+    wb.save(path)
+
+    with pytest.raises(RuntimeError):
+        with excel_session.open_customer_workbook(path, password=None, backend="openpyxl"):
+            sheet_cache.store("NH_DATA", REGION, ROWS)
+            raise RuntimeError("단계 실패")
+    assert not os.path.exists(sheet_cache.cache_file("NH_DATA"))
+    assert sheet_cache.flush() == 0
+
+
+# ===========================
+# 3. 캐시를 쓴 실행 == 시트를 직접 읽은 실행
+# ===========================
+@pytest.fixture
+def excel_coercion(monkeypatch):
+    """Range.Value 로 쓴 문자열을 엑셀처럼 변환해 저장 ("'123" → "123", "00123" → 123.0, 날짜 → datetime)"""
+    original = FakeWorksheet.set_cell
+
+    def set_cell(self, r, c, v):
+        if self.formats.get(c) != "@":
+            v = synthetic.excel_stored(v)
+        original(self, r, c, v)
+
+    monkeypatch.setattr(FakeWorksheet, "set_cell", set_cell)
+
+
+def next_day(exports: dict, seed: int = 99) -> dict:
+    """하루 뒤 내보내기: 일부 행 해지(삭제) + 신규 행 + 금액 변경"""
+    fresh = synthetic.make_exports(len(exports["fok"]), seed)
+    out = {}
+    for kind, df in exports.items():
+        if kind == "t1":
+            out[kind] = fresh[kind]
+            continue
+        kept = df.drop(df.index[3::17])
+        out[kind] = pd.concat([kept, fresh[kind].head(5)], ignore_index=True)
+    out["fok"].loc[::7, "계좌자산"] += 12345
+    out["nh_balance"].loc[::5, "총합계"] += 1000
+    return out
+
+
+def run_day(excel, book_path, inputs):
+    sheet_cache.begin(book_path)
+    book = open_fake_book(excel, book_path, "pw")
+    for name, module in STEPS:
+        module.apply(book, module.prepare(inputs[name]))
+    book.save()
+    with open(book_path, "ab") as f:   # 엑셀 저장처럼 파일 수정 표시가 바뀜
+        f.write(b".")
+    sheet_cache.flush()
+    changelog.discard()
+    book.close()
+
+
+def two_days(tmp_path, state, use_cache: bool, monkeypatch):
+    monkeypatch.setenv("PARKPARK_STATE_DIR", str(state))
+    hits = []
+    load = sheet_cache.load
+
+    def counting_load(sheet, region):
+        rows = load(sheet, region)
+        if rows is not None:
+            hits.append(sheet)
+        return rows
+
+    monkeypatch.setattr(sheet_cache, "load", counting_load)
+
+    day1 = synthetic.make_exports(300)
+    day2 = next_day(day1)
+    book_path = str(tmp_path / f"고객data_{use_cache}.xlsx")
+    with open(book_path, "wb") as f:
+        f.write(b"book")
+
+    excel = FakeExcel()
+    fake_book = excel.add_workbook(book_path, synthetic.customer_sheets(day1))
+    fake_book.sheets["키움_DATA_"].merged.append((1, 1, 1, 3))
+
+    for n, exports in enumerate((day1, day2)):
+        paths = synthetic.write_exports(exports, str(tmp_path / f"day{n}_{use_cache}"))
+        if n == 1 and not use_cache:
+            for sheet in sheet_cache.CACHED_SHEETS:
+                if os.path.exists(sheet_cache.cache_file(sheet)):
+                    os.remove(sheet_cache.cache_file(sheet))
+        run_day(excel, book_path, synthetic.updater_inputs(paths))
+        if n == 0:
+            hits.clear()
+
+    return {name: ws.to_rows() for name, ws in fake_book.sheets.items()}, hits
+
+
+@pytest.mark.parametrize("coerce", [False, True])
+def test_cached_run_matches_uncached_run(tmp_path, monkeypatch, request, coerce):
+    if coerce:
+        request.getfixturevalue("excel_coercion")
+
+    cached, hits = two_days(tmp_path, tmp_path / "s1", True, monkeypatch)
+    direct, no_hits = two_days(tmp_path, tmp_path / "s2", False, monkeypatch)
+
+    assert sorted(hits) == sorted(sheet_cache.CACHED_SHEETS)
+    assert no_hits == []
+    for name in cached:
+        assert cached[name] == direct[name], name
+    if coerce:   # 스냅샷(쓴 값)과 시트(엑셀이 변환해 저장한 값)가 실제로 달랐던 경우
+        entry = sheet_cache.read_entry("삼성_DATA")
+        assert any(isinstance(v, str) and v.startswith("'") for row in pickle.loads(entry["payload"]) for v in row)
@@ -0,0 +1,155 @@
+from datetime import datetime
+
+import pytest
+
+from fake_excel import CallCounter, FakeWorksheet
+from sheet_writer import diff_ranges, same_cell, write_diff
+from workbook_backend import ComSheet
+
+NAN = float("nan")
+
+
+def com_sheet(rows):
+    ws = FakeWorksheet("DATA", CallCounter(), rows)
+    return ComSheet(ws), ws
+
+
+def writes(ws) -> int:
+    return ws.counter.calls["-"]["Value.set"]
+
+
+# ===========================
+# 1. same_cell
+# ===========================
+@pytest.mark.parametrize("current, target", [
+    (None, None), (None, ""), ("", NAN), (None, NAN),
+])
+def test_same_cell_blank_forms(current, target):
+    assert same_cell(current, target)
+
+
+def test_same_cell_blank_vs_value():
+    assert not same_cell(None, 0)
+    assert not same_cell(0, None)
+    assert not same_cell(0.0, NAN)
+
+
+def test_same_cell_numbers():
+    assert same_cell(5, 5.0)
+    assert same_cell(5.0, 5)
+    assert same_cell(123.0, "123")      # 엑셀이 숫자 문자열을 숫자로 저장
+    assert same_cell(1234.5, " 1234.5 ")
+    assert not same_cell(5, 5.5)
+    assert not same_cell(5.0, "5.5")
+    assert not same_cell(5.0, "abc")
+
+
+def test_same_cell_text_prefix():
+    assert same_cell("00123", "'00123")
+    assert not same_cell(123.0, "'00123")
+    assert not same_cell("0123", "'00123")
+
+
+def test_same_cell_date_text():
+    stored = datetime(2024, 1, 5)
+    for text in ("2024-01-05", "2024/01/05", "2024.01.05"):
+        assert same_cell(stored, text)
+    assert not same_cell(stored, "2024-01-06")
+    assert same_cell(stored, datetime(2024, 1, 5))
+    assert not same_cell("2024-01-05", datetime(2024, 1, 5))
+
+
+# ===========================
+# 2. diff_ranges
+# ===========================
+def test_diff_ranges_identical():
+    rows = [[1, "a", None], [2, "b", 3.5]]
+    assert diff_ranges(rows, [list(r) for r in rows], 3) == ([], 0)
+
+
+def test_diff_ranges_merges_vertical_runs():
+    current = [[1, 2, 3], [1, 2, 3], [1, 2, 3]]
+    target = [[1, 9, 9], [1, 9, 9], [1, 2, 3]]
+    assert diff_ranges(current, target, 3) == ([(0, 1, 1, 2)], 4)
+
+
+def test_diff_ranges_separate_runs_in_a_row():
+    assert diff_ranges([[1, 2, 3]], [[9, 2, 9]], 3) == ([(0, 0, 0, 0), (0, 2, 0, 2)], 2)
+
+
+def test_diff_ranges_new_rows():
+    ranges, cells = diff_ranges([[1, 2]], [[1, 2], [3, 4], [5, None]], 2)
+    assert ranges == [(1, 0, 1, 1), (2, 0, 2, 0)]
+    assert cells == 3
+
+
+# ===========================
+# 3. write_diff (가짜 Excel 시트)
+# ===========================
+def test_write_diff_writes_only_changed_cells():
+    sheet, ws = com_sheet([[1, "a"], [2, "b"], [3, "c"]])
+    target = [[1, "a"], [2, "B"], [3, "c"]]
+
+    result = write_diff(sheet, sheet.read(1, 1, 3, 2), target, start_row=1)
+
+    assert (result.cells, result.ranges) == (1, 1)
+    assert writes(ws) == 1
+    assert ws.to_rows() == target
+
+
+def test_write_diff_skips_equivalent_values():
+    stored = [[5.0, datetime(2024, 1, 5), "00123", None]]
+    sheet, ws = com_sheet(stored)
+    target = [[5, "2024-01-05", "'00123", NAN]]
+
+    result = write_diff(sheet, sheet.read(1, 1, 1, 4), target, start_row=1, n_cols=4)
+
+    assert (result.cells, result.ranges, result.com_calls) == (0, 0, 0)
+    assert writes(ws) == 0
+
+
+def test_write_diff_clears_stale_trailing_rows():
+    sheet, ws = com_sheet([["h1", "h2"], [1, 2], [3, 4], [5, 6], [7, 8]])
+    current = sheet.read(2, 1, 5, 2)
+
+    result = write_diff(sheet, current, [[1, 2], [3, 9]], start_row=2)
+
+    assert ws.to_rows() == [["h1", "h2"], [1, 2], [3, 9]]
+    assert result.cells == 1 + 4          # 바뀐 셀 1 + 지운 셀 4
+    assert result.ranges == 2             # 쓰기 1 + 지우기 1
+    assert ws.counter.calls["-"]["ClearContents"] == 1
+
+
+def test_write_diff_stale_blank_rows_are_not_cleared():
+    sheet, ws = com_sheet([[1], [2]])
+    current = [[1], [2], [None], [""]]   # 읽은 범위가 실제 데이터보다 긴 경우
+
+    result = write_diff(sheet, current, [[1], [2]], start_row=1)
+
+    assert result == (0, 0, 0)
+    assert ws.counter.calls["-"]["ClearContents"] == 0
+
+
+def test_write_diff_falls_back_to_block_when_too_many_ranges():
+    current = [[i, i] for i in range(10)]
+    sheet, ws = com_sheet(current)
+    target = [[i, i + 100 if i % 2 else i] for i in range(10)]   # 흩어진 변경 5곳
+
+    result = write_diff(sheet, current, target, start_row=1, max_ranges=3)
+
+    assert result.ranges == 1
+    assert result.cells == 5
+    assert writes(ws) == 1               # 바뀐 첫 행 ~ 마지막 행을 한 번에
+    assert ws.to_rows() == target
+
+
+def test_write_diff_within_limit_writes_each_range():
+    current = [[i, i] for i in range(10)]
+    sheet, ws = com_sheet(current)
+    target = [[i, i + 100 if i % 2 else i] for i in range(10)]
+
+    result = write_diff(sheet, current, target, start_row=1, max_ranges=5)
+
+    assert result.ranges == 5
+    assert writes(ws) == 5
+    assert ws.to_rows() == target
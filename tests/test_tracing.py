@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(tracing.TRACE_FILE_ENV, str(path))
+    tracing._pending.clear()
+    tracing.start_run()
+    yield path
+    tracing._pending.clear()
+
+
+def lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_spans_are_buffered_until_flush(trace_file):
+    with tracing.span("outer"):
+        for i in range(3):
+            with tracing.span("inner", sheet=str(i)):
+                pass
+    assert not trace_file.exists()
+
+    tracing.flush()
+    assert [r["span"] for r in lines(trace_file)] == ["inner"] * 3 + ["outer"]
+    tracing.flush()   # 두 번째 flush 는 쓸 것이 없음
+    assert len(lines(trace_file)) == 4
+
+
+def test_flush_when_buffer_is_full(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "FLUSH_LINES", 2)
+    for _ in range(3):
+        with tracing.span("step"):
+            pass
+    assert len(lines(trace_file)) == 2
+    assert len(tracing._pending) == 1
+
+
+def test_rotate_caps_trace_file(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_MAX_BYTES", 600)
+    for _ in range(10):
+        with tracing.span("step", file="x" * 50):
+            pass
+        tracing.flush()
+
+    old = trace_file.with_name("trace.jsonl.1")
+    assert old.exists()
+    assert trace_file.stat().st_size <= 600
+    assert len(lines(old)) + len(lines(trace_file)) < 10   # 두 번 넘게 밀린 기록은 버림
+
+
+def test_load_run_reads_only_this_run_across_rotation(trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_MAX_BYTES", 800)   # 3~4 줄
+    old_run = tracing.run_id()
+    with tracing.span("old"):
+        pass
+    tracing.start_run()   # 이전 실행 기록은 여기서 파일에
+    for i in range(4):
+        with tracing.span("step", sheet=str(i)):
+            pass
+        tracing.flush()
+
+    assert trace_file.with_name("trace.jsonl.1").exists()
+    records = tracing.load_run()
+    assert [r["attrs"]["sheet"] for r in records] == ["0", "1", "2", "3"]
+    assert tracing.load_run(old_run)[0]["span"] == "old"
+
+
+def test_trace_off_drops_records(tmp_path, monkeypatch):
+    monkeypatch.setenv(tracing.TRACE_FILE_ENV, "off")
+    with tracing.span("step"):
+        pass
+    tracing.flush()
+    assert tracing._pending == []
+    assert not list(tmp_path.rglob("trace*"))
@@ -0,0 +1,17 @@
+import watcher
+from RunAll import STEPS
+
+
+def test_run_updaters_follows_step_order(monkeypatch):
+    calls = []
+    monkeypatch.setattr(watcher, "run_steps", lambda steps: calls.append(steps) or [])
+
+    assert watcher.run_updaters({"samsung", "nh_hts", "fok", "kiwoom", "t1"})
+    names = [name for name, _ in calls[0]]
+    assert names == [name for name, _ in STEPS]
+
+
+def test_every_watched_updater_is_a_step():
+    step_names = {name for name, _ in STEPS}
+    for names in watcher.WATCH_UPDATERS.values():
+        assert set(names) <= step_names
@@ -0,0 +1,171 @@
+import pytest
+
+import tracing
+import workbook_backend
+from fake_excel import CallCounter, FakeComError, FakeWorksheet
+from sheet_writer import write_diff
+from workbook_backend import (
+    RETRY_FIRST_DELAY,
+    RETRY_MAX_DELAY,
+    RPC_E_CALL_REJECTED,
+    RPC_E_SERVERCALL_RETRYLATER,
+    VBA_E_IGNORE,
+    ComSheet,
+    OpenpyxlBook,
+    call_with_retry,
+)
+
+
+def make_book(tmp_path):
+    import openpyxl
+
+    path = str(tmp_path / "cust.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.title = "DATA"
+    wb.save(path)
+    return OpenpyxlBook.open(path)
+
+
+# ===========================
+# 1. openpyxl: COM 의 "'" 텍스트 접두어
+# ===========================
+def test_openpyxl_quote_prefix_is_not_stored_in_value(tmp_path):
+    book = make_book(tmp_path)
+    ws = book.sheet("DATA")
+    ws.write(1, 1, [("'00123", "'2024-01-05", 7)])
+    book.save()
+
+    book = OpenpyxlBook.open(book.path)
+    cells = book.sheet("DATA").ws[1]
+    assert [c.value for c in cells[:3]] == ["00123", "2024-01-05", 7]
+    assert [c.quotePrefix for c in cells[:3]] == [True, True, False]
+
+
+def test_openpyxl_plain_value_clears_quote_prefix(tmp_path):
+    ws = make_book(tmp_path).sheet("DATA")
+    ws.write(1, 1, [("'1",)])
+    ws.write(1, 1, [("1",)])
+    cell = ws.ws["A1"]
+    assert cell.value == "1" and not cell.quotePrefix
+
+
+def test_openpyxl_prefixed_cells_are_unchanged_on_next_diff(tmp_path):
+    ws = make_book(tmp_path).sheet("DATA")
+    target = [["'001", "홍길동", 10], ["'002", "김철수", 20]]
+    first = write_diff(ws, [], target, start_row=2)
+    assert first.cells == 6
+
+    again = write_diff(ws, ws.read(2, 1, 3, 3), target, start_row=2)
+    assert again.cells == 0 and again.ranges == 0
+
+
+# ===========================
+# 2. COM 재시도 (가짜 시계)
+# ===========================
+class FakeClock:
+    """sleep 하면 시계만 앞으로 - 기다린 시간을 기록"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Busy:
+    """처음 n 번은 Excel 이 바쁘다고 거절, 그다음엔 "ok" (호출마다 took 초 걸림)"""
+
+    def __init__(self, clock, n, hresult=RPC_E_CALL_REJECTED, took=0.0):
+        self.clock = clock
+        self.left = n
+        self.hresult = hresult
+        self.took = took
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.clock.now += self.took
+        if self.left > 0:
+            self.left -= 1
+            raise FakeComError(self.hresult)
+        return "ok"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(workbook_backend.random, "uniform", lambda a, b: b)   # 지터 없이 상한만큼
+    return FakeClock()
+
+
+def retry(fn, clock, **kwargs):
+    with tracing.span("test") as s:
+        try:
+            return call_with_retry(fn, sleep=clock.sleep, clock=clock, **kwargs), s.counts
+        except FakeComError:
+            return "gave up", s.counts
+
+
+def backoff(n):
+    return [min(RETRY_MAX_DELAY, RETRY_FIRST_DELAY * 2 ** i) for i in range(n)]
+
+
+@pytest.mark.parametrize("hresult", [RPC_E_CALL_REJECTED, RPC_E_SERVERCALL_RETRYLATER, VBA_E_IGNORE])
+def test_retry_until_excel_accepts(clock, hresult):
+    fn = Busy(clock, 2, hresult)
+    result, counts = retry(fn, clock)
+    assert result == "ok" and fn.calls == 3
+    assert clock.sleeps == backoff(2)
+    assert counts == {"com_retries": 2, "com_wait_ms": 150}
+
+
+def test_backoff_doubles_up_to_max_delay(clock):
+    fn = Busy(clock, 10)
+    assert retry(fn, clock, budget=1000)[0] == "ok"
+    assert clock.sleeps == backoff(10)
+    assert clock.sleeps[-1] == RETRY_MAX_DELAY
+
+
+def test_gives_up_before_budget_is_exceeded(clock, capsys):
+    fn = Busy(clock, 100)
+    result, counts = retry(fn, clock, budget=1.0)
+    assert result == "gave up"
+    assert clock.sleeps == [0.05, 0.1, 0.2, 0.4]   # 다음 0.8 을 기다리면 1초를 넘음
+    assert fn.calls == 5
+    assert counts["com_gave_up"] == 1 and counts["com_retries"] == 4
+    assert "4회 재시도 후 중단" in capsys.readouterr().out
+
+
+def test_budget_counts_time_spent_in_calls(clock):
+    fn = Busy(clock, 100, took=0.6)
+    assert retry(fn, clock, budget=1.0)[0] == "gave up"
+    assert clock.sleeps == [0.05] and fn.calls == 2
+
+
+def test_other_com_errors_are_not_retried(clock):
+    def fail():
+        raise FakeComError(0x800A03EC, "Exception occurred.")
+
+    with pytest.raises(FakeComError):
+        call_with_retry(fail, sleep=clock.sleep, clock=clock)
+    assert clock.sleeps == []
+
+
+def test_jitter_stays_under_backoff_cap():
+    clock = FakeClock()
+    workbook_backend.random.seed(1)
+    assert call_with_retry(Busy(clock, 8), sleep=clock.sleep, clock=clock) == "ok"
+    assert all(0 <= d <= cap for d, cap in zip(clock.sleeps, backoff(8)))
+
+
+def test_com_sheet_read_retries_rejected_calls(monkeypatch):
+    monkeypatch.setattr(workbook_backend.random, "uniform", lambda a, b: 0.0)
+    counter = CallCounter()
+    sheet = ComSheet(FakeWorksheet("DATA", counter, [[1, 2]]))
+    counter.reject_next(2)
+    assert sheet.read(1, 1, 1, 2) == [[1, 2]]
+    assert counter.rejects == 0
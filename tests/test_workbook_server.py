@@ -0,0 +1,100 @@
+import threading
+import time
+
+import openpyxl
+import pytest
+
+import workbook_server
+from workbook_server import RemoteBook, load_state, server_status, stop_server
+
+
+def make_book(path, value="원본"):
+    wb = openpyxl.Workbook()
+    wb.active.title = "DATA"
+    wb.active["A1"] = value
+    wb.save(path)
+
+
+def cell(path, addr="A1"):
+    return openpyxl.load_workbook(path)["DATA"][addr].value
+
+
+@pytest.fixture
+def server(tmp_path):
+    """openpyxl 백엔드 세션 서버를 스레드로 띄움 → 고객 파일 경로"""
+    path = str(tmp_path / "cust.xlsx")
+    make_book(path)
+    thread = threading.Thread(
+        target=workbook_server.serve, args=(path,), kwargs={"password": None, "backend": "openpyxl"}, daemon=True
+    )
+    thread.start()
+    deadline = time.monotonic() + 10
+    while load_state() is None:
+        assert time.monotonic() < deadline, "세션 서버가 시작되지 않음"
+        time.sleep(0.01)
+    yield path
+    stop_server()
+    thread.join(10)
+
+
+def test_queued_writes_are_applied_at_save(server):
+    book = RemoteBook.open(server)
+    ws = book.sheet("DATA")
+    ws.write(1, 1, [["새 값", 1]])
+    ws.write(2, 1, [["둘째 줄"]])
+    assert len(book._queue) == 2   # 결과가 필요 없는 호출은 아직 보내지 않음
+
+    book.save()
+    book.close()
+    assert cell(server) == "새 값" and cell(server, "B1") == 1 and cell(server, "A2") == "둘째 줄"
+
+
+def test_unsaved_writes_are_discarded_on_release(server):
+    book = RemoteBook.open(server)
+    ws = book.sheet("DATA")
+    ws.write(1, 1, [["저장 안 함"]])
+    assert ws.read(1, 1, 1, 1) == [["저장 안 함"]]   # 읽기 때 서버로 전송됨
+    book.close()
+
+    book = RemoteBook.open(server)
+    assert book.sheet("DATA").read(1, 1, 1, 1) == [["원본"]]
+    book.close()
+    assert cell(server) == "원본"
+    assert server_status()["reopened"] == 1
+
+
+def test_reopen_discards_unsaved_writes(server):
+    book = RemoteBook.open(server)
+    ws = book.sheet("DATA")
+    ws.write(1, 1, [["보낸 쓰기"]])
+    ws.read(1, 1, 1, 1)
+    ws.write(2, 1, [["보내지 않은 쓰기"]])
+
+    book.reopen()
+    assert ws.read(1, 1, 2, 1) == [["원본"], [None]]
+    book.close()
+
+
+def test_reopens_when_file_changed_on_disk(server):
+    book = RemoteBook.open(server)
+    assert book.sheet("DATA").read(1, 1, 1, 1) == [["원본"]]
+    book.close()
+
+    make_book(server, "다른 곳에서 바꿈")
+    book = RemoteBook.open(server)
+    assert book.sheet("DATA").read(1, 1, 1, 1) == [["다른 곳에서 바꿈"]]
+    book.close()
+    assert server_status()["reopened"] == 1
+
+
+def test_stop_server(server):
+    assert server_status()["path"] == server
+    assert stop_server()
+    deadline = time.monotonic() + 10
+    while load_state() is not None:
+        assert time.monotonic() < deadline, "세션 서버가 종료되지 않음"
+        time.sleep(0.01)
+    assert server_status() is None
+    assert not stop_server()
+    with pytest.raises(ConnectionError):
+        RemoteBook.open(server)
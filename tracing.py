@@ -0,0 +1,240 @@
+import atexit
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from config import get_state_dir
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+TRACE_NAME = "trace.jsonl"
+TRACE_FILE_ENV = "PARKPARK_TRACE_FILE"   # 경로 지정 ("off" 면 파일 기록 안 함)
+TRACE_RUN_ENV = "PARKPARK_TRACE_RUN"     # 미리 읽기 프로세스도 같은 실행 ID 로 기록
+TRACE_MAX_BYTES = 5 * 1024 * 1024        # 이보다 커지면 trace.jsonl → trace.jsonl.1 (이전 것은 버림)
+FLUSH_LINES = 5000                       # 실행이 끝나기 전이라도 이만큼 모이면 파일에 씀
+
+_stack = []      # 열려 있는 span (바깥 → 안쪽)
+_finished = []   # 이 프로세스에서 끝난 span (시작 순서)
+_pending = []    # 아직 파일에 쓰지 않은 기록 (실행 끝에 flush 로 한 번에)
+_next_id = 0
+
+
+def trace_path():
+    path = os.environ.get(TRACE_FILE_ENV)
+    if path == "off":
+        return None
+    return path or os.path.join(get_state_dir(), TRACE_NAME)
+
+
+def run_id() -> str:
+    return os.environ.get(TRACE_RUN_ENV, "")
+
+
+def start_run() -> str:
+    """새 실행 ID 시작 (RunAll / watcher 한 번 = 실행 하나, 이전 실행 기록은 먼저 파일에)"""
+    flush()
+    rid = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{os.getpid()}"   # 같은 초에 여러 번 시작해도 구분
+    os.environ[TRACE_RUN_ENV] = rid
+    _finished.clear()
+    return rid
+
+
+# ===========================
+# 2. span
+# ===========================
+class Span:
+    """
+    한 구간의 측정값
+    - attrs: 설명용 값 (파일명, 단계명 등)
+    - counts: 누적 값 (rows, com_calls ...) - 끝날 때 바깥 span 에도 더해짐
+    """
+
+    __slots__ = ("id", "parent", "depth", "name", "attrs", "counts", "started", "seconds")
+
+    def __init__(self, name: str, attrs: dict, parent, depth: int):
+        global _next_id
+        _next_id += 1
+        self.id = _next_id
+        self.parent = parent
+        self.depth = depth
+        self.name = name
+        self.attrs = attrs
+        self.counts = {}
+        self.started = datetime.now()
+        self.seconds = 0.0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def count(self, key: str, n: int = 1):
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def to_dict(self) -> dict:
+        return {
+            "run": run_id(),
+            "pid": os.getpid(),
+            "id": self.id,
+            "parent": self.parent,
+            "depth": self.depth,
+            "span": self.name,
+            "start": self.started.isoformat(timespec="milliseconds"),
+            "seconds": round(self.seconds, 6),
+            **({"attrs": self.attrs} if self.attrs else {}),
+            **({"counts": self.counts} if self.counts else {}),
+        }
+
+
+def label(name: str, attrs: dict) -> str:
+    """요약 / 프로파일에 쓰는 표시 이름: span 이름 [단계 / 파일 / 시트]"""
+    tag = attrs.get("step") or attrs.get("file") or attrs.get("sheet") or ""
+    return name + (f" [{tag}]" if tag else "")
+
+
+def write_line(record: dict):
+    """기록은 모아 두었다가 flush 에서 파일을 한 번 열어 씀"""
+    _pending.append(record)
+    if len(_pending) >= FLUSH_LINES:
+        flush()
+
+
+def rotate(path: str, incoming: int = 0):
+    """trace 파일이 TRACE_MAX_BYTES 를 넘게 되면 .1 로 밀어냄 (보관은 한 개만)"""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return
+    if size and size + incoming > TRACE_MAX_BYTES:
+        os.replace(path, path + ".1")
+
+
+def flush():
+    """모아 둔 span 기록을 trace 파일에 한 번에 추가 (실행 끝 / 요약 전 / 프로세스 종료 시)"""
+    if not _pending:
+        return
+    records = _pending[:]
+    _pending.clear()
+    path = trace_path()
+    if path is None:
+        return
+    text = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+    try:
+        rotate(path, len(text.encode("utf-8")))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(text)
+    except OSError:
+        pass  # 기록 실패로 업데이트를 멈추지 않음
+
+
+atexit.register(flush)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    with span("read", file=...) as s:
+        ...
+        s.set(rows=len(df))
+    """
+    parent = _stack[-1] if _stack else None
+    s = Span(name, attrs, parent.id if parent else None, len(_stack))
+    _stack.append(s)
+    start = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.set(error=type(e).__name__)
+        raise
+    finally:
+        s.seconds = time.perf_counter() - start
+        _stack.pop()
+        if parent is not None:
+            for key, n in s.counts.items():
+                parent.count(key, n)
+        _finished.append(s)
+        write_line(s.to_dict())
+
+
+def count(key: str, n: int = 1):
+    """지금 열려 있는 span 에 누적 (없으면 무시)"""
+    if _stack:
+        _stack[-1].count(key, n)
+
+
+def current_stages() -> tuple:
+    """열려 있는 span 표시 이름 (바깥 → 안쪽), 다른 스레드(프로파일 샘플러)에서 읽어도 됨"""
+    return tuple(label(s.name, s.attrs) for s in list(_stack))
+
+
+# ===========================
+# 3. 요약
+# ===========================
+def finished() -> list:
+    return sorted(_finished, key=lambda s: s.id)
+
+
+def load_run(run: str = None) -> list:
+    """
+    trace 파일에서 한 실행의 기록 (미리 읽기 프로세스 포함) - 파일이 없으면 []
+    - 파일 크기는 rotate 로 제한, 실행 ID 가 없는 줄은 JSON 으로 풀지 않고 건너뜀
+    - 실행 도중 밀려난 기록이 있을 수 있어 .1 도 확인
+    """
+    run = run or run_id()
+    path = trace_path()
+    if not run or path is None:
+        return []
+    flush()
+    marker = json.dumps(run)
+    records = []
+    for name in (path + ".1", path):
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                if marker not in line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("run") == run:
+                    records.append(record)
+    return records
+
+
+def print_summary(title: str = "STAGE TIMING"):
+    """
+    이번 실행의 span 들을 프로세스별 / 시작 순서 / 들여쓰기로 출력
+    (trace 파일을 못 쓰면 이 프로세스 기록만)
+    """
+    records = load_run() or [s.to_dict() for s in finished()]
+    if not records:
+        return
+
+    main_pid = os.getpid()
+    by_pid = {}
+    for r in records:
+        by_pid.setdefault(r["pid"], []).append(r)
+
+    print(f"\n=== {title} ===")
+    print(f"{'stage':<36} {'seconds':>9} {'rows':>9} {'cells':>7} {'com':>7}")
+    for pid in sorted(by_pid, key=lambda p: (p != main_pid, p)):
+        if pid != main_pid:
+            print(f"-- 미리 읽기 프로세스 {pid}")
+        for r in sorted(by_pid[pid], key=lambda r: r["id"]):
+            attrs, counts = r.get("attrs", {}), r.get("counts", {})
+            text = "  " * r["depth"] + label(r["span"], attrs)
+            rows = attrs.get("rows", "")
+            cells = attrs.get("cells", "")
+            com = counts.get("com_calls", "")
+            print(f"{text:<36} {r['seconds']:>9.3f} {rows!s:>9} {cells!s:>7} {com!s:>7}")
+
+    # Excel 이 바빠서 거절한 COM 호출 (바깥 span 에 모두 합쳐져 있음)
+    top = [r.get("counts", {}) for r in records if r["depth"] == 0]
+    retries = sum(c.get("com_retries", 0) for c in top)
+    if retries:
+        wait = sum(c.get("com_wait_ms", 0) for c in top) / 1000
+        gave_up = sum(c.get("com_gave_up", 0) for c in top)
+        print(f"⏳ COM 재시도 {retries}회 / 대기 {wait:.1f}초" + (f" / 포기 {gave_up}회" if gave_up else ""))
@@ -0,0 +1,146 @@
+import argparse
+import time
+import traceback
+from datetime import date, datetime
+
+from downloads import EXPORT_TYPES, get_inventory
+from pipeline import FAIL, run_steps
+from RunAll import STEPS
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+# 증권사 파일 종류 → 실행할 업데이트 모듈 (실행 순서는 RunAll.STEPS 를 따름)
+WATCH_UPDATERS = {
+    "fok": ("FokChange",),
+    "samsung": ("SamChange",),
+    "t1": ("Han",),
+    "kiwoom": ("KiwoomCount",),
+    "nh_hts": ("NhChange", "NH_1_Change"),
+}
+
+POLL_SECONDS = 2.0   # 폴더 확인 주기
+STABLE_POLLS = 2     # 크기/수정시간이 이 횟수만큼 연속으로 그대로면 다운로드 완료로 판단
+
+
+def now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ===========================
+# 2. 다운로드 완료 판단
+# ===========================
+def signatures(inventory: dict) -> dict:
+    """{경로: (종류, (수정시간, 크기))}"""
+    return {
+        f.path: (f.kind, (f.mtime, f.size))
+        for files in inventory.values()
+        for f in files
+    }
+
+
+def can_read(path: str) -> bool:
+    """브라우저가 아직 쓰고 있으면(잠김) 열기 실패"""
+    try:
+        with open(path, "rb") as f:
+            f.read(1)
+        return True
+    except OSError:
+        return False
+
+
+def kind_ready(kind: str, inventory: dict) -> bool:
+    """NH 는 오늘 받은 파일(고객정보 + 잔고) 2개가 모두 있어야 실행"""
+    if kind != "nh_hts":
+        return True
+    today = [f for f in inventory[kind] if datetime.fromtimestamp(f.mtime).date() == date.today()]
+    return len(today) >= 2
+
+
+class DownloadWatcher:
+    """
+    Downloads / Downloads\\hts 를 주기적으로 스캔해서
+    새로 받은(또는 다시 받은) 증권사 파일이 다 내려오면 종류를 알려준다.
+    - 시작 시점에 이미 있던 파일은 무시
+    - .crdownload / .part 같은 임시 파일은 접두사·확장자 분류에서 이미 빠짐
+    """
+
+    def __init__(self, stable_polls: int = STABLE_POLLS):
+        self.stable_polls = stable_polls
+        self.seen = {path: sig for path, (_, sig) in signatures(get_inventory(refresh=True)).items()}
+        self.pending = {}   # 경로 → (종류, 서명, 연속으로 그대로였던 횟수)
+        self.waiting = set()  # 파일은 왔지만 짝 파일을 기다리는 종류 (NH)
+
+    def poll(self) -> set:
+        inventory = get_inventory(refresh=True)
+        current = signatures(inventory)
+
+        for path, (kind, sig) in current.items():
+            if self.seen.get(path) == sig:
+                continue
+            prev = self.pending.get(path)
+            count = prev[2] + 1 if prev and prev[1] == sig else 0
+            self.pending[path] = (kind, sig, count)
+
+        ready = set()
+        for path, (kind, sig, count) in list(self.pending.items()):
+            if path not in current:
+                del self.pending[path]  # 받다가 지워짐 / 이름 바뀜
+            elif count >= self.stable_polls and sig[1] > 0 and can_read(path):
+                self.seen[path] = sig
+                del self.pending[path]
+                ready.add(kind)
+
+        candidates = ready | self.waiting
+        ready = {k for k in candidates if kind_ready(k, inventory)}
+        self.waiting = candidates - ready
+        return ready
+
+
+# ===========================
+# 3. 업데이트 실행
+# ===========================
+def run_updaters(kinds) -> bool:
+    """
+    준비된 종류들의 업데이트를 고객 파일 한 번 열어서 실행 (입력 내용이 같으면 건너뜀)
+    - 순서는 RunAll.STEPS 기준 (NH_1_Change 는 NhChange 결과를 읽음)
+    """
+    wanted = {name for kind in kinds for name in WATCH_UPDATERS[kind]}
+    steps = [(name, module) for name, module in STEPS if name in wanted]
+    names = [name for name, _ in steps]
+    print(f"\n▶ START: {', '.join(names)}  ({now()})")
+    try:
+        results = run_steps(steps)
+    except Exception:
+        traceback.print_exc()
+        print(f"❌ FAIL: {', '.join(names)}  ({now()})")
+        return False
+
+    for name, status in results:
+        print(f"- {status} | {name}")
+    return all(status != FAIL for _, status in results)
+
+
+def watch(interval: float = POLL_SECONDS, stable_polls: int = STABLE_POLLS):
+    watcher = DownloadWatcher(stable_polls)
+    folders = sorted({folder for folder, _, _ in EXPORT_TYPES.values()})
+    print("=== Watch START ===")
+    for folder in folders:
+        print(f"👀 {folder}")
+
+    try:
+        while True:
+            ready = watcher.poll()
+            if ready:
+                run_updaters(ready)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n=== Watch STOP ===")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="증권사 파일 다운로드 감시 → 해당 업데이트만 실행")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="폴더 확인 주기(초)")
+    parser.add_argument("--stable", type=int, default=STABLE_POLLS, help="다운로드 완료 판단 연속 횟수")
+    args = parser.parse_args()
+    watch(args.interval, args.stable)
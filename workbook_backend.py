@@ -0,0 +1,681 @@
+import functools
+import gc
+import io
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+import tracing
+from config import get_state_dir
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+# 기본 백엔드 ("com" = 실제 Excel, "openpyxl" = Excel 없이 파일 직접 처리)
+BACKEND_ENV = "WORKBOOK_BACKEND"
+DEFAULT_BACKEND = "com"
+
+# 이 스크립트들이 띄운 Excel 프로세스 기록 (EndExcel 은 이것만 종료)
+OWNED_PIDS_NAME = "excel_pids.json"
+PROCESS_TERMINATE = 0x0001
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_INVALID_PARAMETER = 87   # OpenProcess: 없는 PID
+STILL_ACTIVE = 259             # GetExitCodeProcess: 아직 실행 중
+START_TIME_TOLERANCE = 0.001   # 기록한 시작 시각과 같은 프로세스로 볼 오차(초)
+
+# Excel 이 바빠서 호출을 거절했을 때만 재시도 (그 외 COM 오류는 바로 실패)
+RPC_E_CALL_REJECTED = 0x80010001          # 다른 작업 중이라 호출 거절
+RPC_E_SERVERCALL_RETRYLATER = 0x8001010A  # 나중에 다시 호출
+VBA_E_IGNORE = 0x800AC472                 # 셀 편집 / 대화상자 등으로 입력을 받지 않는 상태
+BUSY_HRESULTS = {RPC_E_CALL_REJECTED, RPC_E_SERVERCALL_RETRYLATER, VBA_E_IGNORE}
+RETRY_FIRST_DELAY = 0.05   # 첫 대기 상한(초) - 재시도마다 두 배
+RETRY_MAX_DELAY = 2.0      # 한 번 대기 상한(초)
+RETRY_BUDGET = 30.0        # 호출 하나에 기다리는 총 시간(초) - 넘으면 원래 오류
+
+xlUp = -4162
+xlToLeft = -4159
+XL_MAX_ROWS = 1048576
+
+
+# ===========================
+# 2. 주소 유틸
+# ===========================
+def col_letter(col: int) -> str:
+    """1 → A, 27 → AA"""
+    s = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        s = chr(65 + rem) + s
+    return s
+
+
+def col_number(letters: str) -> int:
+    """A → 1, AA → 27"""
+    n = 0
+    for ch in letters.upper():
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def range_address(r1: int, c1: int, r2: int, c2: int) -> str:
+    return f"{col_letter(c1)}{r1}:{col_letter(c2)}{r2}"
+
+
+def parse_address(addr: str):
+    """"B14" → (14, 2)"""
+    m = re.fullmatch(r"\$?([A-Za-z]+)\$?(\d+)", addr.strip())
+    if not m:
+        raise ValueError(f"셀 주소 형식이 아닙니다: {addr}")
+    return int(m.group(2)), col_number(m.group(1))
+
+
+# ===========================
+# 3. 백엔드 공통 인터페이스
+# ===========================
+class Sheet:
+    """
+    워크시트 공통 인터페이스 (행/열 번호는 1-based)
+    - read / write 는 항상 2-D 리스트
+    """
+
+    name = ""
+
+    def read(self, r1: int, c1: int, r2: int, c2: int) -> list:
+        raise NotImplementedError
+
+    def write(self, r1: int, c1: int, rows) -> None:
+        raise NotImplementedError
+
+    def last_row(self, col: int) -> int:
+        """End(xlUp): col 에서 값이 있는 마지막 행 (없으면 1)"""
+        raise NotImplementedError
+
+    def last_col(self, row: int) -> int:
+        """End(xlToLeft): row 에서 값이 있는 마지막 열 (없으면 1)"""
+        raise NotImplementedError
+
+    def used_extent(self):
+        """UsedRange 의 (마지막 행, 마지막 열)"""
+        raise NotImplementedError
+
+    def insert_rows(self, row: int, count: int = 1) -> None:
+        raise NotImplementedError
+
+    def clear(self, r1: int, c1: int, r2: int, c2: int) -> None:
+        """값만 지우기 (ClearContents)"""
+        raise NotImplementedError
+
+    def set_merged_value(self, addr: str, value) -> None:
+        """병합된 셀이면 병합 영역 첫 칸에 기록"""
+        raise NotImplementedError
+
+    def set_column_format(self, col: int, fmt: str) -> None:
+        raise NotImplementedError
+
+    # ---- 주소 기반 편의 함수 ----
+    def get_value(self, addr: str):
+        r, c = parse_address(addr)
+        return self.read(r, c, r, c)[0][0]
+
+    def set_value(self, addr: str, value) -> None:
+        r, c = parse_address(addr)
+        self.write(r, c, [[value]])
+
+
+class Book:
+    """워크북 공통 인터페이스"""
+
+    backend = ""
+    full_name = ""
+
+    @property
+    def shared(self) -> dict:
+        """
+        이 워크북 세션 동안 단계끼리 넘기는 값 (예: NhChange 가 쓴 고객 프레임 → NH_1_Change)
+        워크북 객체에 붙어 있으므로 세션이 끝나면 함께 사라짐
+        """
+        if "_shared" not in self.__dict__:
+            self._shared = {}
+        return self._shared
+
+    def sheet(self, name: str) -> Sheet:
+        raise NotImplementedError
+
+    def save(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def reopen(self) -> None:
+        """저장하지 않은 변경을 버리고 파일에서 다시 열기"""
+        raise NotImplementedError
+
+
+# ===========================
+# 4. Excel 프로세스 기록
+# ===========================
+def owned_pids_path() -> str:
+    return os.path.join(get_state_dir(), OWNED_PIDS_NAME)
+
+
+def owned_excel_pids() -> dict:
+    """{pid: {"owner": 띄운 스크립트, "started": 시각}} - 기록이 없으면 {}"""
+    try:
+        with open(owned_pids_path(), encoding="utf-8") as f:
+            return {int(pid): info for pid, info in json.load(f).items()}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def write_owned_pids(pids: dict):
+    try:
+        with open(owned_pids_path(), "w", encoding="utf-8") as f:
+            json.dump({str(pid): info for pid, info in pids.items()}, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass  # 기록 실패로 업데이트를 멈추지 않음
+
+
+def record_excel_pid(pid: int):
+    """
+    띄운 Excel 의 PID 기록
+    - "created": 프로세스 시작 시각 (PID 가 재사용돼도 다른 프로세스를 죽이지 않도록 종료 전 비교)
+    """
+    pids = owned_excel_pids()
+    pids[pid] = {
+        "owner": f"{os.path.basename(sys.argv[0]) or 'python'} (pid {os.getpid()})",
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "created": process_start_time(pid),
+    }
+    write_owned_pids(pids)
+
+
+def forget_excel_pid(pid: int):
+    pids = owned_excel_pids()
+    if pids.pop(pid, None) is not None:
+        write_owned_pids(pids)
+
+
+def _creation_time(handle) -> float:
+    import win32process
+
+    return win32process.GetProcessTimes(handle)["CreationTime"].timestamp()
+
+
+def same_start(a, b) -> bool:
+    return a is not None and b is not None and abs(a - b) < START_TIME_TOLERANCE
+
+
+def process_start_time(pid: int):
+    """실행 중인 프로세스의 시작 시각 (epoch 초) - 없거나 알 수 없으면 None"""
+    try:
+        import win32api
+
+        handle = win32api.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    except Exception:
+        return None
+    try:
+        return _creation_time(handle)
+    except Exception:
+        return None
+    finally:
+        win32api.CloseHandle(handle)
+
+
+def terminate_process(pid: int, created) -> str:
+    """
+    시작 시각이 기록과 같을 때만 강제 종료 (확인과 종료를 같은 핸들로 처리)
+    - "terminated": 종료함
+    - "gone": 이미 끝난 프로세스
+    - "reused": 같은 PID 의 다른 프로세스 (건드리지 않음)
+    - "unverified": 시작 시각 기록이 없어 확인 불가 (건드리지 않음)
+    - "failed": 열기/종료 실패
+    """
+    try:
+        import win32api
+        import win32process
+    except ImportError:
+        return "failed"
+
+    try:
+        handle = win32api.OpenProcess(PROCESS_TERMINATE | PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    except Exception as e:
+        return "gone" if getattr(e, "winerror", None) == ERROR_INVALID_PARAMETER else "failed"
+    try:
+        if win32process.GetExitCodeProcess(handle) != STILL_ACTIVE:
+            return "gone"
+        if created is None:
+            return "unverified"
+        if not same_start(_creation_time(handle), created):
+            return "reused"
+        win32api.TerminateProcess(handle, 1)
+        return "terminated"
+    except Exception:
+        return "failed"
+    finally:
+        win32api.CloseHandle(handle)
+
+
+def excel_pid(excel):
+    """Excel.Application 의 프로세스 ID (알 수 없으면 None)"""
+    try:
+        import win32process
+
+        hwnd = excel.Hwnd
+        com_calls(1)
+        return win32process.GetWindowThreadProcessId(hwnd)[1]
+    except Exception:
+        return None
+
+
+# ===========================
+# 5. COM (실제 Excel) 백엔드
+# ===========================
+def start_excel():
+    """백그라운드 Excel 인스턴스 생성 (화면 갱신/경고창 끔)"""
+    import win32com.client as win32
+
+    excel = win32.DispatchEx("Excel.Application")
+    for attr in ("Visible", "ScreenUpdating", "DisplayAlerts"):
+        try:
+            setattr(excel, attr, False)
+        except Exception:
+            pass  # Ignore if can't set property
+    return excel
+
+
+def as_2d(value) -> list:
+    """Range.Value 결과를 항상 2-D 리스트로 (단일 셀이면 스칼라로 옴)"""
+    if isinstance(value, tuple):
+        return [list(r) for r in value]
+    return [[value]]
+
+
+def com_calls(n: int):
+    """COM 호출 수를 지금 열려 있는 tracing span 에 누적 (메서드 호출 + 속성 읽기/쓰기)"""
+    tracing.count("com_calls", n)
+
+
+def com_hresults(e) -> set:
+    """com_error 의 hresult / excepinfo scode (부호 없는 32비트) - pywintypes 없이 args 로 판별"""
+    args = getattr(e, "args", ())
+    codes = [getattr(e, "hresult", None), args[0] if args else None]
+    if len(args) > 2 and isinstance(args[2], tuple) and len(args[2]) > 5:
+        codes.append(args[2][5])
+    return {c & 0xFFFFFFFF for c in codes if isinstance(c, int) and not isinstance(c, bool)}
+
+
+def is_busy_error(e) -> bool:
+    return bool(com_hresults(e) & BUSY_HRESULTS)
+
+
+def call_with_retry(fn, *args, budget: float = RETRY_BUDGET, sleep=time.sleep, clock=time.monotonic, **kwargs):
+    """
+    fn(*args, **kwargs) - Excel 이 바쁘다고 거절하면 지수 백오프 + 지터로 다시 호출
+    - 거절된 호출은 실행되지 않은 것이므로 다시 불러도 안전
+    - 기다린 시간이 budget 을 넘으면 마지막 오류 그대로
+    - sleep / clock: 테스트에서 가짜 시계로 바꿔 끼움
+    - tracing: com_retries (재시도 수) / com_wait_ms (기다린 시간) / com_gave_up
+    """
+    deadline = clock() + budget
+    attempt = 0
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if not is_busy_error(e):
+                raise
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_FIRST_DELAY * 2 ** attempt))
+            if clock() + delay > deadline:
+                tracing.count("com_gave_up")
+                print(f"⚠ Excel 이 계속 바빠서 {attempt}회 재시도 후 중단합니다 ({budget:.0f}초).")
+                raise
+            attempt += 1
+            tracing.count("com_retries")
+            tracing.count("com_wait_ms", round(delay * 1000))
+            sleep(delay)
+
+
+def com_retry(method):
+    """
+    ComSheet / ComBook 메서드를 통째로 재시도
+    (각 메서드에서 시트를 바꾸는 COM 호출은 마지막 하나뿐이라 앞부분을 다시 불러도 같음)
+    """
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        return call_with_retry(method, *args, **kwargs)
+
+    return wrapper
+
+
+class ComSheet(Sheet):
+    def __init__(self, ws):
+        self.ws = ws
+        self.name = ws.Name
+        com_calls(1)
+
+    @com_retry
+    def read(self, r1, c1, r2, c2):
+        com_calls(2)
+        return as_2d(self.ws.Range(range_address(r1, c1, r2, c2)).Value)
+
+    def write(self, r1, c1, rows):
+        rows = tuple(tuple(r) for r in rows)   # 재시도해도 같은 값을 쓰도록 먼저 풀어 둠
+        if not rows:
+            return
+        address = range_address(r1, c1, r1 + len(rows) - 1, c1 + len(rows[0]) - 1)
+
+        def put():
+            com_calls(2)
+            self.ws.Range(address).Value = rows
+
+        call_with_retry(put)
+
+    @com_retry
+    def last_row(self, col):
+        ws = self.ws
+        com_calls(5)
+        return ws.Cells(ws.Rows.Count, col).End(xlUp).Row
+
+    @com_retry
+    def last_col(self, row):
+        ws = self.ws
+        com_calls(5)
+        return ws.Cells(row, ws.Columns.Count).End(xlToLeft).Column
+
+    @com_retry
+    def used_extent(self):
+        used = self.ws.UsedRange
+        com_calls(7)
+        return (
+            used.Row + used.Rows.Count - 1,
+            used.Column + used.Columns.Count - 1,
+        )
+
+    @com_retry
+    def insert_rows(self, row, count=1):
+        com_calls(3)
+        self.ws.Rows(f"{row}:{row + count - 1}").Insert()
+
+    @com_retry
+    def clear(self, r1, c1, r2, c2):
+        com_calls(2)
+        self.ws.Range(range_address(r1, c1, r2, c2)).ClearContents()
+
+    @com_retry
+    def set_merged_value(self, addr, value):
+        rng = self.ws.Range(addr)
+        if rng.MergeCells:
+            com_calls(5)
+            rng.MergeArea.Cells(1, 1).Value = value
+        else:
+            com_calls(3)
+            rng.Value = value
+
+    @com_retry
+    def set_column_format(self, col, fmt):
+        com_calls(3)
+        self.ws.Columns(col).NumberFormat = fmt
+
+
+class ComBook(Book):
+    backend = "com"
+
+    def __init__(self, excel, wb, path: str = None, password: str = None, pid: int = None):
+        self.excel = excel
+        self.wb = wb
+        self.path = path
+        self.password = password
+        self.pid = pid   # 직접 띄운 Excel 이면 프로세스 ID (기록해 두고 종료 시 지움)
+
+    @classmethod
+    def open(cls, path: str, password: str = None, excel=None):
+        pid = None
+        if excel is None:
+            excel = start_excel()
+            pid = excel_pid(excel)
+            if pid:
+                record_excel_pid(pid)
+        try:
+            com_calls(2)
+            wb = call_with_retry(lambda: excel.Workbooks.Open(path, False, False, None, password))
+        except Exception:
+            excel.Quit()
+            if pid:
+                forget_excel_pid(pid)
+            raise
+        return cls(excel, wb, path, password, pid)
+
+    @property
+    @com_retry
+    def full_name(self):
+        com_calls(1)
+        return self.wb.FullName
+
+    @com_retry
+    def sheet(self, name):
+        com_calls(1)
+        return ComSheet(self.wb.Worksheets(name))
+
+    @com_retry
+    def save(self):
+        com_calls(1)
+        self.wb.Save()
+
+    def close(self):
+        if self.wb is not None:
+            try:
+                call_with_retry(lambda: self.wb.Close(False))
+            except Exception as e:
+                print(f"⚠ 워크북 닫기 오류: {e}")
+
+        try:
+            self.excel.ScreenUpdating = True
+        except Exception:
+            pass
+
+        try:
+            call_with_retry(lambda: self.excel.Quit())
+        except Exception as e:
+            print(f"⚠ Excel 종료 오류: {e}")
+        else:
+            if self.pid:
+                forget_excel_pid(self.pid)
+
+        self.wb = None
+        self.excel = None
+        gc.collect()
+
+    def reopen(self):
+        """같은 Excel 에서 저장하지 않고 닫은 뒤 다시 열기 (Excel 은 그대로 둠)"""
+        com_calls(3)
+        call_with_retry(lambda: self.wb.Close(False))
+        self.wb = call_with_retry(
+            lambda: self.excel.Workbooks.Open(self.path, False, False, None, self.password)
+        )
+
+
+# ===========================
+# 6. openpyxl (Excel 없음) 백엔드
+# ===========================
+class OpenpyxlSheet(Sheet):
+    """
+    openpyxl 워크시트 래퍼
+    ※ 수식은 값이 아니라 "=..." 문자열로 읽힘 (데이터 시트만 다루므로 문제 없음)
+    ※ COM 으로 쓸 때 Excel 이 해 주는 값 변환 중 여기서 따라 하는 것은 "'" 접두어뿐
+      - "'123" → 텍스트 "123" + quotePrefix (COM 과 같은 셀)
+      - 숫자 모양 문자열("123", "1,234")은 숫자로 바뀌지 않고 텍스트로 남음
+      - 날짜 모양 문자열("2024-01-05")은 날짜로 바뀌지 않고 텍스트로 남음
+      - "TRUE" / "FALSE" 는 논리값이 아니라 텍스트로 남음
+      - "=..." 문자열은 COM 과 같이 수식이 됨
+      숫자 / 날짜로 저장해야 하는 열은 값을 int / float / datetime 으로 넘길 것
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.name = ws.title
+
+    def read(self, r1, c1, r2, c2):
+        return [
+            list(r)
+            for r in self.ws.iter_rows(
+                min_row=r1, max_row=r2, min_col=c1, max_col=c2, values_only=True
+            )
+        ]
+
+    def write(self, r1, c1, rows):
+        ws = self.ws
+        for i, row in enumerate(rows):
+            for j, v in enumerate(row):
+                cell = ws.cell(row=r1 + i, column=c1 + j)
+                if isinstance(v, str) and v.startswith("'"):
+                    # COM 에서 "'" 는 텍스트 표시 접두어 (셀 값에는 들어가지 않음)
+                    cell.value = v[1:] or None
+                    cell.quotePrefix = True
+                else:
+                    cell.value = None if v == "" else v
+                    if cell.quotePrefix:
+                        cell.quotePrefix = False
+
+    def last_row(self, col):
+        last = 1
+        for i, (v,) in enumerate(
+            self.ws.iter_rows(min_col=col, max_col=col, values_only=True), start=1
+        ):
+            if v is not None and v != "":
+                last = i
+        return last
+
+    def last_col(self, row):
+        last = 1
+        for j, v in enumerate(next(self.ws.iter_rows(min_row=row, max_row=row, values_only=True), ()), start=1):
+            if v is not None and v != "":
+                last = j
+        return last
+
+    def used_extent(self):
+        return self.ws.max_row, self.ws.max_column
+
+    def insert_rows(self, row, count=1):
+        self.ws.insert_rows(row, count)
+
+    def clear(self, r1, c1, r2, c2):
+        # 실제 데이터가 있는 범위까지만 (A2:AW1048576 같은 넓은 범위 대비)
+        r2 = min(r2, self.ws.max_row)
+        c2 = min(c2, self.ws.max_column)
+        from openpyxl.cell.cell import MergedCell
+
+        for row in self.ws.iter_rows(min_row=r1, max_row=r2, min_col=c1, max_col=c2):
+            for cell in row:
+                if not isinstance(cell, MergedCell):
+                    cell.value = None
+
+    def set_merged_value(self, addr, value):
+        r, c = parse_address(addr)
+        for merged in self.ws.merged_cells.ranges:
+            if merged.min_row <= r <= merged.max_row and merged.min_col <= c <= merged.max_col:
+                r, c = merged.min_row, merged.min_col
+                break
+        self.ws.cell(row=r, column=c, value=value)
+
+    def set_column_format(self, col, fmt):
+        self.ws.column_dimensions[col_letter(col)].number_format = fmt
+
+
+class OpenpyxlBook(Book):
+    """
+    Excel 없이 openpyxl 로 고객 파일을 직접 열고 저장
+    - 암호 걸린 파일은 msoffcrypto-tool 로 메모리에서 복호화 / 저장 시 다시 암호화
+    ※ 피벗/차트/매크로 등 openpyxl 이 지원하지 않는 요소는 보존되지 않을 수 있음
+    """
+
+    backend = "openpyxl"
+
+    def __init__(self, wb, path: str, password: str = None):
+        self.wb = wb
+        self.path = path
+        self.password = password
+
+    @classmethod
+    def open(cls, path: str, password: str = None):
+        import openpyxl
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        encrypted = False
+        if password:
+            import msoffcrypto
+
+            office = msoffcrypto.OfficeFile(io.BytesIO(data))
+            if office.is_encrypted():
+                office.load_key(password=password)
+                plain = io.BytesIO()
+                office.decrypt(plain)
+                data = plain.getvalue()
+                encrypted = True
+
+        wb = openpyxl.load_workbook(io.BytesIO(data))
+        return cls(wb, path, password if encrypted else None)
+
+    @property
+    def full_name(self):
+        return os.path.abspath(self.path)
+
+    def sheet(self, name):
+        return OpenpyxlSheet(self.wb[name])
+
+    def save(self):
+        plain = io.BytesIO()
+        self.wb.save(plain)
+        plain.seek(0)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as out:
+            if self.password:
+                from msoffcrypto.format.ooxml import OOXMLFile
+
+                OOXMLFile(plain).encrypt(self.password, out)
+            else:
+                out.write(plain.getvalue())
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        self.wb.close()
+        self.wb = None
+
+    def reopen(self):
+        fresh = OpenpyxlBook.open(self.path, self.password)
+        self.wb.close()
+        self.wb = fresh.wb
+
+
+# ===========================
+# 7. 백엔드 선택
+# ===========================
+def open_server_book(path: str, password: str = None) -> Book:
+    """이미 떠 있는 워크북 세션 서버(workbook_server.py)의 워크북 사용"""
+    from workbook_server import RemoteBook
+
+    return RemoteBook.open(path, password)
+
+
+BACKENDS = {
+    "com": ComBook.open,
+    "openpyxl": OpenpyxlBook.open,
+    "server": open_server_book,
+}
+
+
+def open_workbook(path: str, password: str = None, backend: str = None) -> Book:
+    """backend 미지정 시 환경변수 WORKBOOK_BACKEND → 기본값 com"""
+    backend = backend or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"알 수 없는 워크북 백엔드: {backend} (가능: {', '.join(BACKENDS)})")
+    with tracing.span("workbook_open", backend=backend, file=os.path.basename(path)):
+        return BACKENDS[backend](path, password)
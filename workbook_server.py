@@ -0,0 +1,440 @@
+import argparse
+import json
+import os
+import secrets
+import threading
+import time
+import traceback
+from datetime import datetime
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+import tracing
+from config import get_fixed_customer_path, get_state_dir
+from excel_session import PASSWORD
+from sheet_cache import file_stamp, same_path
+from workbook_backend import BACKEND_ENV, DEFAULT_BACKEND, Book, Sheet, open_workbook
+
+# ===========================
+# 1. 기본 설정
+# ===========================
+SERVER_STATE_NAME = "workbook_server.json"   # 주소 / 인증키 / pid (서버가 떠 있는 동안만)
+HOST = "127.0.0.1"
+IDLE_TIMEOUT = 4 * 60 * 60                   # 이 시간(초) 동안 요청이 없으면 워크북 닫고 종료
+IDLE_CHECK = 60
+
+# 결과가 필요 없는 시트 호출 → 모아 두었다가 다음 읽기 / 저장 때 한 번에 보냄
+QUEUED_METHODS = {"write", "clear", "insert_rows", "set_merged_value", "set_column_format"}
+SHEET_METHODS = QUEUED_METHODS | {"read", "last_row", "last_col", "used_extent"}
+
+
+def state_path() -> str:
+    return os.path.join(get_state_dir(), SERVER_STATE_NAME)
+
+
+def load_state():
+    try:
+        with open(state_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_state(state: dict):
+    path = state_path()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    try:
+        os.chmod(tmp, 0o600)   # 인증키가 들어 있음
+    except OSError:
+        pass
+    os.replace(tmp, path)
+
+
+def remove_state(pid: int = None):
+    """서버 기록 삭제 (pid 를 주면 그 서버의 기록일 때만)"""
+    state = load_state()
+    if state is not None and (pid is None or state.get("pid") == pid):
+        try:
+            os.remove(state_path())
+        except OSError:
+            pass
+
+
+def connect(state: dict):
+    return Client(tuple(state["address"]), authkey=bytes.fromhex(state["authkey"]))
+
+
+# ===========================
+# 2. 서버 (워크북 하나를 열어 둔 채 요청 처리)
+# ===========================
+class WorkbookServer:
+    """
+    고객 파일을 한 번 열어 두고 클라이언트(RemoteBook) 요청을 순서대로 처리
+    - 한 번에 한 연결만 처리 (다음 실행은 앞 실행이 끝날 때까지 대기)
+    - 저장하지 않고 연결이 끝나면 (실패 / 중단) 바뀐 내용을 버리고 파일에서 다시 열기
+    - 다른 곳에서 파일이 바뀌었으면 (크기 / 수정시각) 다음 연결 때 다시 열기
+    """
+
+    def __init__(self, path: str, password: str = PASSWORD, backend: str = None):
+        self.path = path
+        self.password = password
+        self.backend = backend
+        self.book = None
+        self.sheets = {}
+        self.stamp = None
+        self.dirty = False
+        self.running = True
+        self.started = datetime.now()
+        self.sessions = 0
+        self.reopened = 0
+        self.last_used = time.monotonic()
+
+    def open(self):
+        self.book = open_workbook(self.path, self.password, self.backend)
+        self.stamp = file_stamp(self.path)
+        print(f"📘 세션 서버: {self.path} 열림 (backend={self.book.backend})")
+
+    def reopen(self, reason: str):
+        print(f"♻ 세션 서버: 워크북 다시 열기 ({reason})")
+        self.book.reopen()
+        self.sheets.clear()
+        self.stamp = file_stamp(self.path)
+        self.dirty = False
+        self.reopened += 1
+
+    def close(self):
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+            print("📁 세션 서버: 워크북 닫음")
+
+    def sheet(self, name: str) -> Sheet:
+        if name not in self.sheets:
+            self.sheets[name] = self.book.sheet(name)
+        return self.sheets[name]
+
+    # ---- 요청 ----
+    def op_hello(self, msg):
+        if not same_path(msg["path"], self.path):
+            raise ValueError(f"세션 서버는 다른 파일을 열고 있습니다: {self.path}")
+        tracing.start_run()   # 연결마다 새로 (끝난 span 이 계속 쌓이지 않게)
+        if file_stamp(self.path) != self.stamp:
+            self.reopen("파일이 바뀜")
+        self.sessions += 1
+        return {"full_name": self.book.full_name, "server_backend": self.book.backend}
+
+    def op_sheet(self, msg):
+        self.sheet(msg["name"])
+        return {}
+
+    def op_batch(self, msg):
+        results = []
+        with tracing.span("batch", calls=len(msg["calls"])) as s:
+            for name, method, args in msg["calls"]:
+                if method not in SHEET_METHODS:
+                    raise ValueError(f"지원하지 않는 시트 호출: {method}")
+                if method in QUEUED_METHODS:
+                    self.dirty = True
+                results.append(getattr(self.sheet(name), method)(*args))
+        return {"results": results, "counts": dict(s.counts)}
+
+    def op_save(self, msg):
+        self.book.save()
+        self.stamp = file_stamp(self.path)
+        self.dirty = False
+        return {}
+
+    def op_reopen(self, msg):
+        self.reopen("클라이언트 요청")
+        return {}
+
+    def op_release(self, msg):
+        self.release()
+        return {}
+
+    def op_status(self, msg):
+        return {
+            "path": self.path,
+            "backend": self.book.backend,
+            "pid": os.getpid(),
+            "excel_pid": getattr(self.book, "pid", None),
+            "started": self.started.isoformat(timespec="seconds"),
+            "sessions": self.sessions,
+            "reopened": self.reopened,
+            "idle_seconds": round(time.monotonic() - self.last_used),
+        }
+
+    def op_shutdown(self, msg):
+        self.running = False
+        return {}
+
+    def handle(self, msg: dict) -> dict:
+        handler = getattr(self, f"op_{msg.get('op')}", None)
+        if handler is None:
+            return {"ok": False, "error": f"알 수 없는 요청: {msg.get('op')}", "traceback": ""}
+        try:
+            return {"ok": True, **handler(msg)}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+
+    def release(self):
+        """연결이 끝날 때: 저장하지 않은 변경이 있으면 버림"""
+        if self.dirty:
+            self.reopen("저장하지 않은 변경 버림")
+
+    def session(self, conn):
+        """연결 하나 (hello → 시트 호출 / 저장 … → release) 처리"""
+        try:
+            while self.running:
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    break
+                conn.send(self.handle(msg))
+                if msg.get("op") == "release":
+                    break
+        except OSError:
+            pass
+        finally:
+            self.release()
+            self.last_used = time.monotonic()
+
+
+def watch_idle(server: WorkbookServer, state: dict, idle_timeout: int):
+    """요청 없이 idle_timeout 이 지나면 서버에 종료 요청 (accept 에서 기다리는 중이라 직접 연결)"""
+    while server.running:
+        time.sleep(IDLE_CHECK)
+        if time.monotonic() - server.last_used > idle_timeout:
+            print(f"⏹ 세션 서버: {idle_timeout}초 동안 요청이 없어 종료합니다.")
+            try:
+                with connect(state) as conn:
+                    conn.send({"op": "shutdown"})
+                    conn.recv()
+            except (OSError, EOFError):
+                pass
+            return
+
+
+def serve(path: str = None, password: str = PASSWORD, backend: str = None, idle_timeout: int = IDLE_TIMEOUT):
+    """세션 서버 실행 (종료 요청 / 유휴 시간 초과 / Ctrl+C 까지)"""
+    running = server_status()
+    if running is not None:
+        raise RuntimeError(f"세션 서버가 이미 실행 중입니다 (pid {running['pid']}).")
+
+    backend = backend or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+    if backend == RemoteBook.backend:
+        raise ValueError("세션 서버는 com / openpyxl 백엔드로만 워크북을 열 수 있습니다.")
+
+    # 서버 쪽 span 은 COM 호출 수를 세는 데만 사용 (파일 기록은 PARKPARK_TRACE_FILE 을 지정했을 때만)
+    os.environ.setdefault(tracing.TRACE_FILE_ENV, "off")
+
+    server = WorkbookServer(path or get_fixed_customer_path(), password, backend)
+    server.open()
+    authkey = secrets.token_bytes(32)
+    try:
+        with Listener((HOST, 0), authkey=authkey) as listener:
+            state = {
+                "address": list(listener.address),
+                "authkey": authkey.hex(),
+                "pid": os.getpid(),
+                "path": server.path,
+                "backend": server.book.backend,
+                "excel_pid": getattr(server.book, "pid", None),
+                "started": server.started.isoformat(timespec="seconds"),
+            }
+            write_state(state)
+            threading.Thread(target=watch_idle, args=(server, state, idle_timeout), daemon=True).start()
+            print(f"🟢 세션 서버 대기 중: {HOST}:{listener.address[1]} (pid {os.getpid()})")
+
+            while server.running:
+                try:
+                    conn = listener.accept()
+                except (OSError, AuthenticationError) as e:
+                    print(f"⚠ 세션 서버 연결 거부: {e}")
+                    continue
+                with conn:
+                    server.session(conn)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        remove_state(os.getpid())
+        server.close()
+        print("⏹ 세션 서버 종료")
+
+
+# ===========================
+# 3. 클라이언트 (workbook_backend 의 "server" 백엔드)
+# ===========================
+class RemoteSheet(Sheet):
+    """세션 서버 워크북의 시트 - 쓰기 계열은 모아 두었다가 다음 읽기 / 저장 때 한 번에 전송"""
+
+    def __init__(self, book, name: str):
+        self.book = book
+        self.name = name
+
+    def read(self, r1, c1, r2, c2):
+        return self.book.call(self.name, "read", (r1, c1, r2, c2))
+
+    def write(self, r1, c1, rows):
+        rows = [list(r) for r in rows]
+        if rows:
+            self.book.call(self.name, "write", (r1, c1, rows))
+
+    def last_row(self, col):
+        return self.book.call(self.name, "last_row", (col,))
+
+    def last_col(self, row):
+        return self.book.call(self.name, "last_col", (row,))
+
+    def used_extent(self):
+        return tuple(self.book.call(self.name, "used_extent", ()))
+
+    def insert_rows(self, row, count=1):
+        self.book.call(self.name, "insert_rows", (row, count))
+
+    def clear(self, r1, c1, r2, c2):
+        self.book.call(self.name, "clear", (r1, c1, r2, c2))
+
+    def set_merged_value(self, addr, value):
+        self.book.call(self.name, "set_merged_value", (addr, value))
+
+    def set_column_format(self, col, fmt):
+        self.book.call(self.name, "set_column_format", (col, fmt))
+
+
+class RemoteBook(Book):
+    """
+    세션 서버에 연결한 워크북 (Excel 시작 / 파일 열기 없음)
+    - 쓰기 오류는 모아 보낸 요청이 실행될 때(다음 읽기 / 저장) 올라옴
+    - close / reopen 때 저장하지 않은 변경은 서버가 버림
+    """
+
+    backend = "server"
+
+    def __init__(self, conn, full_name: str, server_backend: str):
+        self.conn = conn
+        self.full_name = full_name
+        self.server_backend = server_backend
+        self._queue = []
+
+    @classmethod
+    def open(cls, path: str, password: str = None):
+        state = load_state()
+        if state is None:
+            raise ConnectionError("워크북 세션 서버가 실행 중이 아닙니다. (python workbook_server.py start)")
+        try:
+            conn = connect(state)
+        except (OSError, AuthenticationError) as e:
+            raise ConnectionError(f"워크북 세션 서버에 연결하지 못했습니다 (pid {state.get('pid')}): {e}") from e
+
+        book = cls(conn, path, state.get("backend", ""))
+        try:
+            info = book.request({"op": "hello", "path": path})
+        except Exception:
+            conn.close()
+            raise
+        book.full_name = info["full_name"]
+        book.server_backend = info["server_backend"]
+        print(f"🔌 세션 서버 워크북 사용 (pid {state.get('pid')}, backend={book.server_backend})")
+        return book
+
+    def request(self, msg: dict) -> dict:
+        self.conn.send(msg)
+        resp = self.conn.recv()
+        if not resp.get("ok"):
+            raise RuntimeError(f"세션 서버 오류: {resp.get('error')}\n{resp.get('traceback', '')}")
+        return resp
+
+    def call(self, sheet: str, method: str, args: tuple):
+        self._queue.append((sheet, method, args))
+        if method not in QUEUED_METHODS:
+            return self.flush()[-1]
+        return None
+
+    def flush(self) -> list:
+        if not self._queue:
+            return []
+        calls, self._queue = self._queue, []
+        resp = self.request({"op": "batch", "calls": calls})
+        for key, n in resp["counts"].items():   # 서버 쪽 COM 호출 / 재시도 수
+            tracing.count(key, n)
+        return resp["results"]
+
+    def sheet(self, name):
+        self.request({"op": "sheet", "name": name})
+        return RemoteSheet(self, name)
+
+    def save(self):
+        self.flush()
+        self.request({"op": "save"})
+
+    def close(self):
+        if self.conn is None:
+            return
+        self._queue.clear()   # 보내지 않은 쓰기 = 저장하지 않은 변경
+        try:
+            self.request({"op": "release"})
+        except (OSError, EOFError, RuntimeError) as e:
+            print(f"⚠ 세션 서버 연결 종료 오류: {e}")
+        finally:
+            self.conn.close()
+            self.conn = None
+
+    def reopen(self):
+        """보내지 않은 쓰기는 버리고, 서버에 저장하지 않은 변경을 버리고 파일에서 다시 열도록 요청"""
+        self._queue.clear()
+        self.request({"op": "reopen"})
+
+
+# ===========================
+# 4. 관리 (start / status / stop)
+# ===========================
+def server_status():
+    """떠 있는 서버 상태 dict (없거나 응답이 없으면 None, 남은 기록은 지움)"""
+    state = load_state()
+    if state is None:
+        return None
+    try:
+        with connect(state) as conn:
+            conn.send({"op": "status"})
+            return conn.recv()
+    except (OSError, EOFError, AuthenticationError):
+        remove_state(state.get("pid"))
+        return None
+
+
+def stop_server() -> bool:
+    """서버에 종료 요청 (워크북을 닫고 Excel 도 종료) - 떠 있지 않았으면 False"""
+    state = load_state()
+    if state is None:
+        return False
+    try:
+        with connect(state) as conn:
+            conn.send({"op": "shutdown"})
+            conn.recv()
+    except (OSError, EOFError, AuthenticationError):
+        remove_state(state.get("pid"))
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="고객 파일을 열어 둔 채 업데이트 요청을 받는 로컬 세션 서버")
+    parser.add_argument("command", choices=["start", "status", "stop"])
+    parser.add_argument("--backend", choices=["com", "openpyxl"], help="서버가 워크북을 여는 방식 (기본: WORKBOOK_BACKEND 또는 com)")
+    parser.add_argument("--file", help="고객 파일 경로 (기본: 고정 경로)")
+    parser.add_argument("--idle", type=int, default=IDLE_TIMEOUT, help="요청이 없으면 종료할 시간(초)")
+    args = parser.parse_args()
+
+    if args.command == "start":
+        serve(args.file, backend=args.backend, idle_timeout=args.idle)
+    elif args.command == "status":
+        status = server_status()
+        if status is None:
+            print("세션 서버가 실행 중이 아닙니다.")
+        else:
+            for key in ("path", "backend", "pid", "excel_pid", "started", "sessions", "reopened", "idle_seconds"):
+                print(f"{key:<13} {status.get(key)}")
+    else:
+        print("⏹ 종료 요청을 보냈습니다." if stop_server() else "세션 서버가 실행 중이 아닙니다.")